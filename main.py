@@ -1,27 +1,92 @@
 import os
-from typing import Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, HttpUrl, Field
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, HttpUrl, Field, field_validator
 import uvicorn
 
 from tools.utils.url_utils import (
-    get_url_content,
+    get_url_content_result_async,
     FetchMethod,
+    MarkdownProfile,
     ProcessMethod,
 )
+from tools.utils.browser_pool import BLOCKABLE_RESOURCE_TYPES, start_browser_pool, stop_browser_pool
+from tools.utils.process_pool import start_process_pool, stop_process_pool
+from tools.utils.item_store import (
+    ITEM_FIELDS,
+    VersionConflictError,
+    close_item_store,
+    decode_cursor,
+    encode_cursor,
+    get_item_store,
+)
+from tools.utils.http_client import close_http_clients, http_pool_stats
+from tools.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from tools.utils.metrics import (
+    FETCH_ERRORS,
+    FETCH_STAGE_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    mark_worker_stopped,
+    multiprocess_directory,
+    render as render_metrics,
+)
+from tools.utils.dns_resolver import HostResolutionError, pin_host, resolve_host
+from tools.utils.ssrf_guard import UnsafeAddressError, enable_ssrf_guard, is_host_blocked, is_ip_dangerous
 
 # 標準ライブラリ
-import socket
-import ipaddress
+import asyncio
+import codecs
+import importlib.util
+import json
+import logging
+import re
 from urllib.parse import urlparse
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリのライフサイクルに合わせて共有リソースを起動・停止する"""
+    # /items のストアを開く（sqlite の場合は既存のデータを引き継ぐ）
+    get_item_store()
+    # markdown/readability の変換用ワーカー（PROCESS_POOL_WORKERS 指定時のみ）
+    await start_process_pool()
+    # browser取得用のChromiumを常駐させる（未導入なら都度起動にフォールバック）
+    await start_browser_pool()
+    try:
+        yield
+    finally:
+        # 実行中の取得が終わるのを待ってから共有リソースを止める
+        await _drain_inflight_fetches(float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")))
+        await stop_browser_pool()
+        await close_http_clients()
+        await stop_process_pool()
+        close_item_store()
+        mark_worker_stopped()
+
+logger = logging.getLogger(__name__)
+
+# 実行中のURL取得（シャットダウン時に完了を待つ）
+_inflight_fetches: set = set()
+
+
+async def _drain_inflight_fetches(timeout: float) -> None:
+    """実行中のURL取得の完了を最大timeout秒待つ（超えた分はキャンセルする）"""
+    pending = {task for task in _inflight_fetches if not task.done()}
+    if not pending:
+        return
+    logger.info(f"実行中の取得 {len(pending)} 件の完了を待機します")
+    _, pending = await asyncio.wait(pending, timeout=timeout)
+    for task in pending:
+        task.cancel()
+
 # FastAPIアプリケーションのインスタンス作成
 app = FastAPI(
     title="N8N Python Server",
     description="FastAPIを使用したシンプルなAPIサーバー",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # データモデルの定義（サンプル）
@@ -31,13 +96,54 @@ class Item(BaseModel):
     price: float
     is_available: bool = True
 
+class ItemUpdate(Item):
+    id: int
+    version: Optional[int] = Field(default=None, description="指定時は現在の version と一致する場合だけ更新する（If-Match と同じ）")
+
+ITEMS_BULK_MAX = int(os.getenv("ITEMS_BULK_MAX", "1000"))
+
+class ItemBulkCreateRequest(BaseModel):
+    """アイテム一括追加のリクエストモデル"""
+    items: List[Item] = Field(..., min_length=1, max_length=ITEMS_BULK_MAX, description="追加するアイテム")
+
+class ItemBulkUpdateRequest(BaseModel):
+    """アイテム一括更新のリクエストモデル"""
+    items: List[ItemUpdate] = Field(..., min_length=1, max_length=ITEMS_BULK_MAX, description="更新するアイテム（idで指定）")
+
+class ItemBulkDeleteRequest(BaseModel):
+    """アイテム一括削除のリクエストモデル"""
+    ids: List[int] = Field(..., min_length=1, max_length=ITEMS_BULK_MAX, description="削除するアイテムのID")
+
+class ItemBulkResult(BaseModel):
+    """一括操作の1件分の結果（成功時はitem、失敗時はerror/status_code。version不一致(412)のitemは現在の内容）"""
+    index: int
+    ok: bool
+    item: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+class ItemBulkResponse(BaseModel):
+    """一括操作のレスポンスモデル（resultsは入力順）"""
+    results: List[ItemBulkResult]
+    succeeded: int
+    failed: int
+
+def _bulk_result(index: int, item: Any) -> ItemBulkResult:
+    if isinstance(item, VersionConflictError):
+        return ItemBulkResult(index=index, ok=False, item=item.current, error=str(item), status_code=412)
+    if item is None:
+        return ItemBulkResult(index=index, ok=False, error="Item not found", status_code=404)
+    return ItemBulkResult(index=index, ok=True, item=item)
+
+def _bulk_response(items: List[Any]) -> ItemBulkResponse:
+    results = [_bulk_result(i, item) for i, item in enumerate(items)]
+    succeeded = sum(1 for r in results if r.ok)
+    return ItemBulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
 class Message(BaseModel):
     message: str
     data: Optional[Dict[str, Any]] = None
 
-# サンプルデータ
-items_db = []
-
 # ルート（メインページ）
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -59,12 +165,17 @@ async def read_root():
         <h2>利用可能なエンドポイント：</h2>
         <div class="endpoint"><strong>GET /</strong> - このページ</div>
         <div class="endpoint"><strong>GET /health</strong> - ヘルスチェック</div>
-        <div class="endpoint"><strong>GET /items</strong> - 全アイテム取得</div>
+        <div class="endpoint"><strong>GET /items</strong> - アイテム一覧（カーソルによるページ分割・絞り込み・項目指定）</div>
         <div class="endpoint"><strong>POST /items</strong> - アイテム追加</div>
+        <div class="endpoint"><strong>POST / PUT / DELETE /items/bulk</strong> - アイテムの一括追加・更新・削除（1件ごとの結果を返す）</div>
         <div class="endpoint"><strong>GET /items/{item_id}</strong> - 特定アイテム取得</div>
         <div class="endpoint"><strong>PUT /items/{item_id}</strong> - アイテム更新</div>
         <div class="endpoint"><strong>DELETE /items/{item_id}</strong> - アイテム削除</div>
         <div class="endpoint"><strong>POST /url-contents</strong> - URLコンテンツの取得（request/browser × raw/markdown/readability）</div>
+        <div class="endpoint"><strong>POST /url-contents/batch</strong> - URLコンテンツの一括取得（並行取得、入力順に結果を返す）</div>
+        <div class="endpoint"><strong>POST /url-contents/batch/stream</strong> - URLコンテンツの一括取得（完了順にNDJSONで逐次返却）</div>
+        <div class="endpoint"><strong>GET /url-contents/pool-stats</strong> - HTTP接続プールの再利用状況</div>
+        <div class="endpoint"><strong>GET /metrics</strong> - Prometheus形式のメトリクス（URL取得の段階ごとの所要時間など）</div>
         <div class="endpoint"><strong>GET /docs</strong> - Swagger UI（API仕様書）</div>
 
         <p><a href="/docs">API仕様書を見る</a></p>
@@ -78,45 +189,145 @@ async def read_root():
 async def health_check():
     return {"status": "healthy", "message": "Server is running"}
 
-# 全アイテム取得
+# アイテム一覧（ページ分割）
+ITEMS_PAGE_MAX = int(os.getenv("ITEMS_PAGE_MAX", "1000"))
+
 @app.get("/items")
-async def get_items():
-    return {"items": items_db, "count": len(items_db)}
+async def get_items(
+    limit: int = Query(100, ge=1, le=ITEMS_PAGE_MAX, description="1ページの最大件数"),
+    cursor: Optional[str] = Query(None, description="前のページの next_cursor"),
+    fields: Optional[str] = Query(None, description="返す項目（カンマ区切り。例: id,name,price）"),
+    is_available: Optional[bool] = Query(None, description="販売可否で絞り込む"),
+    min_price: Optional[float] = Query(None, description="価格の下限（含む）"),
+    max_price: Optional[float] = Query(None, description="価格の上限（含む）"),
+):
+    projection = None
+    if fields:
+        projection = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in projection if f not in ("id", "version") and f not in ITEM_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知の項目です: {', '.join(unknown)}")
+    try:
+        # sqlite の読み込みでイベントループを塞がないようスレッドで実行する
+        items, next_cursor = await asyncio.to_thread(
+            get_item_store().query,
+            is_available=is_available,
+            min_price=min_price,
+            max_price=max_price,
+            cursor=decode_cursor(cursor) if cursor else None,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if projection is not None:
+        items = [{f: item[f] for f in projection} for item in items]
+    return {"items": items, "count": len(items), "next_cursor": encode_cursor(next_cursor)}
+
+# アイテムのversionをETagとして返し、更新・削除は If-Match で照合する（不一致は412）
+def _etag(item: Dict[str, Any]) -> str:
+    return f'"{item["version"]}"'
+
+_ETAG_RE = re.compile(r'(W/)?"([^"]*)"')
+# If-Match のどの ETag とも一致しない場合に照合させる version（version は1から始まるため必ず412になる）
+_NO_MATCHING_VERSION = 0
+
+def _if_match_versions(if_match: Optional[str]) -> Optional[set]:
+    """
+    If-Match ヘッダーから一致とみなす version の集合を取り出す（未指定・* の場合は照合しないのでNone）
+
+    If-Match は強い比較のため、弱いETag（W/"3"）や発行していない形式のETagはどれとも一致しない（412）。
+    ETag の形式になっていない場合だけ400にする。
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.isdigit():
+            # 引用符の無い version も受け付ける
+            versions.add(int(tag))
+            continue
+        match = _ETAG_RE.fullmatch(tag)
+        if match is None:
+            raise HTTPException(status_code=400, detail='If-Match には ETag（例: "3"）をカンマ区切りで指定してください')
+        weak, value = match.groups()
+        if not weak and value.isdigit():
+            versions.add(int(value))
+    return versions
+
+async def _if_match_version(item_id: int, if_match: Optional[str]) -> Optional[int]:
+    """If-Match ヘッダーから、ストアで照合する version を決める（未指定・* の場合は照合しない）"""
+    versions = _if_match_versions(if_match)
+    if versions is None:
+        return None
+    if len(versions) == 1:
+        return next(iter(versions))
+    if versions:
+        # 複数指定されていれば現在の version を選ぶ（更新時にストアが改めて照合する）
+        current = await asyncio.to_thread(get_item_store().get, item_id)
+        if current is not None and current["version"] in versions:
+            return current["version"]
+    return _NO_MATCHING_VERSION
+
+def _version_conflict(e: VersionConflictError) -> HTTPException:
+    return HTTPException(status_code=412, detail=str(e), headers={"ETag": _etag(e.current)})
 
 # アイテム追加
 @app.post("/items")
-async def create_item(item: Item):
-    item_dict = item.dict()
-    item_dict["id"] = len(items_db) + 1
-    items_db.append(item_dict)
+async def create_item(item: Item, response: Response):
+    item_dict = await asyncio.to_thread(get_item_store().create, item.model_dump())
+    response.headers["ETag"] = _etag(item_dict)
     return {"message": "Item created successfully", "item": item_dict}
 
+# アイテム一括操作（/items/{item_id} より先に登録する）
+# 全行の検証はリクエストの解析時に一度に行い、1件でも不正なら何も書き込まず422を返す。
+# 書き込みはまとめて1回で行い（sqlite は1トランザクション）、イベントループを塞がないようスレッドで実行する。
+@app.post("/items/bulk", response_model=ItemBulkResponse)
+async def create_items_bulk(payload: ItemBulkCreateRequest) -> ItemBulkResponse:
+    rows = [item.model_dump() for item in payload.items]
+    return _bulk_response(await asyncio.to_thread(get_item_store().create_many, rows))
+
+@app.put("/items/bulk", response_model=ItemBulkResponse)
+async def update_items_bulk(payload: ItemBulkUpdateRequest) -> ItemBulkResponse:
+    updates = [(item.id, item.model_dump(exclude={"id", "version"}), item.version) for item in payload.items]
+    return _bulk_response(await asyncio.to_thread(get_item_store().update_many, updates))
+
+@app.delete("/items/bulk", response_model=ItemBulkResponse)
+async def delete_items_bulk(payload: ItemBulkDeleteRequest) -> ItemBulkResponse:
+    return _bulk_response(await asyncio.to_thread(get_item_store().delete_many, payload.ids))
+
 # 特定アイテム取得
 @app.get("/items/{item_id}")
-async def get_item(item_id: int):
-    for item in items_db:
-        if item["id"] == item_id:
-            return item
+async def get_item(item_id: int, response: Response):
+    item = await asyncio.to_thread(get_item_store().get, item_id)
+    if item is not None:
+        response.headers["ETag"] = _etag(item)
+        return item
     return {"error": "Item not found"}, 404
 
 # アイテム更新
 @app.put("/items/{item_id}")
-async def update_item(item_id: int, item: Item):
-    for i, existing_item in enumerate(items_db):
-        if existing_item["id"] == item_id:
-            item_dict = item.dict()
-            item_dict["id"] = item_id
-            items_db[i] = item_dict
-            return {"message": "Item updated successfully", "item": item_dict}
+async def update_item(item_id: int, item: Item, response: Response, if_match: Optional[str] = Header(default=None)):
+    expected_version = await _if_match_version(item_id, if_match)
+    try:
+        item_dict = await asyncio.to_thread(get_item_store().update, item_id, item.model_dump(), expected_version)
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    if item_dict is not None:
+        response.headers["ETag"] = _etag(item_dict)
+        return {"message": "Item updated successfully", "item": item_dict}
     return {"error": "Item not found"}, 404
 
 # アイテム削除
 @app.delete("/items/{item_id}")
-async def delete_item(item_id: int):
-    for i, item in enumerate(items_db):
-        if item["id"] == item_id:
-            deleted_item = items_db.pop(i)
-            return {"message": "Item deleted successfully", "item": deleted_item}
+async def delete_item(item_id: int, if_match: Optional[str] = Header(default=None)):
+    expected_version = await _if_match_version(item_id, if_match)
+    try:
+        deleted_item = await asyncio.to_thread(get_item_store().delete, item_id, expected_version)
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    if deleted_item is not None:
+        return {"message": "Item deleted successfully", "item": deleted_item}
     return {"error": "Item not found"}, 404
 
 # メッセージエンドポイント（汎用）
@@ -137,11 +348,39 @@ class UrlFetchRequest(BaseModel):
     fetch_method: FetchMethod = Field(default=FetchMethod.REQUEST, description="コンテンツの取得方法")
     process_method: ProcessMethod = Field(default=ProcessMethod.RAW, description="コンテンツの処理方法")
     timeout: int = Field(default=30, ge=1, le=600, description="リクエストのタイムアウト（秒）")
-    wait_for_js: int = Field(default=3000, ge=0, le=60000, description="browser取得時のJS待機（ミリ秒）")
+    wait_for_js: int = Field(default=3000, ge=0, le=60000, description="browser取得時に描画完了を待つ最大時間（ミリ秒。DOMの変更が止まった時点で打ち切る）")
     headers: Optional[Dict[str, str]] = Field(default=None, description="追加のHTTPヘッダー")
     allow_redirects: bool = Field(default=False, description="リダイレクトを許可するか（SSRF軽減のためデフォルトFalse）")
     max_bytes: int = Field(default=int(os.getenv("URL_FETCH_MAX_BYTES", "2000000")), ge=10_000, le=50_000_000, description="取得する最大バイト数（request取得時）")
     max_chars: int = Field(default=int(os.getenv("URL_FETCH_MAX_CHARS", "1000000")), ge=10_000, le=10_000_000, description="返却文字数の上限（超過分は切り捨て）")
+    cache_ttl: Optional[int] = Field(default=None, ge=0, le=7 * 24 * 3600, description="結果をキャッシュする秒数（未指定でサーバー既定値、0で保存しない）")
+    cache_bypass: bool = Field(default=False, description="キャッシュを参照せずに取得するか（結果はキャッシュに保存）")
+    markdown_profile: Optional[MarkdownProfile] = Field(default=None, description="markdown/readability のテキスト変換設定（未指定で処理方法ごとの既定）")
+    encoding: Optional[str] = Field(default=None, max_length=40, description="本文の文字コード（request取得時。未指定でBOM・ヘッダー・<meta charset>・推定の順に判定）")
+    block_resource_types: Optional[List[str]] = Field(default=None, max_length=20, description="browser取得時に遮断するリソース種別（未指定でサーバー既定: image, media, font。[]で遮断しない）")
+    wait_for_selector: Optional[str] = Field(default=None, max_length=500, description="browser取得時、このCSSセレクタの要素が現れるまで待つ（wait_for_js の時間内）")
+    block_domains: Optional[List[str]] = Field(default=None, max_length=500, description="browser取得時に遮断するドメイン（サブドメインも対象。未指定でサーバー既定の広告・アクセス解析。[]で遮断しない）")
+
+    @field_validator("encoding")
+    @classmethod
+    def _check_encoding(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            try:
+                codecs.lookup(value)
+            except LookupError:
+                raise ValueError(f"不明な文字コードです: {value}")
+        return value
+
+    @field_validator("block_resource_types")
+    @classmethod
+    def _check_block_resource_types(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        if value is not None:
+            unknown = sorted(set(value) - BLOCKABLE_RESOURCE_TYPES)
+            if unknown:
+                raise ValueError(
+                    f"遮断できないリソース種別です: {unknown}（指定可能: {sorted(BLOCKABLE_RESOURCE_TYPES)}）"
+                )
+        return value
 
 
 class UrlFetchResponse(BaseModel):
@@ -151,6 +390,10 @@ class UrlFetchResponse(BaseModel):
     process_method: ProcessMethod
     content: str
     length: int
+    cache_hit: bool = False
+    revalidated: bool = False
+    truncated: bool = False  # max_charsで切り詰めたか（RAW/MARKDOWNは上限到達時に取得を打ち切る）
+    coalesced: bool = False  # 同時に実行中だった同じ条件の取得の結果を共有したか
 
 
 def _sanitize_headers(headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
@@ -167,49 +410,63 @@ def _sanitize_headers(headers: Optional[Dict[str, str]]) -> Optional[Dict[str, s
     return clean or None
 
 
-def _is_ip_dangerous(ip_str: str) -> bool:
-    ip = ipaddress.ip_address(ip_str)
-    return (
-        ip.is_private
-        or ip.is_loopback
-        or ip.is_link_local
-        or ip.is_multicast
-        or ip.is_reserved
-        or ip.is_unspecified
-    )
-
-
-def _assert_url_safe(raw_url: str) -> None:
+async def _assert_url_safe(raw_url: str) -> list[str]:
     parsed = urlparse(raw_url)
     host = parsed.hostname or ""
     # ローカルホスト系や.localは拒否
-    if host in {"localhost", "localhost.localdomain", "local"} or host.endswith(".local"):
+    if is_host_blocked(host):
+        FETCH_ERRORS.labels(type=UnsafeAddressError.__name__).inc()
         raise HTTPException(status_code=400, detail="危険なホスト名は許可されていません")
     try:
-        infos = socket.getaddrinfo(host, None)
-    except Exception:
+        with FETCH_STAGE_SECONDS.labels(stage="ssrf_dns").time():
+            ips = await resolve_host(host)
+    except HostResolutionError:
+        FETCH_ERRORS.labels(type=HostResolutionError.__name__).inc()
         raise HTTPException(status_code=400, detail="ホスト名解決に失敗しました")
-    ips = {info[4][0] for info in infos if info and info[4]}
     if not ips:
+        FETCH_ERRORS.labels(type=HostResolutionError.__name__).inc()
         raise HTTPException(status_code=400, detail="有効なIPアドレスが見つかりません")
     for ip in ips:
-        if _is_ip_dangerous(ip):
+        if is_ip_dangerous(ip):
+            FETCH_ERRORS.labels(type=UnsafeAddressError.__name__).inc()
             raise HTTPException(status_code=400, detail="プライベート/危険なアドレスは許可されていません")
+    # 検査済みのアドレスに接続先を固定する（取得時に再解決しない）
+    pin_host(host, ips)
+    # リダイレクト先への接続も同じ基準で検査する
+    enable_ssrf_guard()
+    return ips
 
 
 @app.post("/url-contents", response_model=UrlFetchResponse)
-def fetch_url_contents(payload: UrlFetchRequest) -> UrlFetchResponse:
+async def fetch_url_contents(payload: UrlFetchRequest) -> UrlFetchResponse:
     """指定URLのコンテンツを取得し、指定した方法で処理して返す。
 
     - fetch_method: `request` or `browser`
     - process_method: `raw`, `markdown`, or `readability`
-    - Optional: `timeout`, `wait_for_js`, `headers`
+    - Optional: `timeout`, `wait_for_js`, `wait_for_selector`, `headers`
+    - Cache: `cache_ttl`, `cache_bypass`（レスポンスの `cache_hit` でヒット有無、
+      `revalidated` でETag/Last-Modifiedによる304再検証の有無を返す）
     """
+    return await _fetch_url_item(payload)
+
+
+async def _fetch_url_item(payload: UrlFetchRequest) -> UrlFetchResponse:
+    """1件分のURL取得（失敗時はHTTPExceptionを送出）"""
+    task = asyncio.current_task()
+    _inflight_fetches.add(task)
+    try:
+        with REQUESTS_IN_FLIGHT.track_inprogress():
+            return await _fetch_url_item_inner(payload)
+    finally:
+        _inflight_fetches.discard(task)
+
+
+async def _fetch_url_item_inner(payload: UrlFetchRequest) -> UrlFetchResponse:
     # SSRFプリチェック（事前にホスト解決とIP帯域検査）
-    _assert_url_safe(str(payload.url))
+    await _assert_url_safe(str(payload.url))
 
     try:
-        content = get_url_content(
+        result = await get_url_content_result_async(
             str(payload.url),
             fetch_method=payload.fetch_method,
             process_method=payload.process_method,
@@ -219,26 +476,205 @@ def fetch_url_contents(payload: UrlFetchRequest) -> UrlFetchResponse:
             allow_redirects=payload.allow_redirects,
             max_bytes=payload.max_bytes,
             max_chars=payload.max_chars,
+            cache_ttl=payload.cache_ttl,
+            cache_bypass=payload.cache_bypass,
+            markdown_profile=payload.markdown_profile,
+            encoding=payload.encoding,
+            block_resource_types=payload.block_resource_types,
+            block_domains=payload.block_domains,
+            wait_for_selector=payload.wait_for_selector,
         )
         return UrlFetchResponse(
             url=payload.url,
             fetch_method=payload.fetch_method,
             process_method=payload.process_method,
-            content=content,
-            length=len(content or ""),
+            content=result.content,
+            length=len(result.content or ""),
+            cache_hit=result.cache_hit,
+            revalidated=result.revalidated,
+            truncated=result.truncated,
+            coalesced=result.coalesced,
         )
+    except UnsafeAddressError as e:
+        # リダイレクト先が危険なアドレスだった場合
+        raise HTTPException(status_code=400, detail=f"リダイレクト先が許可されていません: {e}")
     except ImportError as e:
         raise HTTPException(status_code=400, detail=f"必要なライブラリが不足しています: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"URL取得時にエラーが発生しました: {e}")
 
+
+# バッチ取得用のPydanticモデル
+class UrlBatchRequest(BaseModel):
+    """URLコンテンツ一括取得のリクエストモデル"""
+    items: List[UrlFetchRequest] = Field(..., min_length=1, max_length=int(os.getenv("URL_BATCH_MAX_ITEMS", "1000")), description="取得対象（/url-contents と同じ形式）")
+    concurrency: int = Field(default=int(os.getenv("URL_BATCH_CONCURRENCY", "16")), ge=1, le=128, description="バッチ全体の同時取得数")
+    per_host_concurrency: int = Field(default=int(os.getenv("URL_BATCH_PER_HOST_CONCURRENCY", "4")), ge=1, le=32, description="同一ホストへの同時取得数")
+
+
+class UrlBatchItemResult(BaseModel):
+    """一括取得の1件分の結果（成功時はresult、失敗時はerror/status_code）"""
+    index: int
+    ok: bool
+    result: Optional[UrlFetchResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+class UrlBatchResponse(BaseModel):
+    """URLコンテンツ一括取得のレスポンスモデル（resultsは入力順）"""
+    results: List[UrlBatchItemResult]
+    succeeded: int
+    failed: int
+
+
+def _item_deadline(payload: UrlFetchRequest) -> float:
+    """1件の取得にかける最大秒数（接続・読み込み・ブラウザ待機を合わせた上限）"""
+    return payload.timeout * 2 + payload.wait_for_js / 1000
+
+
+async def _fetch_batch_item(
+    index: int,
+    payload: UrlFetchRequest,
+    global_limit: asyncio.Semaphore,
+    host_limits: Dict[str, asyncio.Semaphore],
+    per_host_concurrency: int,
+) -> UrlBatchItemResult:
+    """同時実行数の制限内で1件を取得し、例外は結果に変換する"""
+    host = (payload.url.host or "").lower()
+    host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host_concurrency))
+    try:
+        async with global_limit, host_limit:
+            response = await asyncio.wait_for(
+                _fetch_url_item(payload), timeout=_item_deadline(payload)
+            )
+        return UrlBatchItemResult(index=index, ok=True, result=response)
+    except HTTPException as e:
+        return UrlBatchItemResult(index=index, ok=False, error=str(e.detail), status_code=e.status_code)
+    except asyncio.TimeoutError:
+        return UrlBatchItemResult(index=index, ok=False, error="URL取得がタイムアウトしました", status_code=504)
+    except Exception as e:
+        return UrlBatchItemResult(index=index, ok=False, error=f"URL取得時にエラーが発生しました: {e}", status_code=500)
+
+
+@app.post("/url-contents/batch", response_model=UrlBatchResponse)
+async def fetch_url_contents_batch(payload: UrlBatchRequest) -> UrlBatchResponse:
+    """複数URLのコンテンツを並行して取得し、入力順に結果を返す。
+
+    - 各要素は `/url-contents` と同じ形式
+    - `concurrency` でバッチ全体、`per_host_concurrency` で同一ホストへの同時取得数を制限
+    - 一部のURLが失敗・タイムアウトしても、その要素が `ok: false` になるだけでバッチ全体は成功する
+    """
+    global_limit = asyncio.Semaphore(payload.concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    results = await asyncio.gather(*(
+        _fetch_batch_item(i, item, global_limit, host_limits, payload.per_host_concurrency)
+        for i, item in enumerate(payload.items)
+    ))
+    succeeded = sum(1 for r in results if r.ok)
+    return UrlBatchResponse(
+        results=list(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+    )
+
+def _batch_item_line(item: UrlBatchItemResult) -> str:
+    """ストリーミング用に1件の結果をNDJSONの1行にする（UrlFetchResponseの項目は展開）"""
+    line: Dict[str, Any] = {"index": item.index, "ok": item.ok}
+    if item.ok and item.result is not None:
+        line.update(item.result.model_dump(mode="json"))
+    else:
+        line.update({"error": item.error, "status_code": item.status_code})
+    return json.dumps(line, ensure_ascii=False) + "\n"
+
+
+@app.post("/url-contents/batch/stream")
+async def fetch_url_contents_batch_stream(payload: UrlBatchRequest) -> StreamingResponse:
+    """複数URLを並行して取得し、完了した順にNDJSON（1行1件）で返す。
+
+    - リクエスト形式は `/url-contents/batch` と同じ
+    - 各行は `index`（入力順の位置）と `ok` に加え、成功時は `/url-contents` のレスポンス項目、
+      失敗時は `error` / `status_code` を持つ
+    - 結果はサーバー側で溜めずに逐次送信する（`concurrency` 個のワーカーが順に取得し、
+      送信待ちの結果も `concurrency` 件までに抑える）
+    """
+    global_limit = asyncio.Semaphore(payload.concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def stream():
+        # 要素ごとにタスクを作らず、ワーカーが未取得の要素を順に取り出して結果をキューに積む
+        pending = iter(enumerate(payload.items))
+        results: asyncio.Queue = asyncio.Queue(maxsize=payload.concurrency)
+
+        async def worker() -> None:
+            for index, item in pending:
+                await results.put(
+                    await _fetch_batch_item(index, item, global_limit, host_limits, payload.per_host_concurrency)
+                )
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(payload.concurrency, len(payload.items)))
+        ]
+        try:
+            for _ in range(len(payload.items)):
+                result = await results.get()
+                line = _batch_item_line(result)
+                # 送信した結果は保持しない
+                del result
+                yield line
+        finally:
+            # クライアント切断時などは残りの取得を打ち切る
+            for task in workers:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/url-contents/pool-stats")
+async def get_url_pool_stats():
+    """共有HTTPクライアントの接続再利用状況（リクエスト数・新規接続数・再利用率）を返す"""
+    return http_pool_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus形式のメトリクス（URL取得の段階ごとの所要時間・取得バイト数・キャッシュヒット率など）"""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # サーバー起動（開発用）
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def run_server() -> None:
+    """
+    環境変数の設定に従ってuvicornを起動する（本番用）
+
+    - HOST / PORT: 待ち受けアドレス（デフォルト 0.0.0.0 / 8000）
+    - WEB_CONCURRENCY: ワーカープロセス数（デフォルト1）
+    - SERVER_RELOAD: 1でファイル変更時に自動リロードする開発モード（ワーカーは1つ）
+    - SERVER_GRACEFUL_TIMEOUT: 停止時に実行中のリクエストを待つ秒数（デフォルト30）
+
+    ブラウザプールやHTTPクライアントなどはlifespanでワーカーごとに起動する。
+    複数ワーカーの場合、/metrics は全ワーカーの合計を返す（PROMETHEUS_MULTIPROC_DIR 未指定なら一時ディレクトリを使う）。
+    uvloop / httptools が導入されていればそれを使う。
+    """
+    reload = os.getenv("SERVER_RELOAD", "0") == "1"
+    workers = 1 if reload else max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+    with multiprocess_directory(workers > 1):
+        uvicorn.run(
+            "main:app",
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", "8000")),
+            workers=workers,
+            reload=reload,
+            loop="uvloop" if _installed("uvloop") else "auto",
+            http="httptools" if _installed("httptools") else "auto",
+            timeout_graceful_shutdown=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+            log_level="info",
+        )
+
+
 if __name__ == "__main__":
-    port = int(os.getenv("PORT", "8000"))
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info",
-    )
+    run_server()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+html2text変換器の生成コストのマイクロベンチマーク
+
+呼び出しごとに HTML2Text() を生成・設定する従来の方法（build_converter）と、
+設定済みの原型を複製する方法（get_converter）を、代表的なページで比較する。
+
+実行方法:
+    python tools/getURLContent/bench_html_converters.py [繰り返し回数]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.html_converters import (  # noqa: E402
+    MarkdownProfile,
+    build_converter,
+    get_converter,
+)
+
+
+def _corpus() -> dict[str, str]:
+    """代表的なページ（短いページ・記事・ドキュメント・リンク一覧）"""
+    article = (
+        "<html><head><title>記事</title></head><body><article><h1>見出し</h1>"
+        + "".join(
+            f"<p>段落{i}の本文です。<b>強調</b>や<a href='/ref/{i}'>参照リンク</a>を含みます。</p>"
+            for i in range(60)
+        )
+        + "<img src='/figure.png' alt='図'></article></body></html>"
+    )
+    docs = (
+        "<html><body><nav><ul>"
+        + "".join(f"<li><a href='/docs/{i}'>章{i}</a></li>" for i in range(20))
+        + "</ul></nav><main><h2>API</h2><pre><code>def f(x):\n    return x * 2\n</code></pre>"
+        + "<table><tr><th>名前</th><th>型</th></tr>"
+        + "".join(f"<tr><td>param{i}</td><td>int</td></tr>" for i in range(30))
+        + "</table></main></body></html>"
+    )
+    links = (
+        "<html><body><ul>"
+        + "".join(f"<li><a href='https://example.com/item/{i}'>項目{i}</a> - 説明</li>" for i in range(300))
+        + "</ul></body></html>"
+    )
+    return {
+        "short": "<html><body><h1>Not Found</h1><p>ページが見つかりません。</p></body></html>",
+        "article": article,
+        "docs": docs,
+        "links": links,
+    }
+
+
+def _per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int = 2000) -> None:
+    profile = MarkdownProfile.DEFAULT
+    setup_old = _per_call_us(lambda: build_converter(profile), number * 10)
+    setup_new = _per_call_us(lambda: get_converter(profile), number * 10)
+    saving = setup_old - setup_new
+    print(f"変換器の準備: 生成+設定 {setup_old:.2f}µs / 原型の複製 {setup_new:.2f}µs "
+          f"（1回あたり {saving:.2f}µs 削減）")
+    print()
+    print(f"{'page':<10}{'bytes':>8}{'convert (µs)':>14}{'saved (µs)':>12}{'saved (%)':>11}")
+    for name, html in _corpus().items():
+        # 複製した変換器でも結果は同じ
+        assert build_converter(profile).handle(html) == get_converter(profile).handle(html)
+        convert = _per_call_us(lambda: get_converter(profile).handle(html), max(number // 20, 1))
+        print(f"{name:<10}{len(html.encode()):>8}{convert:>14.1f}{saving:>12.2f}"
+              f"{saving / (convert + saving):>11.2%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
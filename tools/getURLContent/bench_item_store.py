@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+アイテムストアのレイテンシのベンチマーク
+
+件数を増やしながら、ID指定の取得・更新・削除と追加の1件あたりの時間を計測する。
+従来のリスト実装（全件走査）と比較し、ストアは件数によらず一定であることを確かめる。
+query は販売中（約1%）かつ価格帯で絞り込んだ100件の1ページの取得時間。
+
+実行方法:
+    python tools/getURLContent/bench_item_store.py [最大件数] [--sqlite]
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.item_store import ItemStore, MemoryItemStore, SQLiteItemStore  # noqa: E402
+
+ITEM = {"name": "item", "description": "説明", "price": 100.0, "is_available": True}
+
+
+class _ListStore:
+    """従来の実装（リストと全件走査、IDは件数+1）"""
+
+    def __init__(self) -> None:
+        self.items: list[dict] = []
+
+    def create(self, data: dict) -> dict:
+        item = {**data, "id": len(self.items) + 1}
+        self.items.append(item)
+        return item
+
+    def get(self, item_id: int):
+        for item in self.items:
+            if item["id"] == item_id:
+                return item
+        return None
+
+    def update(self, item_id: int, data: dict):
+        for i, item in enumerate(self.items):
+            if item["id"] == item_id:
+                self.items[i] = {**data, "id": item_id}
+                return self.items[i]
+        return None
+
+    def delete(self, item_id: int):
+        for i, item in enumerate(self.items):
+            if item["id"] == item_id:
+                return self.items.pop(i)
+        return None
+
+
+def _rows(count: int):
+    rng = random.Random(0)
+    for _ in range(count):
+        yield {**ITEM, "price": float(rng.randint(1, 10_000)), "is_available": rng.random() < 0.01}
+
+
+def _fill(store, count: int) -> None:
+    if isinstance(store, SQLiteItemStore):
+        conn = store._conn()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO items (name, description, price, is_available) VALUES (?, ?, ?, ?)",
+            ((r["name"], r["description"], r["price"], r["is_available"]) for r in _rows(count)),
+        )
+        conn.execute("COMMIT")
+    else:
+        for row in _rows(count):
+            store.create(row)
+
+
+def _per_op_us(func, ids: list[int]) -> float:
+    start = time.perf_counter()
+    for item_id in ids:
+        func(item_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def _measure(store, size: int, ops: int) -> dict[str, float]:
+    ids = [random.randint(1, size) for _ in range(ops)]
+    result = {
+        "query": _per_op_us(
+            lambda i: store.query(is_available=True, min_price=float(i % 5_000), limit=100), ids[:200]
+        ) if isinstance(store, ItemStore) else float("nan"),
+        "get": _per_op_us(store.get, ids),
+        "update": _per_op_us(lambda i: store.update(i, ITEM), ids),
+        "create": _per_op_us(lambda _: store.create(ITEM), ids),
+    }
+    # 削除は同じIDを二度消さないよう重複を除く（消した分は件数がわずかに減る）
+    result["delete"] = _per_op_us(store.delete, sorted(set(ids)))
+    return result
+
+
+def main(max_size: int = 1_000_000, use_sqlite: bool = False) -> None:
+    sizes = [s for s in (1_000, 10_000, 100_000, 1_000_000) if s <= max_size]
+    print(f"{'store':<8}{'items':>10}{'get (µs)':>11}{'update':>9}{'create':>9}{'delete':>9}{'query':>9}")
+    for size in sizes:
+        stores: list[tuple[str, object]] = [("memory", MemoryItemStore())]
+        tmp = None
+        if use_sqlite:
+            tmp = tempfile.TemporaryDirectory()
+            stores.append(("sqlite", SQLiteItemStore(os.path.join(tmp.name, "items.db"))))
+        # リスト実装は件数に比例して遅くなるため小さい件数のみ
+        if size <= 10_000:
+            stores.append(("list", _ListStore()))
+        for name, store in stores:
+            _fill(store, size)
+            ops = 200 if name == "list" else 2000
+            r = _measure(store, size, ops)
+            print(f"{name:<8}{size:>10}{r['get']:>11.2f}{r['update']:>9.2f}{r['create']:>9.2f}{r['delete']:>9.2f}{r['query']:>9.2f}")
+            if isinstance(store, ItemStore):
+                store.close()
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 1_000_000, "--sqlite" in sys.argv)
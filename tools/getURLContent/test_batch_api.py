@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+/url-contents/batch と /url-contents/batch/stream の動作検証（TestClient とローカルHTTPサーバーを使用、外部ネットワーク不要）
+
+対象機能:
+- 結果が入力順に並ぶこと
+- 一部の要素の失敗（取得エラー・危険なURL）が、その要素だけの ok: false になること
+- 1件ごとの上限時間（_item_deadline）を超えた要素が 504 になること
+- 同一ホストへの同時取得数（per_host_concurrency）の制限
+- ストリーミング版: NDJSON（1行1件）で完了順に返すこと、失敗した要素の行、同時取得数の制限
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from tools.utils.dns_resolver import pin_host  # noqa: E402
+from tools.utils.ssrf_guard import enable_ssrf_guard  # noqa: E402
+
+# ローカルサーバーに割り当てるホスト名（SSRF検査では 127.0.0.1 に固定する）
+LOCAL_HOSTS = ("batch-a.test", "batch-b.test")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    /page/<名前> はその名前を本文に含むHTML、/sleep/<秒>/<名前> は待ってから同じHTMLを返す。
+    ホストごとに同時に処理中のリクエスト数の最大値を記録する。
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        host = (self.headers.get("Host") or "").split(":")[0]
+        state = self.server
+        with state.lock:
+            state.active[host] = state.active.get(host, 0) + 1
+            state.peak[host] = max(state.peak.get(host, 0), state.active[host])
+        try:
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[0] == "sleep" and len(parts) == 3:
+                time.sleep(float(parts[1]))
+                name = parts[2]
+            elif parts[0] == "page" and len(parts) == 2:
+                name = parts[1]
+            else:
+                self.send_error(404)
+                return
+            body = f"<html><body><p>page {name}</p></body></html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with state.lock:
+                state.active[host] -= 1
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    """処理中のリクエスト数をサーバーごとに持つ（前のテストの遅い応答と混ざらないように）"""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+
+
+def _start_server() -> tuple[_Server, int]:
+    server = _Server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+_real_assert_url_safe = main._assert_url_safe
+
+
+async def _assert_url_safe_allowing_local(raw_url: str) -> list[str]:
+    """テスト用ホスト名だけローカルサーバーに固定し、それ以外は通常のSSRF検査を行う"""
+    host = raw_url.split("://", 1)[1].split("/", 1)[0].split(":")[0]
+    if host in LOCAL_HOSTS:
+        pin_host(host, ["127.0.0.1"])
+        enable_ssrf_guard()
+        return ["127.0.0.1"]
+    return await _real_assert_url_safe(raw_url)
+
+
+class _Api:
+    """ローカルサーバーを起動し、ブラウザプール無しでアプリを TestClient で動かす"""
+
+    def __enter__(self) -> "_Api":
+        self.server, self.port = _start_server()
+        self._patches = [
+            patch.dict(os.environ, {"BROWSER_POOL_ENABLED": "0"}),
+            patch("main._assert_url_safe", _assert_url_safe_allowing_local),
+        ]
+        for p in self._patches:
+            p.start()
+        self.client = TestClient(main.app).__enter__()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self.client.__exit__(*exc)
+        finally:
+            for p in reversed(self._patches):
+                p.stop()
+            self.server.shutdown()
+
+    def url(self, path: str, host: str = LOCAL_HOSTS[0]) -> str:
+        return f"http://{host}:{self.port}{path}"
+
+
+def test_batch_order_and_errors() -> None:
+    with _Api() as api:
+        response = api.client.post("/url-contents/batch", json={
+            "items": [
+                # 最初の要素が最も遅くても、結果は入力順
+                {"url": api.url("/sleep/0.3/first"), "cache_ttl": 0},
+                {"url": api.url("/page/second"), "cache_ttl": 0},
+                {"url": api.url("/missing"), "cache_ttl": 0},
+                {"url": "http://localhost/admin"},
+                {"url": api.url("/page/fifth"), "cache_ttl": 0},
+            ],
+        })
+        assert response.status_code == 200
+        body = response.json()
+        results = body["results"]
+        assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+        assert "page first" in results[0]["result"]["content"]
+        assert "page second" in results[1]["result"]["content"]
+        assert "page fifth" in results[4]["result"]["content"]
+        # 取得エラー（404）
+        assert not results[2]["ok"] and results[2]["status_code"] == 500
+        assert results[2]["result"] is None
+        # 危険なURLはSSRF検査で拒否される
+        assert not results[3]["ok"] and results[3]["status_code"] == 400
+        assert (body["succeeded"], body["failed"]) == (3, 2)
+
+
+def test_batch_item_deadline() -> None:
+    with _Api() as api, patch("main._item_deadline", lambda payload: 0.3):
+        started = time.perf_counter()
+        response = api.client.post("/url-contents/batch", json={
+            "items": [
+                {"url": api.url("/sleep/2/slow"), "cache_ttl": 0},
+                {"url": api.url("/page/fast"), "cache_ttl": 0},
+            ],
+        })
+        elapsed = time.perf_counter() - started
+        results = response.json()["results"]
+        # 上限を超えた要素だけが 504 になり、バッチは待たずに返る
+        assert not results[0]["ok"] and results[0]["status_code"] == 504
+        assert results[1]["ok"]
+        assert elapsed < 1.5
+
+
+def test_batch_per_host_concurrency() -> None:
+    with _Api() as api:
+        items = [
+            {"url": api.url(f"/sleep/0.2/{host}-{i}", host), "cache_ttl": 0}
+            for host in LOCAL_HOSTS
+            for i in range(6)
+        ]
+        response = api.client.post("/url-contents/batch", json={
+            "items": items,
+            "concurrency": 16,
+            "per_host_concurrency": 2,
+        })
+        assert response.json()["succeeded"] == len(items)
+        # ホストごとの同時取得は2件まで、ホストをまたいでは並行して取得する
+        assert api.server.peak == {host: 2 for host in LOCAL_HOSTS}
+
+
+def test_batch_stream() -> None:
+    with _Api() as api:
+        with api.client.stream("POST", "/url-contents/batch/stream", json={
+            "items": [
+                {"url": api.url("/sleep/0.5/slow"), "cache_ttl": 0},
+                {"url": api.url("/page/fast"), "cache_ttl": 0},
+                {"url": api.url("/missing"), "cache_ttl": 0},
+                {"url": "http://localhost/admin"},
+            ],
+        }) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+        # 1行1件で、全要素がちょうど1回ずつ返る
+        assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+        by_index = {line["index"]: line for line in lines}
+        # 完了した順に返るため、先頭の遅い要素は速い要素より後になる
+        order = [line["index"] for line in lines]
+        assert order.index(1) < order.index(0)
+        assert order[-1] == 0
+        # 成功した行は /url-contents のレスポンス項目を展開して持つ
+        assert by_index[1]["ok"] and "page fast" in by_index[1]["content"]
+        assert by_index[1]["fetch_method"] == "request"
+        # 失敗した行は error / status_code を持つ
+        assert not by_index[2]["ok"] and by_index[2]["status_code"] == 500 and by_index[2]["error"]
+        assert not by_index[3]["ok"] and by_index[3]["status_code"] == 400
+
+
+def test_batch_stream_concurrency() -> None:
+    with _Api() as api:
+        items = [{"url": api.url(f"/sleep/0.1/{i}"), "cache_ttl": 0} for i in range(6)]
+        response = api.client.post("/url-contents/batch/stream", json={
+            "items": items,
+            "concurrency": 2,
+        })
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == len(items) and all(line["ok"] for line in lines)
+        # ワーカー数（concurrency）を超えて同時に取得しない
+        assert api.server.peak == {LOCAL_HOSTS[0]: 2}
+
+
+if __name__ == "__main__":
+    test_batch_order_and_errors()
+    test_batch_item_deadline()
+    test_batch_per_host_concurrency()
+    test_batch_stream()
+    test_batch_stream_concurrency()
+    print("✅ テスト完了！")
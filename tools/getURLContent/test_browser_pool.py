@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+browser_pool.py の動作検証（Chromium不要のフェイク実装を使用）
+
+対象機能:
+- 同時ページ数の上限
+- 指定ページ数処理後のブラウザ再起動（起動中も他のリクエストを止めない）
+- RSS合計の計測範囲（指定プロセス配下のみ）
+- サブリソースの遮断（リソース種別・ドメイン）
+- 描画完了の待機（セレクタ・DOM変更の停止・上限時間）
+- ページ本体の受信バイト数のメトリクス
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from prometheus_client import REGISTRY  # noqa: E402
+
+from tools.utils.browser_pool import (  # noqa: E402
+    BrowserPool,
+    ResourceBlocklist,
+    _BrowserSlot,
+    _process_tree_rss_bytes,
+)
+from tools.utils.url_utils import _count_document_bytes, _wait_until_ready  # noqa: E402
+
+
+class _FakeContext:
+    async def add_init_script(self, script: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class _FakeBrowser:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def is_connected(self) -> bool:
+        return not self.closed
+
+    async def new_context(self, **kwargs) -> _FakeContext:
+        return _FakeContext()
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakePool(BrowserPool):
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition(self._lock)
+        self._playwright = object()
+        self.launched: list[_FakeBrowser] = []
+        self.launch_delay = 0.0
+        for _ in range(self.size):
+            self._slots.append(_BrowserSlot(await self._launch()))
+
+    async def _launch(self) -> _FakeBrowser:
+        await asyncio.sleep(self.launch_delay)
+        browser = _FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+def test_recycle_after_pages() -> None:
+    async def run() -> None:
+        pool = _FakePool(size=1, max_pages=2, recycle_after_pages=3, max_rss_mb=0)
+        await pool.start()
+        for _ in range(7):
+            async with pool.context():
+                pass
+        # 3ページごとに入れ替わる: 初回 + 2回の再起動
+        assert len(pool.launched) == 3
+        assert pool.launched[0].closed and pool.launched[1].closed
+        assert not pool.launched[2].closed
+
+    asyncio.run(run())
+
+
+def test_recycle_does_not_block_other_pages() -> None:
+    async def run() -> None:
+        pool = _FakePool(size=1, max_pages=2, recycle_after_pages=1, max_rss_mb=0)
+        await pool.start()
+        pool.launch_delay = 0.3
+
+        async def recycle() -> None:
+            async with pool.context():
+                pass
+
+        # 1ページ目の返却で再起動が始まる。起動中も既存のブラウザでページを開ける
+        task = asyncio.create_task(recycle())
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        async with pool.context():
+            assert time.perf_counter() - started < 0.1
+        await task
+        # 入れ替え後、使用中のコンテキストが無くなった旧ブラウザは閉じられる
+        assert pool.launched[0].closed
+        assert pool._slots[0].browser is pool.launched[-1]
+
+    asyncio.run(run())
+
+
+def test_process_tree_rss_bytes() -> None:
+    if not os.path.isdir("/proc"):
+        return
+    # 子プロセスとその子（孫）を起動し、その配下だけを数える
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import subprocess, sys; subprocess.run([sys.executable, '-c', 'import time; time.sleep(5)'])"]
+    )
+    try:
+        time.sleep(0.5)
+        with open(f"/proc/{child.pid}/task/{child.pid}/children") as f:
+            grandchild = int(f.read().split()[0])
+        own = _process_tree_rss_bytes([os.getpid()])
+        tree = _process_tree_rss_bytes([child.pid])
+        # 孫プロセスも含まれる
+        assert tree > _process_tree_rss_bytes([grandchild]) > 0
+        # 自プロセス配下には子の分も含まれるため、子の配下だけより大きい
+        assert own > tree
+        assert _process_tree_rss_bytes([]) == 0
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_max_concurrent_pages() -> None:
+    async def run() -> None:
+        pool = _FakePool(size=2, max_pages=2, recycle_after_pages=0, max_rss_mb=0)
+        await pool.start()
+        active = 0
+        peak = 0
+
+        async def worker() -> None:
+            nonlocal active, peak
+            async with pool.context():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(worker() for _ in range(8)))
+        assert peak == 2
+
+    asyncio.run(run())
+
+
+class _FakeRequest:
+    def __init__(self, url: str, resource_type: str, frame: object, navigation: bool = False) -> None:
+        self.url = url
+        self.resource_type = resource_type
+        self.frame = frame
+        self._navigation = navigation
+
+    def is_navigation_request(self) -> bool:
+        return self._navigation
+
+
+class _FakeRoute:
+    def __init__(self, request: _FakeRequest) -> None:
+        self.request = request
+        self.action = ""
+
+    async def abort(self, error_code: str = "failed") -> None:
+        self.action = "abort"
+
+    async def continue_(self) -> None:
+        self.action = "continue"
+
+
+class _FakePage:
+    def __init__(self) -> None:
+        self.main_frame = object()
+        self.handler = None
+
+    async def route(self, pattern: str, handler) -> None:
+        self.handler = handler
+
+
+def test_resource_blocklist() -> None:
+    blocklist = ResourceBlocklist.create(["image", "font", "document?"], ["doubleclick.net"])
+    assert blocklist.resource_types == frozenset({"image", "font"})
+    assert blocklist.blocks("image", "https://example.com/a.png")
+    assert blocklist.blocks("script", "https://stats.g.doubleclick.net/t.js")
+    assert not blocklist.blocks("script", "https://example.com/app.js")
+    assert not blocklist.blocks("script", "https://notdoubleclick.net/t.js")
+    # 空の指定は遮断しない
+    assert not ResourceBlocklist.create([], [])
+
+    async def run() -> list[str]:
+        page = _FakePage()
+        await ResourceBlocklist.create([], ["example.com"]).install(page)
+        other_frame = object()
+        routes = [
+            # ページ本体は遮断対象のドメインでも取得する
+            _FakeRoute(_FakeRequest("https://example.com/", "document", page.main_frame, navigation=True)),
+            _FakeRoute(_FakeRequest("https://example.com/frame", "document", other_frame, navigation=True)),
+            _FakeRoute(_FakeRequest("https://cdn.example.org/app.js", "script", page.main_frame)),
+        ]
+        for route in routes:
+            await page.handler(route)
+        return [route.action for route in routes]
+
+    assert asyncio.run(run()) == ["continue", "abort", "continue"]
+
+
+class _ReadinessPage:
+    def __init__(self, selector_delay: float) -> None:
+        self.selector_delay = selector_delay
+        self.calls: list[tuple] = []
+
+    async def wait_for_selector(self, selector: str, state: str, timeout: int) -> None:
+        self.calls.append(("selector", selector, timeout))
+        await asyncio.sleep(min(self.selector_delay, timeout / 1000))
+        if self.selector_delay * 1000 > timeout:
+            raise TimeoutError(selector)
+
+    async def evaluate(self, script: str, args: list) -> str:
+        self.calls.append(("quiet", *args))
+        return "quiet"
+
+
+def test_wait_until_ready() -> None:
+    async def run() -> None:
+        # セレクタが現れた後、残り時間を上限にDOMの停止を待つ
+        page = _ReadinessPage(selector_delay=0.1)
+        await _wait_until_ready(page, 1000, "#main")
+        assert page.calls[0] == ("selector", "#main", 1000)
+        kind, quiet_ms, remaining_ms = page.calls[1]
+        assert kind == "quiet" and quiet_ms == 500 and 800 <= remaining_ms <= 900
+
+        # セレクタが上限までに現れなければそのまま戻る
+        page = _ReadinessPage(selector_delay=1.0)
+        await _wait_until_ready(page, 200, "#never")
+        assert [c[0] for c in page.calls] == ["selector"]
+
+        # 上限0なら待たない
+        page = _ReadinessPage(selector_delay=0)
+        await _wait_until_ready(page, 0, "#main")
+        assert page.calls == []
+
+    asyncio.run(run())
+
+
+class _SizedRequest:
+    def __init__(self, body_size: int) -> None:
+        self.body_size = body_size
+
+    async def sizes(self) -> dict:
+        return {"requestBodySize": 0, "requestHeadersSize": 100,
+                "responseBodySize": self.body_size, "responseHeadersSize": 200}
+
+
+class _SizedResponse:
+    def __init__(self, body_size: int) -> None:
+        self.request = _SizedRequest(body_size)
+
+
+def _browser_bytes() -> float:
+    return REGISTRY.get_sample_value("url_fetch_bytes_total", {"fetch_method": "browser"}) or 0.0
+
+
+def test_count_document_bytes() -> None:
+    before = _browser_bytes()
+    asyncio.run(_count_document_bytes(_SizedResponse(12345)))
+    # 応答が無いナビゲーションは数えない
+    asyncio.run(_count_document_bytes(None))
+    assert _browser_bytes() == before + 12345
+
+
+if __name__ == "__main__":
+    test_recycle_after_pages()
+    test_recycle_does_not_block_other_pages()
+    test_process_tree_rss_bytes()
+    test_max_concurrent_pages()
+    test_resource_blocklist()
+    test_wait_until_ready()
+    test_count_document_bytes()
+    print("✅ テスト完了！")
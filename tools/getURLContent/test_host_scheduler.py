@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+host_scheduler.py の動作検証（外部ネットワーク不要）
+
+対象機能:
+- ホストごとのレート制限（バースト後は一定間隔）
+- ホストごとの同時取得数の上限と到着順（FIFO）での待機
+- robots.txt の Crawl-delay への追従
+- 既定（制限の指定なし）では待たせず、ホストの状態も持たないこと
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.host_scheduler import HostScheduler  # noqa: E402
+
+
+def test_rate_limit() -> None:
+    scheduler = HostScheduler(rate=20, burst=2, max_concurrency=0)
+
+    async def run() -> float:
+        start = time.monotonic()
+        for _ in range(6):
+            async with scheduler.slot("https://example.com/page"):
+                pass
+        # 別ホストは待たされない
+        async with scheduler.slot("https://example.org/"):
+            pass
+        return time.monotonic() - start
+
+    # 2件はバースト、残り4件は0.05秒間隔
+    elapsed = asyncio.run(run())
+    assert 0.15 <= elapsed < 1.0, elapsed
+
+
+def test_concurrency_fifo() -> None:
+    scheduler = HostScheduler(rate=0, max_concurrency=2)
+    active = 0
+    peak = 0
+    order: list[int] = []
+
+    async def fetch(i: int) -> None:
+        nonlocal active, peak
+        async with scheduler.slot("https://example.com/"):
+            order.append(i)
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(fetch(i) for i in range(10)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert order == list(range(10))
+    assert scheduler.stats()["active"] == 0
+
+
+class _RobotsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = b"User-agent: *\nCrawl-delay: 0.2\n"
+        self.send_response(200 if self.path == "/robots.txt" else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def test_robots_crawl_delay() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RobotsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    try:
+        scheduler = HostScheduler(rate=100, burst=10, respect_robots=True)
+        start = time.monotonic()
+        for _ in range(3):
+            with scheduler.slot_sync(url):
+                pass
+        # Crawl-delay がある場合はバーストせず0.2秒間隔
+        assert time.monotonic() - start >= 0.4
+    finally:
+        server.shutdown()
+
+
+def test_disabled_by_default() -> None:
+    scheduler = HostScheduler()
+    assert not scheduler.enabled
+
+    async def run() -> float:
+        start = time.monotonic()
+        async with scheduler.slot("https://example.com/a"):
+            await asyncio.gather(*(_enter(scheduler) for _ in range(20)))
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.5
+    with scheduler.slot_sync("https://example.com/b"):
+        pass
+    assert scheduler.stats() == {"hosts": 0, "active": 0, "waiting": 0}
+
+
+async def _enter(scheduler: HostScheduler) -> None:
+    async with scheduler.slot("https://example.com/page"):
+        await asyncio.sleep(0.01)
+
+
+if __name__ == "__main__":
+    test_rate_limit()
+    test_concurrency_fifo()
+    test_robots_crawl_delay()
+    test_disabled_by_default()
+    print("✅ テスト完了！")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+item_store.py の動作検証
+
+対象機能:
+- IDによる取得・更新・削除（メモリ / SQLite）
+- 削除後もIDを再利用しない
+- SQLiteストアを開き直してもデータとIDの割り当てを引き継ぐ
+- 絞り込み・カーソルによるページ分割（全件走査の結果と一致する）
+- 一括追加・更新・削除（SQLiteは途中で失敗するとすべて取り消す）
+- version による compare-and-set（複数プロセスが同じSQLiteを更新しても更新を失わない）
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.item_store import (  # noqa: E402
+    ItemStore,
+    MemoryItemStore,
+    SQLiteItemStore,
+    VersionConflictError,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def _item(name: str, price: float = 100.0) -> dict:
+    return {"name": name, "description": None, "price": price, "is_available": True}
+
+
+def _check_crud(store: ItemStore) -> None:
+    first = store.create(_item("a"))
+    second = store.create(_item("b"))
+    assert (first["id"], second["id"]) == (1, 2)
+    assert store.get(2) == {**_item("b"), "id": 2, "version": 1}
+
+    updated = store.update(1, _item("a2", 200.0))
+    assert (updated["price"], updated["version"]) == (200.0, 2)
+    assert store.update(99, _item("x")) is None
+
+    assert store.delete(2)["name"] == "b"
+    assert store.delete(2) is None
+    assert store.get(2) is None
+    # 削除したIDは再利用しない
+    assert store.create(_item("c"))["id"] == 3
+    assert [item["id"] for item in store.list()] == [1, 3]
+    assert store.count() == 2
+
+
+def test_memory_store() -> None:
+    _check_crud(MemoryItemStore())
+
+
+def test_sqlite_store() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "items.db")
+        store = SQLiteItemStore(path)
+        _check_crud(store)
+        store.close()
+
+        # 開き直しても内容とIDの割り当てを引き継ぐ
+        store = SQLiteItemStore(path)
+        assert [item["name"] for item in store.list()] == ["a2", "c"]
+        assert store.create(_item("d"))["id"] == 4
+        store.close()
+
+
+def _check_query(store: ItemStore) -> None:
+    rng = random.Random(0)
+    for i in range(3000):
+        store.create({**_item(f"i{i}", float(rng.randint(1, 50))), "is_available": rng.random() < 0.3})
+    for item_id in rng.sample(range(1, 3001), 500):
+        store.delete(item_id)
+    for item_id in rng.sample(range(1, 3001), 300):
+        store.update(item_id, {**_item("u", float(rng.randint(1, 50))), "is_available": True})
+
+    everything = store.list()
+    cases = [
+        {},
+        {"is_available": True},
+        {"is_available": False},
+        {"min_price": 10.0, "max_price": 20.0},
+        {"min_price": 45.0, "is_available": True},
+        {"max_price": 5.0, "is_available": False},
+    ]
+    for case in cases:
+        by_price = "min_price" in case or "max_price" in case
+        expected = [
+            item for item in everything
+            if item["is_available"] == case.get("is_available", item["is_available"])
+            and case.get("min_price", 0) <= item["price"] <= case.get("max_price", 100)
+        ]
+        if by_price:
+            expected.sort(key=lambda item: (item["price"], item["id"]))
+        got: list[dict] = []
+        cursor = None
+        while True:
+            page, cursor = store.query(**case, cursor=cursor, limit=97)
+            got.extend(page)
+            if cursor is None:
+                break
+            # APIでの受け渡し（文字列化）を経てもそのまま続きを取得できる
+            cursor = decode_cursor(encode_cursor(cursor))
+        assert got == expected, case
+
+    # 並び順の異なるカーソルは使えない
+    _, cursor = store.query(limit=1)
+    try:
+        store.query(min_price=1.0, cursor=cursor)
+        raise AssertionError("ValueError が発生するはず")
+    except ValueError:
+        pass
+
+
+def test_query() -> None:
+    _check_query(MemoryItemStore())
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteItemStore(os.path.join(tmp, "items.db"))
+        _check_query(store)
+        store.close()
+
+    for bad in ("!!", encode_cursor(("a",)), encode_cursor((1.5,))):
+        try:
+            decode_cursor(bad)
+            raise AssertionError("ValueError が発生するはず")
+        except ValueError:
+            pass
+
+
+def _check_bulk(store: ItemStore) -> None:
+    created = store.create_many([_item("a"), _item("b"), _item("c")])
+    assert [item["id"] for item in created] == [1, 2, 3]
+    updated = store.update_many([(2, _item("b2", 5.0), None), (99, _item("x"), None), (3, _item("c2"), 1)])
+    assert [item and item["name"] for item in updated] == ["b2", None, "c2"]
+    # version が一致しない行だけ適用せず、現在の内容を返す
+    conflict, applied = store.update_many([(3, _item("c3"), 1), (2, _item("b2"), 2)])
+    assert isinstance(conflict, VersionConflictError) and conflict.current["version"] == 2
+    assert applied["version"] == 3
+    deleted = store.delete_many([1, 1, 42])
+    assert [item and item["id"] for item in deleted] == [1, None, None]
+    assert [item["name"] for item in store.list()] == ["b2", "c2"]
+
+
+def test_bulk() -> None:
+    _check_bulk(MemoryItemStore())
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteItemStore(os.path.join(tmp, "items.db"))
+        _check_bulk(store)
+        # 途中の行で失敗（NOT NULL 制約違反）した場合は、先に書き込んだ行も残らない
+        try:
+            store.create_many([_item("d"), {**_item("e"), "name": None}])
+            raise AssertionError("IntegrityError が発生するはず")
+        except sqlite3.IntegrityError:
+            pass
+        assert [item["name"] for item in store.list()] == ["b2", "c2"]
+        store.close()
+
+
+def _check_versioning(store: ItemStore) -> None:
+    item = store.create(_item("a"))
+    assert item["version"] == 1
+    assert store.update(item["id"], _item("a2"), expected_version=1)["version"] == 2
+    for apply in (
+        lambda: store.update(item["id"], _item("a3"), expected_version=1),
+        lambda: store.delete(item["id"], expected_version=1),
+    ):
+        try:
+            apply()
+            raise AssertionError("VersionConflictError が発生するはず")
+        except VersionConflictError as e:
+            assert e.current["name"] == "a2" and e.current["version"] == 2
+    # 存在しないIDは version を指定しても None
+    assert store.update(999, _item("x"), expected_version=1) is None
+    assert store.delete(999, expected_version=1) is None
+    assert store.delete(item["id"], expected_version=2)["name"] == "a2"
+
+
+def _increment_price(path: str, item_id: int, times: int) -> None:
+    """読み込み → version を指定して更新、を衝突したらやり直しながら繰り返す（別プロセスで実行）"""
+    store = SQLiteItemStore(path)
+    for _ in range(times):
+        while True:
+            current = store.get(item_id)
+            try:
+                store.update(item_id, {**current, "price": current["price"] + 1}, expected_version=current["version"])
+                break
+            except VersionConflictError:
+                continue
+    store.close()
+
+
+def test_versioning() -> None:
+    _check_versioning(MemoryItemStore())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "items.db")
+        store = SQLiteItemStore(path)
+        _check_versioning(store)
+
+        # 複数ワーカーを想定し、別プロセスから同じアイテムを同時に更新しても増分を失わない
+        counter_id = store.create(_item("counter", 0.0))["id"]
+        ctx = multiprocessing.get_context("spawn")
+        workers = [ctx.Process(target=_increment_price, args=(path, counter_id, 50)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        counter = store.get(counter_id)
+        assert (counter["price"], counter["version"]) == (150.0, 151)
+        store.close()
+
+
+def test_migrate_version_column() -> None:
+    """version 列の無い以前のデータベースを開くと列を追加して引き継ぐ"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "items.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+            "description TEXT, price REAL NOT NULL, is_available INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT INTO items (name, price, is_available) VALUES ('old', 1.0, 1)")
+        conn.commit()
+        conn.close()
+        store = SQLiteItemStore(path)
+        assert store.get(1)["version"] == 1
+        assert store.update(1, _item("new"), expected_version=1)["version"] == 2
+        store.close()
+
+
+if __name__ == "__main__":
+    test_memory_store()
+    test_sqlite_store()
+    test_query()
+    test_bulk()
+    test_versioning()
+    test_migrate_version_column()
+    print("✅ テスト完了！")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+/items の動作検証（TestClient を使用、メモリのストア）
+
+対象機能:
+- fields による項目の選択（id / version を含む）
+- If-Match による更新・削除の照合（一致・不一致・弱いETag・複数指定・不正な形式）
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from unittest.mock import patch
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+ITEM = {"name": "りんご", "price": 120.0}
+
+
+def _client() -> TestClient:
+    return TestClient(main.app)
+
+
+def test_fields_projection() -> None:
+    with patch.dict(os.environ, {"BROWSER_POOL_ENABLED": "0"}), _client() as client:
+        client.post("/items", json=ITEM)
+        response = client.get("/items", params={"fields": "id,version,name"})
+        assert response.status_code == 200
+        for item in response.json()["items"]:
+            assert set(item) == {"id", "version", "name"}
+        assert client.get("/items", params={"fields": "id,secret"}).status_code == 400
+
+
+def test_if_match() -> None:
+    with patch.dict(os.environ, {"BROWSER_POOL_ENABLED": "0"}), _client() as client:
+        created = client.post("/items", json=ITEM)
+        item_id = created.json()["item"]["id"]
+        assert created.headers["ETag"] == '"1"'
+        url = f"/items/{item_id}"
+
+        def put(if_match: str):
+            return client.put(url, json={**ITEM, "price": 130.0}, headers={"If-Match": if_match})
+
+        # 弱いETagは強い比較で一致しないため 412（不正な形式ではない）
+        response = put('W/"1"')
+        assert response.status_code == 412 and response.headers["ETag"] == '"1"'
+        # 発行していない形式のETagも一致しない
+        assert put('"abc"').status_code == 412
+        # ETagの形式になっていない場合だけ 400
+        assert put('"1').status_code == 400
+        assert put("abc").status_code == 400
+
+        # 一致すれば更新される（version が1つ増える）
+        response = put('"1"')
+        assert response.status_code == 200 and response.headers["ETag"] == '"2"'
+        # 古い version は 412
+        assert put('"1"').status_code == 412
+        # 複数指定のうち、現在の version を含めば一致
+        response = put('W/"2", "7", "2"')
+        assert response.status_code == 200 and response.headers["ETag"] == '"3"'
+        assert put('"1", "2"').status_code == 412
+
+        assert client.delete(url, headers={"If-Match": 'W/"3"'}).status_code == 412
+        assert client.delete(url, headers={"If-Match": '"3"'}).status_code == 200
+
+
+if __name__ == "__main__":
+    test_fields_projection()
+    test_if_match()
+    print("✅ テスト完了！")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+metrics.py の動作検証
+
+対象機能:
+- キャッシュ参照結果から求めるヒット率（url_fetch_cache_hit_ratio）
+- 複数ワーカーの値の合計（PROMETHEUS_MULTIPROC_DIR。ゲージは停止していないワーカーのみ）
+- 複数ワーカーで起動する間の PROMETHEUS_MULTIPROC_DIR の用意
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from prometheus_client import REGISTRY  # noqa: E402
+
+from tools.utils.metrics import (  # noqa: E402
+    FETCH_CACHE,
+    FETCH_STAGE_SECONDS,
+    MULTIPROC_DIR_ENV,
+    REQUESTS_IN_FLIGHT,
+    mark_worker_stopped,
+    multiprocess_directory,
+    render,
+)
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_cache_hit_ratio() -> None:
+    before = {r: _sample("url_fetch_cache_total", result=r) for r in ("hit", "stale", "miss", "revalidated")}
+    FETCH_CACHE.labels(result="hit").inc()
+    FETCH_CACHE.labels(result="stale").inc()
+    FETCH_CACHE.labels(result="revalidated").inc()
+    FETCH_CACHE.labels(result="miss").inc()
+    hits = before["hit"] + before["revalidated"] + 2
+    lookups = before["hit"] + before["stale"] + before["miss"] + 3
+    assert abs(_sample("url_fetch_cache_hit_ratio") - hits / lookups) < 1e-9
+    assert b"# TYPE url_fetch_cache_hit_ratio gauge\n" in render()
+
+
+def _record_in_worker(hits: int, recorded, release) -> None:
+    """別プロセス（ワーカー相当）で値を記録する。release があればそれまで動作し続ける"""
+    FETCH_CACHE.labels(result="hit").inc(hits)
+    FETCH_CACHE.labels(result="miss").inc()
+    FETCH_STAGE_SECONDS.labels(stage="ttfb").observe(0.5)
+    REQUESTS_IN_FLIGHT.inc()
+    if release is None:
+        # lifespan の終了処理と同じく、停止したワーカーのゲージを合計から外す
+        mark_worker_stopped()
+    recorded.set()
+    if release is not None:
+        release.wait(30)
+
+
+def test_multiprocess_aggregation() -> None:
+    ctx = multiprocessing.get_context("spawn")
+    stopped_recorded, running_recorded, release = ctx.Event(), ctx.Event(), ctx.Event()
+    with tempfile.TemporaryDirectory() as directory, patch.dict(os.environ, {MULTIPROC_DIR_ENV: directory}):
+        # spawn したプロセスは環境変数を引き継ぎ、prometheus_client がマルチプロセスモードになる
+        stopped = ctx.Process(target=_record_in_worker, args=(2, stopped_recorded, None))
+        running = ctx.Process(target=_record_in_worker, args=(3, running_recorded, release))
+        stopped.start()
+        running.start()
+        try:
+            stopped.join(30)
+            assert stopped.exitcode == 0 and stopped_recorded.is_set()
+            assert running_recorded.wait(30)
+            text = render().decode("utf-8")
+            assert 'url_fetch_cache_total{result="hit"} 5.0\n' in text
+            assert 'url_fetch_cache_total{result="miss"} 2.0\n' in text
+            assert 'url_fetch_stage_seconds_count{stage="ttfb"} 2.0\n' in text
+            assert 'url_fetch_stage_seconds_bucket{le="0.5",stage="ttfb"} 2.0\n' in text
+            # 合計した参照結果からヒット率を求める
+            assert "url_fetch_cache_hit_ratio 0.7142857142857143\n" in text
+            # 停止したワーカーのゲージは含めない
+            assert "url_contents_requests_in_flight 1.0\n" in text
+        finally:
+            release.set()
+            running.join(30)
+
+
+def test_multiprocess_directory() -> None:
+    with patch.dict(os.environ):
+        os.environ.pop(MULTIPROC_DIR_ENV, None)
+        # 単一ワーカーでは何もしない
+        with multiprocess_directory(False):
+            assert MULTIPROC_DIR_ENV not in os.environ
+        # 未指定なら一時ディレクトリを用意し、終了時に削除する
+        with multiprocess_directory(True):
+            directory = os.environ[MULTIPROC_DIR_ENV]
+            assert os.path.isdir(directory)
+        assert MULTIPROC_DIR_ENV not in os.environ and not os.path.exists(directory)
+
+        # 指定済みのディレクトリは前回の値ファイルを消してから使う
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, "counter_123.db")
+            open(stale, "wb").close()
+            os.environ[MULTIPROC_DIR_ENV] = directory
+            with multiprocess_directory(True):
+                assert not os.path.exists(stale)
+            assert os.path.isdir(directory)
+
+
+if __name__ == "__main__":
+    test_cache_hit_ratio()
+    test_multiprocess_aggregation()
+    test_multiprocess_directory()
+    print("✅ テスト完了！")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+single_flight.py の動作検証（外部ネットワーク不要）
+
+対象機能:
+- 同時に実行された同じキーの呼び出しを1回にまとめ、結果を共有する
+- リーダーの例外は後続にも共有する
+- リーダーのキャンセル・タイムアウトでは、後続が実行し直す
+- 同期・非同期の呼び出し元が同じ実行を共有する
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.single_flight import SingleFlight  # noqa: E402
+
+
+def test_shared_result() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "content"
+
+    async def run() -> list:
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert [r for r, _ in results] == ["content"] * 5
+    assert [shared for _, shared in results].count(False) == 1
+    assert flight.in_flight() == 0
+
+
+def test_shared_error() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise ValueError("404")
+
+    async def run() -> list:
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_leader_cancelled_or_timed_out() -> None:
+    flight = SingleFlight(retry_on=(TimeoutError,))
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        call = calls
+        await asyncio.sleep(0.05)
+        if call == 3:
+            raise TimeoutError()
+        return f"call{call}"
+
+    async def run() -> tuple:
+        # リーダーだけ先に期限切れでキャンセルされる → 後続が実行し直す
+        leader = asyncio.create_task(asyncio.wait_for(flight.do("a", fetch), timeout=0.01))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("a", fetch))
+        cancelled = (await asyncio.gather(leader, return_exceptions=True))[0]
+        retried = await follower
+        # リーダーがタイムアウト → 後続は例外を共有せず自分で取得する
+        timed_out = await asyncio.gather(
+            flight.do("b", fetch), flight.do("b", fetch), return_exceptions=True
+        )
+        return cancelled, retried, timed_out
+
+    cancelled, retried, timed_out = asyncio.run(run())
+    assert isinstance(cancelled, asyncio.TimeoutError)
+    assert retried == ("call2", False)
+    assert isinstance(timed_out[0], TimeoutError)
+    assert timed_out[1] == ("call4", False)
+    assert flight.in_flight() == 0
+
+
+def test_sync_and_async_share() -> None:
+    flight = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def fetch_sync() -> str:
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.1)
+        return "sync"
+
+    async def fetch_async() -> str:
+        raise AssertionError("実行中の同期呼び出しの結果を共有するはず")
+
+    async def run() -> tuple:
+        thread_result: list = []
+        thread = threading.Thread(target=lambda: thread_result.append(flight.do_sync("k", fetch_sync)))
+        thread.start()
+        await asyncio.to_thread(started.wait)
+        result = await flight.do("k", fetch_async)
+        thread.join()
+        return thread_result[0], result
+
+    leader, follower = asyncio.run(run())
+    assert calls == 1
+    assert leader == ("sync", False)
+    assert follower == ("sync", True)
+
+
+if __name__ == "__main__":
+    test_shared_result()
+    test_shared_error()
+    test_leader_cancelled_or_timed_out()
+    test_sync_and_async_share()
+    print("✅ テスト完了！")
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+url_utils.py のローカルHTTPサーバーを使った動作検証（外部ネットワーク不要）
+
+対象機能:
+- 同期版 / 非同期版 (get_url_content_async) の取得結果が一致すること
+- 取得サイズ上限 (max_bytes)
+- 共有HTTPクライアントでの接続再利用
+- 取得結果のキャッシュ（ヒット / バイパス / ETagによる304再検証）
+- 検査済みアドレスへの接続固定（pin_host）とリダイレクト先のSSRF検査
+- 非同期取得の接続エラーが httpx の例外として届くこと
+- 取得しながらのマークダウン変換（一括変換と同じ結果になること）
+- max_chars到達時の取得打ち切りと truncated の報告
+- テキスト変換プロファイル（markdown_profile）の選択
+- 解析済みツリーからのマークダウン変換（文字列からの変換と同じ結果になること）
+- readability による本文抽出（ナビゲーション・フッターを含めないこと）
+- 段階ごとの所要時間・取得バイト数・キャッシュ参照結果のメトリクス
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+
+# プロジェクトルートをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.utils.url_utils import (  # noqa: E402
+    _ChunkDecoder,
+    _process_to_markdown,
+    _process_with_readability,
+    get_url_content,
+    get_url_content_async,
+    get_url_content_result_async,
+    FetchMethod,
+    MarkdownProfile,
+    ProcessMethod,
+)
+from tools.utils.http_client import http_pool_stats  # noqa: E402
+from tools.utils.dns_resolver import pin_host  # noqa: E402
+from tools.utils.process_pool import ProcessPool  # noqa: E402
+from tools.utils.html_tree import parse_html, render_markdown  # noqa: E402
+from tools.utils.ssrf_guard import UnsafeAddressError, enable_ssrf_guard  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+
+PAGES: dict[str, tuple[str, bytes]] = {
+    "/article": (
+        "text/html; charset=utf-8",
+        (
+            "<html><head><title>テスト記事</title></head><body>"
+            "<h1>見出し</h1><p>" + "本文のテキストです。" * 50 + "</p>"
+            "<a href='/next'>次へ</a></body></html>"
+        ).encode("utf-8"),
+    ),
+    "/large": ("text/plain", b"x" * 50_000),
+    # Content-Typeに文字コードが無く、<meta charset> で宣言しているページ
+    "/sjis": (
+        "text/html",
+        (
+            "<html><head><meta charset=\"Shift_JIS\"><title>日本語</title></head>"
+            "<body><p>" + "シフトJISの本文です。" * 20 + "</p></body></html>"
+        ).encode("shift_jis"),
+    ),
+    "/long-article": (
+        "text/html; charset=utf-8",
+        (
+            "<html><body>" + "".join(
+                f"<h2>節{i}</h2><p>本文 <b>強調</b> &amp; <a href='/p{i}'>リンク</a></p>"
+                for i in range(3000)
+            ) + "</body></html>"
+        ).encode("utf-8"),
+    ),
+}
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-aliveで接続を再利用できるようにする
+    protocol_version = "HTTP/1.1"
+    hits: dict[str, int] = {}
+
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        _Handler.hits[path] = _Handler.hits.get(path, 0) + 1
+        if path == "/redirect":
+            # ?to=<URL> へリダイレクト
+            self.send_response(302)
+            self.send_header("Location", self.path.split("?to=", 1)[1])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if path == "/slow":
+            # 同時取得が重なるよう応答を遅らせる
+            time.sleep(0.2)
+            path = "/article"
+        if path not in PAGES:
+            self.send_error(404)
+            return
+        ctype, body = PAGES[path]
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _start_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_async_matches_sync() -> None:
+    server, base = _start_server()
+    try:
+        for method in (ProcessMethod.RAW, ProcessMethod.MARKDOWN, ProcessMethod.READABILITY):
+            sync_content = get_url_content(
+                base + "/article", FetchMethod.REQUEST, method, max_chars=10_000,
+                cache_bypass=True,
+            )
+            async_content = asyncio.run(get_url_content_async(
+                base + "/article", FetchMethod.REQUEST, method, max_chars=10_000,
+                cache_bypass=True,
+            ))
+            assert sync_content == async_content
+            assert "見出し" in async_content
+    finally:
+        server.shutdown()
+
+
+def test_async_max_bytes() -> None:
+    server, base = _start_server()
+    try:
+        try:
+            asyncio.run(get_url_content_async(base + "/large", max_bytes=10_000))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("max_bytesを超えても例外になりませんでした")
+    finally:
+        server.shutdown()
+
+
+def test_connection_reuse() -> None:
+    server, base = _start_server()
+    try:
+        before = http_pool_stats()
+
+        async def fetch_many() -> None:
+            for _ in range(5):
+                await get_url_content_async(base + "/article", cache_bypass=True)
+
+        asyncio.run(fetch_many())
+        for _ in range(5):
+            get_url_content(base + "/article", cache_bypass=True)
+
+        after = http_pool_stats()
+        for kind in ("sync", "async"):
+            assert after[kind]["requests"] - before[kind]["requests"] == 5
+            assert after[kind]["reused"] - before[kind]["reused"] >= 4
+    finally:
+        server.shutdown()
+
+
+def test_cache_hit_and_bypass() -> None:
+    server, base = _start_server()
+    try:
+        url = base + "/article?cache"
+        _Handler.hits.pop("/article", None)
+
+        async def run() -> list[bool]:
+            first = await get_url_content_result_async(url, process_method=ProcessMethod.MARKDOWN)
+            second = await get_url_content_result_async(url, process_method=ProcessMethod.MARKDOWN)
+            bypass = await get_url_content_result_async(
+                url, process_method=ProcessMethod.MARKDOWN, cache_bypass=True
+            )
+            assert first.content == second.content == bypass.content
+            return [first.cache_hit, second.cache_hit, bypass.cache_hit]
+
+        assert asyncio.run(run()) == [False, True, False]
+        assert _Handler.hits["/article"] == 2
+    finally:
+        server.shutdown()
+
+
+def test_etag_revalidation() -> None:
+    server, base = _start_server()
+    try:
+        url = base + "/article?etag"
+
+        async def run() -> None:
+            first = await get_url_content_result_async(
+                url, process_method=ProcessMethod.READABILITY, cache_ttl=1
+            )
+            await asyncio.sleep(1.1)
+            second = await get_url_content_result_async(
+                url, process_method=ProcessMethod.READABILITY, cache_ttl=1
+            )
+            assert not first.revalidated
+            assert second.cache_hit and second.revalidated
+            assert second.content == first.content
+
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+
+def test_pinned_host() -> None:
+    server, base = _start_server()
+    try:
+        port = server.server_address[1]
+
+        async def run() -> str:
+            # 解決できないホスト名でも、固定したアドレスへ接続する
+            pin_host("pinned.invalid", ["127.0.0.1"])
+            return await get_url_content_async(
+                f"http://pinned.invalid:{port}/article", cache_bypass=True
+            )
+
+        assert "見出し" in asyncio.run(run())
+    finally:
+        server.shutdown()
+
+
+def test_async_connect_error() -> None:
+    # 使われていないポートを確保して閉じる
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def run() -> None:
+        pin_host("pinned.invalid", ["127.0.0.1"])
+        await get_url_content_async(f"http://pinned.invalid:{port}/", cache_bypass=True)
+
+    try:
+        asyncio.run(run())
+    except httpx.ConnectError:
+        pass
+    else:
+        raise AssertionError("接続できないのに例外になりませんでした")
+
+
+def test_redirect_guard() -> None:
+    server, base = _start_server()
+    try:
+        port = server.server_address[1]
+        origin = f"http://pinned.invalid:{port}"
+
+        async def fetch(target: str) -> str:
+            pin_host("pinned.invalid", ["127.0.0.1"])
+            enable_ssrf_guard()
+            return await get_url_content_async(
+                f"{origin}/redirect?to={target}", allow_redirects=True, cache_bypass=True
+            )
+
+        # 検査済み（固定済み）ホスト内のリダイレクトは許可
+        assert "見出し" in asyncio.run(fetch(f"{origin}/article"))
+        # 未検査のループバックアドレスへのリダイレクトは拒否
+        try:
+            asyncio.run(fetch(f"http://127.0.0.1:{port}/article"))
+        except UnsafeAddressError:
+            pass
+        else:
+            raise AssertionError("危険なリダイレクト先への接続が拒否されませんでした")
+    finally:
+        server.shutdown()
+
+
+def test_streaming_markdown() -> None:
+    server, base = _start_server()
+    try:
+        expected = _process_to_markdown(PAGES["/long-article"][1].decode("utf-8"))
+        sync_content = get_url_content(
+            base + "/long-article", process_method=ProcessMethod.MARKDOWN, cache_bypass=True
+        )
+        async_content = asyncio.run(get_url_content_async(
+            base + "/long-article", process_method=ProcessMethod.MARKDOWN, cache_bypass=True
+        ))
+        assert sync_content == async_content == expected
+    finally:
+        server.shutdown()
+
+
+def test_max_chars_early_stop() -> None:
+    server, base = _start_server()
+    try:
+        url = base + "/long-article"
+        expected = _process_to_markdown(PAGES["/long-article"][1].decode("utf-8"))
+
+        async def run() -> None:
+            short = await get_url_content_result_async(
+                url, process_method=ProcessMethod.MARKDOWN, max_chars=10_000, cache_bypass=True
+            )
+            assert short.truncated
+            assert short.content == expected[:10_000]
+
+            full = await get_url_content_result_async(
+                url, process_method=ProcessMethod.MARKDOWN, cache_bypass=True
+            )
+            assert not full.truncated
+            assert full.content == expected
+
+            cached = await get_url_content_result_async(
+                url + "?trunc", process_method=ProcessMethod.RAW, max_chars=10_000
+            )
+            again = await get_url_content_result_async(
+                url + "?trunc", process_method=ProcessMethod.RAW, max_chars=10_000
+            )
+            assert cached.truncated and again.cache_hit and again.truncated
+
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+
+def test_markdown_profile() -> None:
+    server, base = _start_server()
+    try:
+        url = base + "/article"
+        default = get_url_content(url, process_method=ProcessMethod.MARKDOWN)
+        text = get_url_content(
+            url, process_method=ProcessMethod.MARKDOWN, markdown_profile=MarkdownProfile.TEXT
+        )
+        assert "[次へ](/next)" in default
+        assert "次へ" in text and "(/next)" not in text
+    finally:
+        server.shutdown()
+
+
+def test_render_markdown_from_tree() -> None:
+    pages = [body.decode("utf-8") for ctype, body in PAGES.values() if ctype.endswith("charset=utf-8")]
+    pages.append(
+        "<p>a &amp; b &lt;tag&gt; x&nbsp;y <em>強調</em>です<!-- c -->続き<br>改行</p>"
+        "<pre>a &lt; b\n  c</pre><script>if (a<b) {}</script><ol><li>x</li></ol>"
+    )
+    for html in pages:
+        assert render_markdown(parse_html(html)) == _process_to_markdown(html)
+
+
+def test_readability_extracts_main_content() -> None:
+    html = (
+        "<html><head><title>記事タイトル</title></head><body>"
+        "<nav><ul>" + "".join(f"<li><a href='/m{i}'>メニュー{i}</a></li>" for i in range(10)) + "</ul></nav>"
+        "<div class='article'><h1>記事タイトル</h1>"
+        + "".join(f"<p>{'記事の本文です。段落' + str(i) + 'の内容を書きます。' * 5}</p>" for i in range(8))
+        + "</div><footer><p>著作権表示フッター</p></footer></body></html>"
+    )
+    text = _process_with_readability(html)
+    assert "段落7の内容" in text
+    # マークダウン変換へのフォールバックではなく、本文だけを抽出している
+    assert "メニュー" not in text
+    assert "著作権表示フッター" not in text
+
+
+def test_encoding_detection() -> None:
+    server, base = _start_server()
+    try:
+        url = base + "/sjis"
+        assert "シフトJISの本文です。" in get_url_content(url)
+        # 指定した文字コードは <meta charset> より優先する
+        assert "シフトJIS" not in get_url_content(url, encoding="latin-1")
+    finally:
+        server.shutdown()
+
+    # BOMはチャンクの途中で分かれていても判定できる
+    body = "\ufeff見出し".encode("utf-16-le")
+    decoder = _ChunkDecoder(None)
+    text = decoder.decode(body[:1]) + decoder.decode(body[1:]) + decoder.decode(b"", final=True)
+    assert text == "見出し" and decoder.encoding == "utf-16"
+    # 宣言の無いUTF-8は推定を使わずに判定する（途中で切れた文字も含む）
+    decoder = _ChunkDecoder(None)
+    assert decoder.decode("あいう".encode("utf-8")[:-1], final=True).startswith("あい")
+    assert decoder.encoding == "utf-8"
+
+
+def test_process_pool() -> None:
+    server, base = _start_server()
+    pool = ProcessPool(2)
+
+    async def run() -> list[str]:
+        await pool.start()
+        try:
+            with patch("tools.utils.url_utils.get_process_pool", return_value=pool):
+                results = await asyncio.gather(*(
+                    get_url_content_async(base + path, process_method=method, cache_ttl=0)
+                    for path in ("/article", "/sjis")
+                    for method in (ProcessMethod.MARKDOWN, ProcessMethod.READABILITY)
+                ))
+                # 同期版もワーカーで変換する
+                results.append(await asyncio.to_thread(
+                    get_url_content, base + "/sjis", process_method=ProcessMethod.MARKDOWN, cache_ttl=0
+                ))
+                return results
+        finally:
+            await pool.stop()
+
+    try:
+        results = asyncio.run(run())
+        # ワーカーでの変換結果はスレッドでの変換結果と同じ
+        expected = [
+            get_url_content(base + path, process_method=method, cache_ttl=0)
+            for path in ("/article", "/sjis")
+            for method in (ProcessMethod.MARKDOWN, ProcessMethod.READABILITY)
+        ]
+        assert results[:4] == expected
+        assert results[4] == expected[2]
+    finally:
+        server.shutdown()
+
+
+def test_coalesced_fetch() -> None:
+    server, base = _start_server()
+    _Handler.hits.clear()
+
+    async def run() -> list:
+        return await asyncio.gather(*(
+            get_url_content_result_async(base + "/slow", process_method=ProcessMethod.MARKDOWN, cache_ttl=0)
+            for _ in range(5)
+        ))
+
+    try:
+        results = asyncio.run(run())
+        # キャッシュに保存しない条件でも、同時の取得は1回にまとまる
+        assert _Handler.hits["/slow"] == 1
+        assert len({r.content for r in results}) == 1
+        assert sum(r.coalesced for r in results) == 4
+    finally:
+        server.shutdown()
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_fetch_metrics() -> None:
+    server, base = _start_server()
+    stages = ("connect", "ttfb", "download", "decode")
+    before = {stage: _sample("url_fetch_stage_seconds_count", stage=stage) for stage in stages}
+    markdown_before = _sample("url_fetch_process_seconds_count", process_method="markdown")
+    bytes_before = _sample("url_fetch_bytes_total", fetch_method="request")
+    cache_before = {r: _sample("url_fetch_cache_total", result=r) for r in ("hit", "miss")}
+    errors_before = _sample("url_fetch_errors_total", type="HTTPStatusError")
+    url = base + "/article?metrics"
+
+    async def run() -> None:
+        await get_url_content_async(url, process_method=ProcessMethod.MARKDOWN, cache_ttl=60)
+        await get_url_content_async(url, process_method=ProcessMethod.MARKDOWN, cache_ttl=60)
+        try:
+            await get_url_content_async(base + "/missing", cache_ttl=0)
+        except Exception:
+            pass
+
+    try:
+        asyncio.run(run())
+        # 新規接続（専用のイベントループのクライアント）なので connect も記録される
+        for stage in stages:
+            assert _sample("url_fetch_stage_seconds_count", stage=stage) > before[stage], stage
+        assert _sample("url_fetch_process_seconds_count", process_method="markdown") == markdown_before + 1
+        assert _sample("url_fetch_bytes_total", fetch_method="request") - bytes_before >= len(PAGES["/article"][1])
+        # 2回目はキャッシュヒット（/missing の参照もミスに数える）
+        assert _sample("url_fetch_cache_total", result="miss") == cache_before["miss"] + 2
+        assert _sample("url_fetch_cache_total", result="hit") == cache_before["hit"] + 1
+        assert _sample("url_fetch_errors_total", type="HTTPStatusError") == errors_before + 1
+        assert _sample("url_fetch_in_flight", fetch_method="request") == 0
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_async_matches_sync()
+    test_async_max_bytes()
+    test_connection_reuse()
+    test_cache_hit_and_bypass()
+    test_etag_revalidation()
+    test_pinned_host()
+    test_async_connect_error()
+    test_redirect_guard()
+    test_streaming_markdown()
+    test_max_chars_early_stop()
+    test_markdown_profile()
+    test_render_markdown_from_tree()
+    test_readability_extracts_main_content()
+    test_encoding_detection()
+    test_process_pool()
+    test_coalesced_fetch()
+    test_fetch_metrics()
+    print("✅ テスト完了！")
@@ -0,0 +1,519 @@
+"""
+ヘッドレスブラウザ（Chromium）の常駐プール
+
+リクエストごとにPlaywrightとChromiumを起動するとプロセス起動だけで1〜2秒かかるため、
+FastAPIアプリのライフサイクルに合わせてブラウザを常駐させ、
+リクエストごとに独立したコンテキスト（Cookie/ストレージ分離）を払い出す。
+
+- 同時に開くページ数の上限（セマフォ）
+- Nページ処理後、またはブラウザ群のRSSがしきい値を超えたらブラウザを再起動
+- プールが起動していない場合（CLI実行など）は呼び出し側で都度起動にフォールバックする
+
+あわせて、ページ取得時に不要なサブリソース（画像・フォント・動画・計測タグなど）を
+遮断するブロックリスト（ResourceBlocklist）を提供する。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Iterable, Optional
+from urllib.parse import urlsplit
+
+from tools.utils.metrics import FETCH_STAGE_SECONDS
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+# ブラウザ起動オプション（AutomationControlled無効化）
+BROWSER_LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled"]
+
+# コンテキスト設定（実ブラウザに近い環境）
+BROWSER_CONTEXT_OPTIONS = {
+    "user_agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "locale": "ja-JP",
+    "timezone_id": "Asia/Tokyo",
+    "viewport": {"width": 1280, "height": 800},
+    # Service Worker経由の通信はリクエストの遮断（page.route）を通らないため無効化する
+    "service_workers": "block",
+}
+
+# webdriverフラグを隠す
+WEBDRIVER_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+
+# 遮断できるリソース種別（Playwrightの request.resource_type。ページ本体の document は除く）
+BLOCKABLE_RESOURCE_TYPES = frozenset({
+    "stylesheet", "image", "media", "font", "script", "texttrack",
+    "xhr", "fetch", "eventsource", "websocket", "manifest", "other",
+})
+
+# 既定で遮断するリソース種別（page.content() の結果に影響しないもの）
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+
+# 既定で遮断するドメイン（広告・アクセス解析。サブドメインも対象）
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "analytics.twitter.com",
+    "static.ads-twitter.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "scorecardresearch.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+    "amazon-adsystem.com",
+)
+
+
+@dataclass(frozen=True)
+class ResourceBlocklist:
+    """
+    ページ取得時に遮断するサブリソース
+
+    ページ本体（最初のナビゲーション）は遮断しない。
+
+    Args:
+        resource_types (frozenset[str]): 遮断するリソース種別
+        domains (tuple[str, ...]): 遮断するドメイン（サブドメインも対象）
+    """
+    resource_types: frozenset = frozenset()
+    domains: tuple = ()
+
+    @classmethod
+    def create(
+        cls,
+        resource_types: Optional[Iterable[str]] = None,
+        domains: Optional[Iterable[str]] = None,
+    ) -> "ResourceBlocklist":
+        """未指定（None）の項目は環境変数の設定（既定値）で補う"""
+        if resource_types is None:
+            resource_types = _env_list("BROWSER_BLOCK_RESOURCE_TYPES", DEFAULT_BLOCKED_RESOURCE_TYPES)
+        if domains is None:
+            domains = _env_list("BROWSER_BLOCK_DOMAINS", DEFAULT_BLOCKED_DOMAINS)
+        return cls(
+            resource_types=frozenset(t for t in resource_types if t in BLOCKABLE_RESOURCE_TYPES),
+            domains=tuple(sorted({d.strip().strip(".").lower() for d in domains if d.strip()})),
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.resource_types or self.domains)
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """リクエストを遮断するか"""
+        if resource_type in self.resource_types:
+            return True
+        if not self.domains:
+            return False
+        host = (urlsplit(url).hostname or "").rstrip(".")
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    async def install(self, page: Any) -> None:
+        """ページのリクエストに遮断処理を設定する（遮断対象が無ければ何もしない）"""
+        if not self:
+            return
+
+        async def handle(route: Any) -> None:
+            request = route.request
+            if request.is_navigation_request() and request.frame == page.main_frame:
+                await route.continue_()
+            elif self.blocks(request.resource_type, request.url):
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+
+        await page.route("**/*", handle)
+
+
+def _env_list(name: str, default: Iterable[str]) -> list[str]:
+    """カンマ区切りの環境変数を読む（未設定なら既定値、空文字なら空）"""
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def import_async_playwright():
+    """playwright.async_apiを読み込む（未導入時はImportError）"""
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        raise ImportError(
+            "playwrightライブラリがインストールされていません。"
+            "インストールするには: pip install playwright && playwright install"
+        )
+    return async_playwright
+
+
+def _read_proc_table() -> tuple[dict[int, int], dict[int, int]]:
+    """/proc から全プロセスの親PIDとRSS（ページ数）を読む"""
+    parents: dict[int, int] = {}
+    rss_pages: dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read().decode("ascii", errors="replace")
+            # comm（括弧内）に空白が含まれうるため、最後の')'以降を分割する
+            fields = stat[stat.rindex(")") + 2:].split()
+            parents[pid] = int(fields[1])
+            rss_pages[pid] = int(fields[21])
+        except (OSError, ValueError, IndexError):
+            continue
+    return parents, rss_pages
+
+
+def _find_driver_pids() -> tuple[int, ...]:
+    """
+    自プロセスの子のうち、Playwrightドライバ（run-driver）のPIDを返す（Linuxの/procのみ対応）
+
+    ChromiumはドライバのPlaywright（Node.js）から起動されるため、
+    ドライバ配下だけを数えればプロセスプールのワーカーなどを含まずに済む。
+    """
+    if not os.path.isdir("/proc"):
+        return ()
+    parents, _ = _read_proc_table()
+    own_pid = os.getpid()
+    driver_pids = []
+    for pid, ppid in parents.items():
+        if ppid != own_pid:
+            continue
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().split(b"\0")
+        except OSError:
+            continue
+        if b"run-driver" in cmdline:
+            driver_pids.append(pid)
+    return tuple(driver_pids)
+
+
+def _process_tree_rss_bytes(root_pids: Iterable[int]) -> int:
+    """
+    指定プロセスとその子孫のRSS合計をバイトで返す（Linuxの/procのみ対応）
+
+    /procを走査するため、イベントループ上ではなく asyncio.to_thread から呼び出す。
+    /procが無い環境では0を返す（RSSによる再起動は無効になる）。
+    """
+    if not os.path.isdir("/proc"):
+        return 0
+    parents, rss_pages = _read_proc_table()
+
+    children: dict[int, list[int]] = {}
+    for pid, ppid in parents.items():
+        children.setdefault(ppid, []).append(pid)
+
+    total = 0
+    stack = [pid for pid in root_pids if pid in rss_pages]
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+class _BrowserSlot:
+    """プール内の1ブラウザと、その利用状況"""
+
+    def __init__(self, browser: Any):
+        self.browser = browser
+        self.active = 0  # 現在開いているコンテキスト数
+        self.pages_served = 0  # これまでに処理したページ数
+        self.retiring = False  # 再起動のため新規割り当て停止中
+
+
+class BrowserPool:
+    """
+    常駐Chromiumのプール
+
+    Args:
+        size (int): 常駐させるブラウザ数
+        max_pages (int): 同時に開くページ（コンテキスト）数の上限
+        recycle_after_pages (int): 1ブラウザがこのページ数を処理したら再起動（0で無効）
+        max_rss_mb (int): ブラウザ群のRSS合計がこの値（MB）を超えたら再起動（0で無効）
+        rss_check_interval (float): RSS合計を測り直す間隔（秒）
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_pages: int = 4,
+        recycle_after_pages: int = 200,
+        max_rss_mb: int = 1024,
+        rss_check_interval: float = 5.0,
+    ):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.recycle_after_pages = recycle_after_pages
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.rss_check_interval = rss_check_interval
+        self._playwright: Any = None
+        self._slots: list[_BrowserSlot] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # ブラウザの入れ替え（成功・失敗）を待つための条件（_lock を共有する）
+        self._changed: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # RSSを測るPlaywrightドライバのPIDと、最後に測った値
+        self._driver_pids: tuple[int, ...] = ()
+        self._rss_bytes = 0
+        self._rss_sampled_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._playwright is not None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """プールを所有するイベントループ"""
+        return self._loop
+
+    async def start(self) -> None:
+        """Playwrightを起動し、ブラウザを立ち上げる"""
+        if self.running:
+            return
+        async_playwright = import_async_playwright()
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition(self._lock)
+        self._playwright = await async_playwright().start()
+        try:
+            if self.max_rss_bytes:
+                self._driver_pids = await asyncio.to_thread(_find_driver_pids)
+                if not self._driver_pids:
+                    logger.warning("Playwrightドライバのプロセスが見つからないため、RSSによる再起動は無効です")
+            for _ in range(self.size):
+                self._slots.append(_BrowserSlot(await self._launch()))
+        except Exception:
+            await self.stop()
+            raise
+        logger.info(f"ブラウザプール起動: size={self.size}, max_pages={self.max_pages}")
+
+    async def stop(self) -> None:
+        """すべてのブラウザとPlaywrightを停止する"""
+        slots, self._slots = self._slots, []
+        for slot in slots:
+            await self._close_browser(slot)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            finally:
+                self._playwright = None
+        if self._changed is not None:
+            # 入れ替えを待っている呼び出しに停止を知らせる
+            async with self._changed:
+                self._changed.notify_all()
+        logger.info("ブラウザプール停止")
+
+    async def _launch(self) -> Any:
+        with FETCH_STAGE_SECONDS.labels(stage="browser_launch").time():
+            return await self._playwright.chromium.launch(
+                headless=True,
+                args=BROWSER_LAUNCH_ARGS,
+            )
+
+    async def _close_browser(self, slot: _BrowserSlot) -> None:
+        try:
+            await slot.browser.close()
+        except Exception as e:
+            logger.warning(f"ブラウザ終了時にエラー: {e}")
+
+    async def _replace(self, slot: _BrowserSlot) -> None:
+        """
+        retiring にしたブラウザの代わりを起動して入れ替える
+
+        起動はロックの外で行い、その間も他のリクエストは既存のブラウザを使える。
+        起動に失敗した場合は retiring を戻して例外を送出する。
+        """
+        try:
+            browser = await self._launch()
+        except Exception:
+            async with self._changed:
+                slot.retiring = False
+                self._changed.notify_all()
+            raise
+        async with self._changed:
+            replaced = self.running and slot in self._slots
+            if replaced:
+                self._slots[self._slots.index(slot)] = _BrowserSlot(browser)
+                self._changed.notify_all()
+            # 入れ替え済みのブラウザは、使用中のコンテキストがなくなった時点で閉じる
+            close_old = replaced and slot.active == 0
+        if not replaced:
+            # 起動中にプールが停止した
+            await self._close_browser(_BrowserSlot(browser))
+        elif close_old:
+            await self._close_browser(slot)
+
+    async def _acquire_slot(self) -> _BrowserSlot:
+        """利用中コンテキストが最も少ないブラウザを選ぶ（落ちていれば再起動）"""
+        while True:
+            async with self._changed:
+                if not self.running:
+                    raise RuntimeError("ブラウザプールは停止しています")
+                dead = [s for s in self._slots if not s.retiring and not s.browser.is_connected()]
+                for slot in dead:
+                    slot.retiring = True
+                if not dead:
+                    usable = [s for s in self._slots if s.browser.is_connected()]
+                    if usable:
+                        # 入れ替え待ちのブラウザは他に無い場合だけ使う
+                        slot = min(usable, key=lambda s: (s.retiring, s.active))
+                        slot.active += 1
+                        return slot
+                    # 全ブラウザが入れ替え中
+                    await self._changed.wait()
+                    continue
+            logger.warning("切断されたブラウザを再起動します")
+            for slot in dead:
+                await self._replace(slot)
+
+    async def _release_slot(self, slot: _BrowserSlot) -> None:
+        """コンテキスト返却後、必要ならブラウザを入れ替える"""
+        await self._sample_rss()
+        async with self._lock:
+            slot.active -= 1
+            slot.pages_served += 1
+
+            recycle = not slot.retiring and self.running and self._needs_recycle(slot)
+            if recycle:
+                logger.info(
+                    f"ブラウザを再起動します: pages_served={slot.pages_served}, rss_bytes={self._rss_bytes}"
+                )
+                slot.retiring = True
+                # 再起動後の値を測り直すまで、他のブラウザを続けて再起動しない
+                self._rss_bytes = 0
+
+            # 入れ替え済みのブラウザは、使用中のコンテキストがなくなった時点で閉じる
+            close_now = slot.retiring and slot.active == 0 and slot not in self._slots
+        if recycle:
+            try:
+                await self._replace(slot)
+            except Exception as e:
+                # 起動に失敗した場合は既存ブラウザを使い続ける
+                logger.error(f"ブラウザ再起動に失敗: {e}")
+        elif close_now:
+            await self._close_browser(slot)
+
+    async def _sample_rss(self) -> None:
+        """前回から rss_check_interval 以上経っていれば、ドライバ配下のRSS合計を測り直す"""
+        if not (self.max_rss_bytes and self._driver_pids):
+            return
+        now = time.monotonic()
+        if now - self._rss_sampled_at < self.rss_check_interval:
+            return
+        self._rss_sampled_at = now
+        self._rss_bytes = await asyncio.to_thread(_process_tree_rss_bytes, self._driver_pids)
+
+    def _needs_recycle(self, slot: _BrowserSlot) -> bool:
+        if self.recycle_after_pages and slot.pages_served >= self.recycle_after_pages:
+            return True
+        if self.max_rss_bytes and self._rss_bytes > self.max_rss_bytes:
+            return True
+        return False
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[Any]:
+        """
+        独立したブラウザコンテキストを払い出す
+
+        同時ページ数の上限に達している場合は空きが出るまで待機する。
+        """
+        if not self.running:
+            raise RuntimeError("ブラウザプールは停止しています")
+        async with self._semaphore:
+            slot = await self._acquire_slot()
+            try:
+                context = await slot.browser.new_context(**BROWSER_CONTEXT_OPTIONS)
+                try:
+                    await context.add_init_script(WEBDRIVER_INIT_SCRIPT)
+                    yield context
+                finally:
+                    await context.close()
+            finally:
+                await self._release_slot(slot)
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """
+        別スレッドからプールのイベントループ上でコルーチンを実行し、結果を待つ
+
+        同期APIの呼び出し元（スレッドプール上の処理など）から利用する。
+        """
+        if self._loop is None:
+            raise RuntimeError("ブラウザプールは起動していません")
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is self._loop:
+            raise RuntimeError("プールのイベントループ上では同期呼び出しできません")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
+# プロセス全体で共有するプール（FastAPIのlifespanで起動・停止する）
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """起動中のブラウザプールを返す（未起動ならNone）"""
+    if _pool is not None and _pool.running:
+        return _pool
+    return None
+
+
+async def start_browser_pool() -> Optional[BrowserPool]:
+    """
+    環境変数の設定に従ってブラウザプールを起動する
+
+    - BROWSER_POOL_ENABLED: 0で無効（デフォルト1）
+    - BROWSER_POOL_SIZE: 常駐ブラウザ数（デフォルト1）
+    - BROWSER_POOL_MAX_PAGES: 同時ページ数の上限（デフォルト4）
+    - BROWSER_POOL_RECYCLE_PAGES: 再起動までのページ数（デフォルト200）
+    - BROWSER_POOL_MAX_RSS_MB: 再起動するRSS合計のしきい値MB（デフォルト1024）
+    - BROWSER_POOL_RSS_CHECK_SECONDS: RSS合計を測り直す間隔（秒、デフォルト5）
+
+    playwrightやChromiumが導入されていない場合は警告を出してNoneを返す。
+    """
+    global _pool
+    if os.getenv("BROWSER_POOL_ENABLED", "1") == "0":
+        return None
+    if get_browser_pool() is not None:
+        return _pool
+
+    pool = BrowserPool(
+        size=int(os.getenv("BROWSER_POOL_SIZE", "1")),
+        max_pages=int(os.getenv("BROWSER_POOL_MAX_PAGES", "4")),
+        recycle_after_pages=int(os.getenv("BROWSER_POOL_RECYCLE_PAGES", "200")),
+        max_rss_mb=int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1024")),
+        rss_check_interval=float(os.getenv("BROWSER_POOL_RSS_CHECK_SECONDS", "5")),
+    )
+    try:
+        await pool.start()
+    except Exception as e:
+        logger.warning(f"ブラウザプールを起動できませんでした（都度起動で動作します）: {e}")
+        return None
+    _pool = pool
+    return pool
+
+
+async def stop_browser_pool() -> None:
+    """ブラウザプールを停止する"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
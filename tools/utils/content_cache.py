@@ -0,0 +1,383 @@
+"""
+URLコンテンツのキャッシュ
+
+n8nのワークフローは同じURLを短時間に何度も取得するため、
+取得・処理済みのテキストを (url, 取得方法, 処理方法, 関連オプション) をキーにキャッシュする。
+
+- メモリ層: バイトサイズ上限つきLRU
+- ディスク層（任意）: URL_CACHE_DIR を指定した場合のみ有効
+- 層はget/set/deleteを持つオブジェクトなら差し替え可能（CacheBackend）
+- ETag / Last-Modified を保持し、期限切れ後は条件付きリクエストで再検証できる
+  （304なら保存済みの処理結果をそのまま再利用する）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, Protocol
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュに保存する処理済みコンテンツ"""
+    content: str
+    expires_at: float  # この時刻（epoch秒）を過ぎたら再検証が必要
+    etag: Optional[str] = None  # 取得時のETagヘッダー
+    last_modified: Optional[str] = None  # 取得時のLast-Modifiedヘッダー
+    stale_until: float = 0.0  # 期限切れ後も条件付きリクエスト用に保持する時刻
+    truncated: bool = False  # 文字数上限で切り詰めた結果か
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def can_revalidate(self, now: Optional[float] = None) -> bool:
+        """期限切れでも条件付きリクエスト（If-None-Match / If-Modified-Since）に使えるか"""
+        if not (self.etag or self.last_modified):
+            return False
+        return (now if now is not None else time.time()) < self.stale_until
+
+    def size(self) -> int:
+        """メモリ上のおおよそのサイズ（バイト）"""
+        return sys.getsizeof(self.content)
+
+
+class CacheBackend(Protocol):
+    """キャッシュ層のインターフェース"""
+
+    def get(self, key: str) -> Optional[CacheEntry]: ...
+
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+def make_cache_key(url: str, fetch_method: str, process_method: str, **options: Any) -> str:
+    """
+    キャッシュキーを作成する
+
+    Args:
+        url (str): 取得URL
+        fetch_method (str): 取得方法の値
+        process_method (str): 処理方法の値
+        **options: 結果に影響するその他のオプション（ヘッダーや上限値など）
+
+    Returns:
+        str: キーのSHA-256（16進）
+    """
+    payload = json.dumps(
+        {"url": url, "fetch": fetch_method, "process": process_method, "options": options},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """
+    バイトサイズ上限つきのLRUキャッシュ
+
+    Args:
+        max_bytes (int): 保持するエントリの合計サイズ上限（超過分は古い順に破棄）
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        size = entry.size()
+        if size > self.max_bytes:
+            # 単独で上限を超えるエントリは保存しない
+            self.delete(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size()
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size()
+
+
+class DiskCache:
+    """
+    ディスク上のキャッシュ（1エントリ1JSONファイル）
+
+    Args:
+        directory (str): 保存先ディレクトリ
+        max_bytes (int): ファイル合計サイズの上限（超過時は更新の古いファイルから削除）
+    """
+
+    # 何回の書き込みごとにサイズ上限を確認するか
+    PRUNE_INTERVAL = 50
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return CacheEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"ディスクキャッシュの読み込みに失敗: {key}, error: {e}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 途中状態のファイルを読ませないよう一時ファイルから置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(entry), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"ディスクキャッシュの書き込みに失敗: {key}, error: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        # 全ファイルの走査は重いため、一定回数の書き込みごとにまとめて行う
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._writes_since_prune < self.PRUNE_INTERVAL:
+                return
+            self._writes_since_prune = 0
+        self._prune()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _prune(self) -> None:
+        """合計サイズが上限を超えていれば、更新の古いファイルから削除する"""
+        with self._lock:
+            files = []
+            total = 0
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(files):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+class ContentCache:
+    """
+    複数のキャッシュ層をまとめたキャッシュ（先頭の層ほど高速）
+
+    下位の層でヒットした場合は上位の層にも書き戻す。
+    """
+
+    def __init__(self, tiers: list[CacheBackend], default_ttl: int = 300, stale_ttl: int = 86400):
+        self.tiers = tiers
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        エントリを返す（未登録ならNone）
+
+        Args:
+            key (str): キャッシュキー
+            allow_stale (bool): 期限切れでも再検証可能なエントリを返すか
+                （返ったエントリが is_fresh() かどうかは呼び出し側で判定する）
+        """
+        now = time.time()
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is None:
+                continue
+            fresh = entry.is_fresh(now)
+            if not fresh and not entry.can_revalidate(now):
+                tier.delete(key)
+                continue
+            if not fresh and not allow_stale:
+                continue
+            for upper in self.tiers[:i]:
+                upper.set(key, entry)
+            self._count(hit=fresh)
+            return entry
+        self._count(hit=False)
+        return None
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        ttl: Optional[int] = None,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        truncated: bool = False,
+    ) -> None:
+        """
+        ttl秒間有効なエントリとして保存する（ttl=0なら保存しない）
+
+        ETag / Last-Modified がある場合は、期限切れ後も stale_ttl 秒間は再検証用に保持する。
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        entry = CacheEntry(
+            content=content,
+            expires_at=now + ttl,
+            etag=etag,
+            last_modified=last_modified,
+            stale_until=now + ttl + self.stale_ttl if (etag or last_modified) else 0.0,
+            truncated=truncated,
+        )
+        for tier in self.tiers:
+            tier.set(key, entry)
+
+    def revalidated(
+        self,
+        key: str,
+        entry: CacheEntry,
+        ttl: Optional[int] = None,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """304 Not Modified を受けたエントリの有効期限を延長する"""
+        with self._lock:
+            self.revalidations += 1
+        self.set(
+            key,
+            entry.content,
+            ttl,
+            etag=etag or entry.etag,
+            last_modified=last_modified or entry.last_modified,
+            truncated=entry.truncated,
+        )
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def stats(self) -> dict:
+        """ヒット数・ミス数・ヒット率（再検証で304になった数はrevalidations）"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> Optional[ContentCache]:
+    """
+    環境変数の設定に従ってプロセス共有のキャッシュを返す
+
+    - URL_CACHE_ENABLED: 0でキャッシュを無効化（デフォルト1）
+    - URL_CACHE_TTL: デフォルトの有効期間（秒、デフォルト300）
+    - URL_CACHE_STALE_TTL: 期限切れ後も再検証用に保持する秒数（デフォルト86400）
+    - URL_CACHE_MAX_BYTES: メモリ層のサイズ上限（デフォルト64MB）
+    - URL_CACHE_DIR: ディスク層の保存先（未指定ならディスク層なし）
+    - URL_CACHE_DISK_MAX_BYTES: ディスク層のサイズ上限（デフォルト512MB）
+
+    Returns:
+        ContentCache: キャッシュ（無効化されている場合はNone）
+    """
+    global _cache
+    if os.getenv("URL_CACHE_ENABLED", "1") == "0":
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            tiers: list[CacheBackend] = [
+                MemoryLRUCache(int(os.getenv("URL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+            ]
+            cache_dir = os.getenv("URL_CACHE_DIR")
+            if cache_dir:
+                tiers.append(DiskCache(
+                    cache_dir,
+                    int(os.getenv("URL_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024))),
+                ))
+            _cache = ContentCache(
+                tiers,
+                default_ttl=int(os.getenv("URL_CACHE_TTL", "300")),
+                stale_ttl=int(os.getenv("URL_CACHE_STALE_TTL", "86400")),
+            )
+    return _cache
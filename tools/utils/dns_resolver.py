@@ -0,0 +1,266 @@
+"""
+非同期DNS解決とプロセス内DNSキャッシュ
+
+SSRFプリチェックのたびにブロッキングな socket.getaddrinfo を呼ぶと、
+遅いリゾルバに当たった場合に上限なく待たされる。このモジュールは以下を提供する。
+
+- aiodns（c-ares）導入時はレコードのTTLに従ってキャッシュ（未導入時は loop.getaddrinfo と既定TTL）
+- 解決失敗のネガティブキャッシュ
+- 解決タイムアウト
+- 検査済みアドレスのピン留め: pin_host() で登録したアドレスに、
+  共有httpxクライアントが再解決せずそのまま接続する（検査と接続の間のDNSリバインディングを防ぐ）
+- ssrf_guard が有効なコンテキストでは、ピン留めされていないホスト（リダイレクト先など）も
+  接続前に同じ基準で検査する
+"""
+
+import asyncio
+import contextvars
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+import weakref
+from typing import Any, Iterable, Optional
+
+from tools.utils.ssrf_guard import check_addresses, ssrf_guard_enabled
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+
+class HostResolutionError(OSError):
+    """ホスト名を解決できなかった場合の例外"""
+
+
+class DNSCache:
+    """
+    ホスト名 -> IPアドレス一覧のキャッシュ（解決失敗も一定時間保持する）
+
+    Args:
+        negative_ttl (float): 解決失敗を保持する秒数
+    """
+
+    def __init__(self, negative_ttl: float = 10.0):
+        self.negative_ttl = negative_ttl
+        self._entries: dict[str, tuple[float, Optional[list[str]], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Optional[list[str]]:
+        """
+        キャッシュ済みのアドレスを返す（未登録・期限切れならNone）
+
+        Raises:
+            HostResolutionError: 解決失敗がネガティブキャッシュされている場合
+        """
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            expires_at, ips, error = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[host]
+                return None
+        if ips is None:
+            raise HostResolutionError(error or f"ホスト名解決に失敗しました: {host}")
+        return list(ips)
+
+    def set(self, host: str, ips: list[str], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[host] = (time.monotonic() + ttl, list(ips), None)
+
+    def set_negative(self, host: str, error: str) -> None:
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._entries[host] = (time.monotonic() + self.negative_ttl, None, error)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache = DNSCache(negative_ttl=float(os.getenv("DNS_NEGATIVE_TTL", "10")))
+_aiodns_resolvers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# 検査済みアドレス（ホスト名 -> IP一覧）。リクエスト（タスク）ごとに独立している
+_pinned_hosts: contextvars.ContextVar[dict[str, list[str]]] = contextvars.ContextVar(
+    "pinned_hosts", default={}
+)
+
+
+def get_dns_cache() -> DNSCache:
+    """プロセス共有のDNSキャッシュを返す"""
+    return _cache
+
+
+def _clamp_ttl(ttl: Optional[float]) -> float:
+    """レコードのTTLを DNS_CACHE_MIN_TTL〜DNS_CACHE_MAX_TTL に収める（不明なら既定値）"""
+    if ttl is None:
+        return float(os.getenv("DNS_CACHE_DEFAULT_TTL", "60"))
+    min_ttl = float(os.getenv("DNS_CACHE_MIN_TTL", "5"))
+    max_ttl = float(os.getenv("DNS_CACHE_MAX_TTL", "300"))
+    return max(min_ttl, min(float(ttl), max_ttl))
+
+
+def _get_aiodns_resolver() -> Optional[Any]:
+    """実行中のループ用のaiodnsリゾルバ（未導入ならNone）"""
+    try:
+        import aiodns
+    except ImportError:
+        return None
+    loop = asyncio.get_running_loop()
+    resolver = _aiodns_resolvers.get(loop)
+    if resolver is None:
+        resolver = aiodns.DNSResolver(loop=loop)
+        _aiodns_resolvers[loop] = resolver
+    return resolver
+
+
+async def _lookup(host: str) -> tuple[list[str], Optional[float]]:
+    """ホスト名を解決し、(IP一覧, TTL秒 or None) を返す"""
+    resolver = _get_aiodns_resolver()
+    if resolver is not None:
+        result = await resolver.getaddrinfo(host, family=socket.AF_UNSPEC, type=socket.SOCK_STREAM)
+        ips: list[str] = []
+        ttls: list[int] = []
+        for node in result.nodes:
+            addr = node.addr[0]
+            ip = addr.decode() if isinstance(addr, bytes) else str(addr)
+            if ip not in ips:
+                ips.append(ip)
+            ttls.append(node.ttl)
+        return ips, (min(ttls) if ttls else None)
+
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    ips = []
+    for info in infos:
+        if info and info[4] and info[4][0] not in ips:
+            ips.append(info[4][0])
+    return ips, None
+
+
+async def resolve_host(host: str, timeout: Optional[float] = None) -> list[str]:
+    """
+    ホスト名をIPアドレス一覧に解決する（キャッシュ・ネガティブキャッシュ・タイムアウトつき）
+
+    Args:
+        host (str): ホスト名（IPアドレス表記ならそのまま返す）
+        timeout (float, optional): 解決のタイムアウト秒（省略時は DNS_RESOLVE_TIMEOUT、デフォルト5）
+
+    Returns:
+        list[str]: IPアドレス一覧
+
+    Raises:
+        HostResolutionError: 解決に失敗した、またはタイムアウトした場合
+    """
+    host = host.strip("[]").rstrip(".").lower()
+    try:
+        return [str(ipaddress.ip_address(host))]
+    except ValueError:
+        pass
+
+    cached = _cache.get(host)
+    if cached is not None:
+        return cached
+
+    if timeout is None:
+        timeout = float(os.getenv("DNS_RESOLVE_TIMEOUT", "5"))
+    try:
+        ips, ttl = await asyncio.wait_for(_lookup(host), timeout=timeout)
+    except asyncio.TimeoutError:
+        error = f"ホスト名解決がタイムアウトしました: {host}"
+        _cache.set_negative(host, error)
+        raise HostResolutionError(error)
+    except Exception as e:
+        error = f"ホスト名解決に失敗しました: {host}: {e}"
+        _cache.set_negative(host, error)
+        raise HostResolutionError(error) from e
+
+    if not ips:
+        error = f"有効なIPアドレスが見つかりません: {host}"
+        _cache.set_negative(host, error)
+        raise HostResolutionError(error)
+
+    _cache.set(host, ips, _clamp_ttl(ttl))
+    logger.debug(f"DNS解決: {host} -> {ips} (ttl={ttl})")
+    return ips
+
+
+def pin_host(host: str, ips: Iterable[str]) -> None:
+    """
+    現在のリクエスト（コンテキスト）で、hostへの接続先を検査済みのipsに固定する
+
+    共有httpxクライアントはこのアドレスに直接接続し、ホスト名を再解決しない。
+    """
+    pinned = dict(_pinned_hosts.get())
+    pinned[host.strip("[]").rstrip(".").lower()] = list(ips)
+    _pinned_hosts.set(pinned)
+
+
+def pinned_ips(host: str) -> Optional[list[str]]:
+    """pin_host で固定されたアドレスを返す（未固定ならNone）"""
+    return _pinned_hosts.get().get(host.strip("[]").rstrip(".").lower())
+
+
+def create_network_backend() -> Any:
+    """
+    httpcore用のネットワークバックエンドを作成する
+
+    接続先ホストは pin_host で固定されたアドレス、なければDNSキャッシュ経由で解決し、
+    IPアドレスへ直接接続する。TLSのSNIと証明書検証、Hostヘッダーは元のホスト名のまま。
+    SSRF検査が有効なコンテキストでは、固定されていないホスト（リダイレクト先など）を
+    解決後に検査し、危険なら UnsafeAddressError を送出する（検査済みアドレスは固定して再利用）。
+    """
+    import httpcore
+
+    class _CachedResolverBackend(httpcore.AsyncNetworkBackend):
+        def __init__(self) -> None:
+            self._backend = httpcore.AnyIOBackend()
+
+        async def connect_tcp(
+            self,
+            host: str,
+            port: int,
+            timeout: Optional[float] = None,
+            local_address: Optional[str] = None,
+            socket_options: Any = None,
+        ) -> Any:
+            ips = pinned_ips(host)
+            if ips is None:
+                try:
+                    ips = await resolve_host(host, timeout=timeout)
+                except HostResolutionError as e:
+                    raise httpcore.ConnectError(str(e)) from e
+                if ssrf_guard_enabled():
+                    check_addresses(host, ips)
+                    pin_host(host, ips)
+            last_error: Optional[Exception] = None
+            for ip in ips:
+                try:
+                    return await self._backend.connect_tcp(
+                        ip,
+                        port,
+                        timeout=timeout,
+                        local_address=local_address,
+                        socket_options=socket_options,
+                    )
+                except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                    last_error = e
+            raise last_error or httpcore.ConnectError(f"接続できませんでした: {host}")
+
+        async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options: Any = None) -> Any:
+            return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+        async def sleep(self, seconds: float) -> None:
+            await self._backend.sleep(seconds)
+
+    return _CachedResolverBackend()
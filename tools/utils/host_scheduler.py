@@ -0,0 +1,325 @@
+"""
+ホストごとの取得ペース制御（ポライトネス）
+
+同じドメインのURLを大量に取得すると、制限なしでは相手サーバーに連続してアクセスし、
+スロットリングやアクセス禁止の原因になる。このモジュールは取得層の前段で以下を行う。
+
+- ホストごとのトークンバケット（毎秒のリクエスト数とバースト数）
+- ホストごとの同時取得数の上限
+- robots.txt の Crawl-delay への追従（任意）
+- 上限に達したリクエストは失敗させず、到着順（FIFO）に待たせる
+
+いずれも既定では無効（制限なし）で、環境変数で指定した場合だけ働く。
+
+同期（スレッド）・非同期のどちらの呼び出し元も同じホスト状態を共有する。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+from urllib.parse import urlsplit
+
+from tools.utils.http_client import get_async_client, get_session
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+# ホスト状態がこの数を超えたら、待機も実行中もないホストの状態を破棄する
+_MAX_IDLE_HOSTS = 10_000
+
+
+class _HostState:
+    """1ホスト分の実行数・待ち行列・レート制御の状態"""
+
+    def __init__(self) -> None:
+        self.active = 0
+        # ("async", loop, future) または ("sync", threading.Event)
+        self.waiters: deque = deque()
+        # 次のリクエストを送れる理論上の時刻（GCRA）
+        self.next_at = 0.0
+        self.crawl_delay: Optional[float] = None
+        self.robots_expires_at = 0.0
+
+
+class HostScheduler:
+    """
+    ホストごとのレート制限と同時取得数制限
+
+    Args:
+        rate (float): ホストごとの毎秒リクエスト数（0以下で無制限）
+        burst (int): 間隔を空けずに送れるリクエスト数
+        max_concurrency (int): ホストごとの同時取得数（0以下で無制限）
+        （既定ではどの制限も無効で、slot はホストの状態を持たずにそのまま通す）
+        respect_robots (bool): robots.txt の Crawl-delay に従うか
+        robots_ttl (float): robots.txt の内容を保持する秒数
+        max_crawl_delay (float): Crawl-delay として受け入れる最大秒数
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: int = 5,
+        max_concurrency: int = 0,
+        respect_robots: bool = False,
+        robots_ttl: float = 3600.0,
+        max_crawl_delay: float = 30.0,
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_concurrency = max_concurrency
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self.max_crawl_delay = max_crawl_delay
+        self._hosts: dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """いずれかの制限が有効か"""
+        return self.rate > 0 or self.max_concurrency > 0 or self.respect_robots
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """非同期の取得1件分の枠を確保する（順番が来るまで待つ）"""
+        host = _host_key(url) if self.enabled else ""
+        if not host:
+            yield
+            return
+        state = self._state(host)
+        await self._acquire_async(state)
+        try:
+            if self.respect_robots and self._robots_due(state):
+                self._set_crawl_delay(state, await self._fetch_robots_async(url))
+            delay = self._reserve(state)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            self._release(state)
+
+    @contextmanager
+    def slot_sync(self, url: str) -> Iterator[None]:
+        """slot の同期版（呼び出しスレッドをブロックして待つ）"""
+        host = _host_key(url) if self.enabled else ""
+        if not host:
+            yield
+            return
+        state = self._state(host)
+        self._acquire_sync(state)
+        try:
+            if self.respect_robots and self._robots_due(state):
+                self._set_crawl_delay(state, self._fetch_robots_sync(url))
+            delay = self._reserve(state)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            self._release(state)
+
+    def stats(self) -> dict:
+        """追跡中のホスト数・実行中の取得数・待機中の取得数"""
+        with self._lock:
+            states = list(self._hosts.values())
+            return {
+                "hosts": len(states),
+                "active": sum(s.active for s in states),
+                "waiting": sum(len(s.waiters) for s in states),
+            }
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                if len(self._hosts) >= _MAX_IDLE_HOSTS:
+                    self._prune_locked()
+                state = self._hosts[host] = _HostState()
+            return state
+
+    def _prune_locked(self) -> None:
+        now = time.monotonic()
+        for host, state in list(self._hosts.items()):
+            if state.active == 0 and not state.waiters and state.next_at <= now:
+                del self._hosts[host]
+
+    # --- 同時取得数（FIFOで枠を引き渡す） ---
+
+    def _try_acquire_locked(self, state: _HostState) -> bool:
+        if self.max_concurrency <= 0 or (state.active < self.max_concurrency and not state.waiters):
+            state.active += 1
+            return True
+        return False
+
+    async def _acquire_async(self, state: _HostState) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire_locked(state):
+                return
+            waiter = ("async", loop, loop.create_future())
+            state.waiters.append(waiter)
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+                    raise
+            # 枠を受け取った直後にキャンセルされた場合は次の待機者へ渡す
+            self._release(state)
+            raise
+
+    def _acquire_sync(self, state: _HostState) -> None:
+        with self._lock:
+            if self._try_acquire_locked(state):
+                return
+            waiter = ("sync", threading.Event())
+            state.waiters.append(waiter)
+        waiter[1].wait()
+
+    def _release(self, state: _HostState) -> None:
+        """枠を返す（待機者がいれば実行数を減らさずにそのまま引き渡す）"""
+        with self._lock:
+            if not state.waiters:
+                state.active -= 1
+                return
+            waiter = state.waiters.popleft()
+        if waiter[0] == "sync":
+            waiter[1].set()
+        else:
+            _, loop, future = waiter
+            loop.call_soon_threadsafe(_set_future_result, future)
+
+    # --- レート制限 ---
+
+    def _reserve(self, state: _HostState) -> float:
+        """
+        次の送信時刻を予約し、それまでの待ち秒数を返す
+
+        GCRA（仮想スケジューリング）でトークンバケットと同じ挙動にする。
+        Crawl-delay がある場合はその間隔を下限とし、バーストは許可しない。
+        """
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        tolerance = interval * (self.burst - 1)
+        if state.crawl_delay:
+            interval = max(interval, state.crawl_delay)
+            tolerance = 0.0
+        if interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            at = max(state.next_at, now)
+            state.next_at = at + interval
+        return max(at - tolerance - now, 0.0)
+
+    # --- robots.txt ---
+
+    def _robots_due(self, state: _HostState) -> bool:
+        """robots.txt の再取得が必要か（同時に複数回取得しないよう期限を先に延ばす）"""
+        with self._lock:
+            now = time.monotonic()
+            if now < state.robots_expires_at:
+                return False
+            state.robots_expires_at = now + self.robots_ttl
+            return True
+
+    def _set_crawl_delay(self, state: _HostState, robots_txt: Optional[str]) -> None:
+        delay = _parse_crawl_delay(robots_txt) if robots_txt else None
+        if delay is not None:
+            delay = min(delay, self.max_crawl_delay)
+        state.crawl_delay = delay or None
+
+    async def _fetch_robots_async(self, url: str) -> Optional[str]:
+        robots_url = _robots_url(url)
+        try:
+            response = await get_async_client().get(robots_url, timeout=10, follow_redirects=True)
+        except Exception as e:
+            logger.debug(f"robots.txt取得失敗: {robots_url}, error: {e}")
+            return None
+        return response.text if response.status_code == 200 else None
+
+    def _fetch_robots_sync(self, url: str) -> Optional[str]:
+        robots_url = _robots_url(url)
+        try:
+            response = get_session().get(robots_url, timeout=10)
+        except Exception as e:
+            logger.debug(f"robots.txt取得失敗: {robots_url}, error: {e}")
+            return None
+        return response.text if response.status_code == 200 else None
+
+
+def _set_future_result(future: "asyncio.Future[Any]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _host_key(url: str) -> str:
+    return (urlsplit(url).hostname or "").rstrip(".").lower()
+
+
+def _robots_url(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+
+def _parse_crawl_delay(robots_txt: str) -> Optional[float]:
+    """
+    robots.txt から全クローラー向け（User-agent: *）の Crawl-delay を取り出す
+
+    urllib.robotparser は整数の Crawl-delay しか解釈しないため、小数も扱えるよう自前で読む。
+    """
+    agents: list[str] = []
+    in_rules = False
+    for line in robots_txt.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (part.strip() for part in line.split(":", 1))
+        field = field.lower()
+        if field == "user-agent":
+            # ルール行の後の User-agent は新しいグループの開始
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value)
+            continue
+        in_rules = True
+        if field == "crawl-delay" and "*" in agents:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+_scheduler: Optional[HostScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_host_scheduler() -> HostScheduler:
+    """
+    環境変数の設定に従ってプロセス共有のスケジューラを返す
+
+    - HOST_RATE_LIMIT: ホストごとの毎秒リクエスト数（デフォルト0=無制限）
+    - HOST_RATE_BURST: 間隔を空けずに送れるリクエスト数（デフォルト5）
+    - HOST_MAX_CONCURRENCY: ホストごとの同時取得数（デフォルト0=無制限）
+    - ROBOTS_CRAWL_DELAY: 1で robots.txt の Crawl-delay に従う（デフォルト0）
+    - ROBOTS_TXT_TTL: robots.txt を保持する秒数（デフォルト3600）
+    - ROBOTS_MAX_CRAWL_DELAY: 受け入れる Crawl-delay の上限秒数（デフォルト30）
+    """
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HostScheduler(
+                rate=float(os.getenv("HOST_RATE_LIMIT", "0")),
+                burst=int(os.getenv("HOST_RATE_BURST", "5")),
+                max_concurrency=int(os.getenv("HOST_MAX_CONCURRENCY", "0")),
+                respect_robots=os.getenv("ROBOTS_CRAWL_DELAY", "0") == "1",
+                robots_ttl=float(os.getenv("ROBOTS_TXT_TTL", "3600")),
+                max_crawl_delay=float(os.getenv("ROBOTS_MAX_CRAWL_DELAY", "30")),
+            )
+    return _scheduler
@@ -0,0 +1,113 @@
+"""
+設定済みのhtml2text変換器（プロファイル）
+
+html2text.HTML2Text は1回の変換ごとに状態を持つため使い回せないが、
+呼び出しごとに生成して属性を設定し直す必要もない。
+プロファイルごとに設定済みの原型を1つだけ作り、変換のたびにその複製を払い出す。
+"""
+
+import copy
+import threading
+from enum import Enum
+from typing import Any
+
+import html2text
+
+
+class MarkdownProfile(Enum):
+    """HTML→テキスト変換の設定プロファイル"""
+    DEFAULT = "default"  # リンク・画像を保持したマークダウン（MARKDOWNの既定）
+    TEXT = "text"  # リンク・画像を除いた読みやすさ重視のテキスト（READABILITYの既定）
+    NO_IMAGES = "no_images"  # リンクは保持し、画像を除く
+    REFERENCE_LINKS = "reference_links"  # リンクを本文中ではなく参照形式で末尾にまとめる
+
+
+# 各プロファイルで HTML2Text に設定する属性
+PROFILE_SETTINGS: dict[MarkdownProfile, dict[str, Any]] = {
+    MarkdownProfile.DEFAULT: {
+        "ignore_links": False,  # リンクを保持
+        "ignore_images": False,  # 画像を保持
+        "body_width": 0,  # 行幅制限なし
+        "unicode_snob": True,  # Unicode文字を適切に処理
+        "escape_snob": True,  # エスケープ文字を適切に処理
+    },
+    MarkdownProfile.TEXT: {
+        "ignore_links": True,  # リンクは無視（読みやすさ重視）
+        "ignore_images": True,  # 画像は無視
+        "body_width": 0,
+        "unicode_snob": True,
+        "escape_snob": True,
+    },
+    MarkdownProfile.NO_IMAGES: {
+        "ignore_links": False,
+        "ignore_images": True,
+        "body_width": 0,
+        "unicode_snob": True,
+        "escape_snob": True,
+    },
+    MarkdownProfile.REFERENCE_LINKS: {
+        "ignore_links": False,
+        "ignore_images": False,
+        "inline_links": False,
+        "body_width": 0,
+        "unicode_snob": True,
+        "escape_snob": True,
+    },
+}
+
+
+class _Prototype:
+    """設定済みの原型と、複製時に作り直す属性の一覧"""
+
+    def __init__(self, converter: html2text.HTML2Text):
+        self.converter = converter
+        self.state = converter.__dict__
+        # 変換中に書き換わるコンテナ
+        self.mutable = tuple(
+            name for name, value in self.state.items() if isinstance(value, (list, dict, set))
+        )
+        # 出力先（outtextf）など原型に束縛されたメソッド
+        self.bound = tuple(
+            name for name, value in self.state.items()
+            if getattr(value, "__self__", None) is converter
+        )
+
+    def clone(self) -> html2text.HTML2Text:
+        h = object.__new__(type(self.converter))
+        h.__dict__.update(self.state)
+        for name in self.mutable:
+            setattr(h, name, copy.copy(self.state[name]))
+        for name in self.bound:
+            setattr(h, name, getattr(h, self.state[name].__name__))
+        return h
+
+
+_prototypes: dict[MarkdownProfile, _Prototype] = {}
+_prototypes_lock = threading.Lock()
+
+
+def build_converter(profile: MarkdownProfile = MarkdownProfile.DEFAULT) -> html2text.HTML2Text:
+    """プロファイルの設定で HTML2Text を新規に生成する"""
+    h = html2text.HTML2Text()
+    for name, value in PROFILE_SETTINGS[profile].items():
+        setattr(h, name, value)
+    return h
+
+
+def get_converter(profile: MarkdownProfile = MarkdownProfile.DEFAULT) -> html2text.HTML2Text:
+    """
+    プロファイルの設定済み変換器を返す（変換1回ごとに呼び出す）
+
+    設定済みの原型の属性を複製し、リストや辞書などの変換中に書き換わる状態だけを作り直す。
+
+    Args:
+        profile (MarkdownProfile): 変換プロファイル
+
+    Returns:
+        html2text.HTML2Text: 未使用の変換器
+    """
+    prototype = _prototypes.get(profile)
+    if prototype is None:
+        with _prototypes_lock:
+            prototype = _prototypes.setdefault(profile, _Prototype(build_converter(profile)))
+    return prototype.clone()
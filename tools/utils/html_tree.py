@@ -0,0 +1,77 @@
+"""
+解析済みHTMLツリーの共有
+
+READABILITY処理では readability（lxml）で本文を抽出し、結果が短い場合などは
+元のHTMLをマークダウンに変換してフォールバックする。従来はフォールバック時に
+html2text が同じHTMLを最初から解析し直していたため、このモジュールで
+
+- parse_html: HTMLをlxmlで一度だけ解析する（readability と同じ解析方法）
+- render_markdown: 解析済みツリーを走査して html2text の変換器へ直接イベントを渡す
+
+を提供し、抽出とマークダウン変換で同じツリーを使う。
+"""
+
+from typing import Any, Optional
+
+import lxml.etree
+import lxml.html
+
+from tools.utils.html_converters import MarkdownProfile, get_converter
+
+# readabilityが文字列入力に使うものと同じUTF-8パーサー
+_utf8_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def parse_html(content: str) -> Any:
+    """
+    HTML文字列をlxmlのツリーに解析する
+
+    Raises:
+        lxml.etree.ParserError: 空の文書など解析できない場合
+    """
+    return lxml.html.document_fromstring(content.encode("utf-8", "replace"), parser=_utf8_parser)
+
+
+def render_markdown(tree: Any, profile: MarkdownProfile = MarkdownProfile.DEFAULT) -> str:
+    """
+    解析済みツリーをマークダウンに変換する（HTML文字列を再解析しない）
+
+    html2text の HTMLParser が出すのと同じ順序で開始タグ・テキスト・終了タグを渡すため、
+    出力は文字列から変換した場合と同じになる（lxmlが不正なHTMLを補正した部分を除く）。
+
+    Args:
+        tree: parse_html で得たツリー（またはその要素）
+        profile (MarkdownProfile): html2textの設定プロファイル
+
+    Returns:
+        str: マークダウン形式のテキスト
+    """
+    h = get_converter(profile)
+    h.start = True
+    for event, element in lxml.etree.iterwalk(tree, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            h.handle_starttag(element.tag, list(element.attrib.items()))
+            _handle_text(h, element.text)
+            continue
+        if event == "end":
+            h.handle_endtag(element.tag)
+        if element is not tree:
+            _handle_text(h, element.tail)
+    return h.optwrap(h.finish()).strip()
+
+
+def _handle_text(h: Any, text: Optional[str]) -> None:
+    """
+    テキストを変換器に渡す
+
+    lxmlは &nbsp; を文字（U+00A0）に展開済みのため、html2text が文字参照として
+    受け取った場合と同じ扱いになるよう、エンティティとして渡し直す。
+    """
+    if not text:
+        return
+    parts = text.split("\xa0")
+    for i, part in enumerate(parts):
+        if i:
+            h.handle_entityref("nbsp")
+        if part:
+            h.handle_data(part)
@@ -0,0 +1,292 @@
+"""
+プロセス共有のHTTPクライアント
+
+requests.get / httpx.AsyncClient を呼び出しごとに作るとコネクションプールも毎回作り直され、
+同じホストへの取得でもTCP/TLSハンドシェイクが繰り返される。
+このモジュールはプロセス全体で共有するクライアントを提供し、keep-aliveで接続を再利用する。
+
+- 同期版: requests.Session（ホストごとのプールサイズを設定）
+- 非同期版: httpx.AsyncClient（h2導入時はHTTP/2を有効化、名前解決は dns_resolver のキャッシュ経由）
+- 接続の新規作成数とリクエスト数から、プールの再利用率を集計する
+
+取得結果がリクエスト間で混ざらないよう、どちらのクライアントもCookieは保持しない。
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import httpcore
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.utils.dns_resolver import create_network_backend
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+
+def _no_cookie_jar() -> CookieJar:
+    """Cookieを一切保存しないCookieJar"""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class _AsyncPoolCounter:
+    """非同期クライアントのリクエスト数と新規接続数を数える"""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    async def trace(self, event_name: str, info: dict) -> None:
+        """httpcoreのtrace拡張から呼ばれるコールバック"""
+        if event_name in ("connection.connect_tcp.complete", "connection.connect_unix_socket.complete"):
+            with self._lock:
+                self.new_connections += 1
+
+
+# httpcoreの例外と、対応するhttpxの例外（具体的なものから順に並べる）
+_HTTPCORE_EXCEPTIONS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _map_httpcore_errors() -> Iterator[None]:
+    """httpcoreの例外をhttpxの例外に置き換える（それ以外の例外はそのまま送出）"""
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in _HTTPCORE_EXCEPTIONS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e)) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterable[bytes]) -> None:
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _map_httpcore_errors():
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class _CachedDnsTransport(httpx.AsyncBaseTransport):
+    """
+    接続時の名前解決を dns_resolver（DNSキャッシュ・SSRF検査済みアドレス）経由にするトランスポート
+
+    httpx.AsyncHTTPTransport にはネットワークバックエンドを指定する手段が無いため、
+    httpcore.AsyncConnectionPool を直接組み立て、httpx との間の変換だけをここで行う。
+    """
+
+    def __init__(
+        self,
+        http2: bool,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+    ) -> None:
+        self._pool = httpcore.AsyncConnectionPool(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=create_network_backend(),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _map_httpcore_errors():
+            core_response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=core_response.status,
+            headers=core_response.headers,
+            stream=_ResponseStream(core_response.stream),
+            extensions=core_response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_counter = _AsyncPoolCounter()
+
+
+def get_session() -> requests.Session:
+    """
+    プロセス共有のrequests.Sessionを返す
+
+    - HTTP_POOL_CONNECTIONS: プールを保持するホスト数（デフォルト32）
+    - HTTP_POOL_MAXSIZE: ホストごとに保持する接続数（デフォルト10）
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", "32")),
+                pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "10")),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.cookies = _no_cookie_jar()
+            _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    実行中のイベントループ用の共有httpx.AsyncClientを返す
+
+    httpxの接続はイベントループに紐づくため、クライアントはループごとに1つ作成する。
+
+    - HTTP_POOL_MAXSIZE: ホストごとの最大接続数の目安（keep-alive保持数、デフォルト10）
+    - HTTP_MAX_CONNECTIONS: 全体の最大接続数（デフォルト100）
+    - HTTP_KEEPALIVE_EXPIRY: アイドル接続を保持する秒数（デフォルト30）
+    - HTTP_ENABLE_HTTP2: 0でHTTP/2を無効化（h2未導入時は常に無効）
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None and not client.is_closed:
+        return client
+
+    http2 = (
+        os.getenv("HTTP_ENABLE_HTTP2", "1") != "0"
+        and importlib.util.find_spec("h2") is not None
+    )
+    transport = _CachedDnsTransport(
+        http2=http2,
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_POOL_MAXSIZE", "10")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    client = httpx.AsyncClient(transport=transport, cookies=_no_cookie_jar())
+    _async_clients[loop] = client
+    logger.debug(f"共有HTTPクライアント作成: http2={http2}")
+    return client
+
+
+def async_request_extensions(trace: Optional[Callable[[str, dict], Awaitable[None]]] = None) -> dict:
+    """
+    共有非同期クライアントで送るリクエストに付ける拡張（プール統計の計測用）
+
+    呼び出すたびにリクエスト数を1つ数える。
+
+    Args:
+        trace (callable, optional): プール統計に加えて呼び出すtraceコールバック（リクエストごとの計測用）
+    """
+    _async_counter.count_request()
+    if trace is None:
+        return {"trace": _async_counter.trace}
+
+    async def both(event_name: str, info: dict) -> None:
+        await _async_counter.trace(event_name, info)
+        await trace(event_name, info)
+
+    return {"trace": both}
+
+
+async def close_http_clients() -> None:
+    """共有クライアントを閉じる（アプリ終了時に呼び出す）"""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def http_pool_stats() -> dict:
+    """
+    コネクションプールの再利用状況を返す
+
+    Returns:
+        dict: sync / async それぞれのリクエスト数・新規接続数・再利用数・再利用率
+    """
+    sync_requests = 0
+    sync_connections = 0
+    if _session is not None:
+        # 同じアダプタをhttp/httpsの両方にマウントしているため重複を除く
+        adapters = {id(a): a for a in _session.adapters.values()}.values()
+        for adapter in adapters:
+            pools = getattr(adapter, "poolmanager", None)
+            if pools is None:
+                continue
+            for key in list(pools.pools.keys()):
+                pool = pools.pools.get(key)
+                if pool is None:
+                    continue
+                sync_requests += pool.num_requests
+                sync_connections += pool.num_connections
+
+    return {
+        "sync": _summarize(sync_requests, sync_connections),
+        "async": _summarize(_async_counter.requests, _async_counter.new_connections),
+    }
+
+
+def _summarize(requests_count: int, new_connections: int) -> dict:
+    reused = max(requests_count - new_connections, 0)
+    return {
+        "requests": requests_count,
+        "new_connections": new_connections,
+        "reused": reused,
+        "hit_ratio": round(reused / requests_count, 4) if requests_count else 0.0,
+    }
@@ -0,0 +1,638 @@
+"""
+/items API のアイテムストア
+
+従来はリストに保存し、取得・更新・削除のたびに全件を走査していた（IDも件数+1のため
+削除後に重複していた）。このモジュールは以下を提供する。
+
+- MemoryItemStore: IDをキーにした辞書で O(1) に参照する（プロセス内のみ、再起動で消える）
+- SQLiteItemStore: SQLite（WALモード）に保存し、起動時に既存のデータベースを開いて引き継ぐ
+
+どちらもIDは単調増加で、削除したIDを再利用しない。
+アイテムは更新のたびに増える version を持ち、更新・削除に期待する version を渡すと
+一致した場合だけ適用する（compare-and-set。不一致は VersionConflictError）。
+複数ワーカーで同じデータを扱う場合は SQLite を共有する（条件付きのUPDATE/DELETE 1文で判定するため、
+アプリ側のロックを取らない）。
+一括操作（create_many / update_many / delete_many）は1回のロック・1つのトランザクションで行う。
+一覧（query）はカーソルによるページ分割と、販売可否・価格帯での絞り込みに対応し、
+絞り込みは副索引（メモリ: 価格の整列索引と販売可否のマップ / SQLite: インデックス）で行う。
+"""
+
+import base64
+import binascii
+import heapq
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterator, List, Optional, Union  # クラス内では list メソッドが組み込みの list を隠すため List も使う
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+# 保存する項目（Itemモデルの項目と同じ順序）
+ITEM_FIELDS = ("name", "description", "price", "is_available")
+
+
+class VersionConflictError(Exception):
+    """期待した version と保存されている version が異なる"""
+
+    def __init__(self, current: dict):
+        super().__init__(f"アイテム {current['id']} の version が一致しません（現在: {current['version']}）")
+        self.current = current
+
+# 一覧のカーソル: ID順なら (id,)、価格で絞り込んだ場合は価格順の (price, id)
+Cursor = tuple
+
+
+def encode_cursor(cursor: Optional[Cursor]) -> Optional[str]:
+    """カーソルをAPIで受け渡す不透明な文字列にする"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    """
+    encode_cursor の逆変換
+
+    Raises:
+        ValueError: 不正なカーソルの場合
+    """
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f"不正なカーソルです: {value}")
+    if (
+        not isinstance(cursor, list)
+        or len(cursor) not in (1, 2)
+        or not isinstance(cursor[-1], int)
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in cursor)
+    ):
+        raise ValueError(f"不正なカーソルです: {value}")
+    return tuple(cursor)
+
+
+class ItemStore(ABC):
+    """アイテムストアの共通インターフェース（アイテムは "id" と "version" を含む辞書）"""
+
+    @abstractmethod
+    def get(self, item_id: int) -> Optional[dict]:
+        """IDのアイテムを返す（無ければNone）"""
+
+    @abstractmethod
+    def create(self, data: dict) -> dict:
+        """新しいIDを割り当てて保存し、保存したアイテムを返す"""
+
+    @abstractmethod
+    def update(self, item_id: int, data: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        """
+        IDのアイテムを置き換え、version を1増やす（無ければNone）
+
+        Raises:
+            VersionConflictError: expected_version を指定し、現在の version と異なる場合
+        """
+
+    @abstractmethod
+    def delete(self, item_id: int, expected_version: Optional[int] = None) -> Optional[dict]:
+        """
+        IDのアイテムを削除して返す（無ければNone）
+
+        Raises:
+            VersionConflictError: expected_version を指定し、現在の version と異なる場合
+        """
+
+    @abstractmethod
+    def list(self) -> list[dict]:
+        """全アイテムをID順に返す"""
+
+    def create_many(self, rows: List[dict]) -> List[dict]:
+        """複数のアイテムをまとめて保存する（IDは入力順に割り当てる）"""
+        return [self.create(data) for data in rows]
+
+    def update_many(
+        self, updates: List[tuple[int, dict, Optional[int]]]
+    ) -> List[Union[dict, None, VersionConflictError]]:
+        """
+        (ID, 内容, 期待するversion) の組をまとめて適用する
+
+        結果は入力順で、無いIDはNone、version が一致しない行は VersionConflictError（例外は送出せず、他の行は適用する）。
+        """
+        return [_conflict_as_result(self.update, *update) for update in updates]
+
+    def delete_many(self, item_ids: List[int]) -> List[Optional[dict]]:
+        """複数のIDをまとめて削除する（結果は入力順、無いIDはNone）"""
+        return [self.delete(item_id) for item_id in item_ids]
+
+    @abstractmethod
+    def query(
+        self,
+        *,
+        is_available: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100,
+    ) -> tuple[List[dict], Optional[Cursor]]:
+        """
+        条件に合うアイテムを最大limit件返す
+
+        価格帯を指定した場合は価格順（同じ価格はID順）、それ以外はID順に並べる。
+
+        Args:
+            is_available (bool, optional): 販売可否で絞り込む
+            min_price / max_price (float, optional): 価格帯（両端を含む）で絞り込む
+            cursor (Cursor, optional): 前のページの next_cursor（この続きから返す）
+            limit (int): 最大件数
+
+        Returns:
+            tuple[list[dict], Cursor | None]: アイテムと、続きがある場合の次のカーソル
+
+        Raises:
+            ValueError: カーソルの形式が並び順と合わない場合
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """保存しているアイテム数を返す"""
+
+    def close(self) -> None:
+        pass
+
+
+def _record(item_id: int, data: dict, version: int = 1) -> dict:
+    record = {field: data.get(field) for field in ITEM_FIELDS}
+    record["id"] = item_id
+    record["version"] = version
+    return record
+
+
+def _conflict_as_result(func, *args: Any) -> Union[dict, None, VersionConflictError]:
+    try:
+        return func(*args)
+    except VersionConflictError as e:
+        return e
+
+
+def _check_cursor(cursor: Optional[Cursor], by_price: bool) -> None:
+    if cursor is not None and len(cursor) != (2 if by_price else 1):
+        raise ValueError("カーソルが絞り込み条件と一致しません（条件を変えた場合は最初から取得してください）")
+
+
+class _SortedIndex:
+    """
+    キーを昇順に保持する索引
+
+    一定サイズのバケットに分けて持つため、挿入・削除は件数nに対して O(√n) 程度で済む
+    （1つの整列リストへの insort は O(n) の移動が発生する）。
+    """
+
+    _LOAD = 1000
+
+    def __init__(self) -> None:
+        self._buckets: list[list] = []
+        self._maxes: list = []
+
+    def add(self, key: Any) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            return
+        i = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > self._LOAD * 2:
+            self._buckets[i:i + 1] = [bucket[:self._LOAD], bucket[self._LOAD:]]
+            self._maxes[i:i + 1] = [bucket[self._LOAD - 1], bucket[-1]]
+
+    def remove(self, key: Any) -> None:
+        i = bisect_left(self._maxes, key)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def iter_after(self, start: Any) -> Iterator:
+        """startより大きいキーを昇順に返す"""
+        i = bisect_right(self._maxes, start)
+        for n, bucket in enumerate(self._buckets[i:]):
+            yield from bucket[bisect_right(bucket, start) if n == 0 else 0:]
+
+
+# 販売可否マップの値（IDごとに1バイト）
+_ABSENT, _AVAILABLE, _UNAVAILABLE = 0, 1, 2
+_PRESENT_RE = re.compile(b"[\x01\x02]")
+
+
+class MemoryItemStore(ItemStore):
+    """
+    プロセス内の辞書に保存するストア（辞書は挿入順＝ID順を保つ）
+
+    副索引:
+    - 価格索引: 販売可否ごとの (price, id) の整列索引（価格帯の絞り込みと価格順のページ分割。
+      販売可否も指定された場合は片方の索引だけを辿るため、条件に合わないアイテムを読み飛ばさない）
+    - 販売可否マップ: IDを添字とするバイト列（0: 無し / 1: 販売中 / 2: 販売停止）。
+      次の該当IDを bytearray.find で探すため、該当しないIDを1件ずつ調べない
+    """
+
+    def __init__(self) -> None:
+        self._items: dict[int, dict] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._price_index = {True: _SortedIndex(), False: _SortedIndex()}
+        self._availability = bytearray(1)  # ID 0 は使わない
+
+    def get(self, item_id: int) -> Optional[dict]:
+        return self._items.get(item_id)
+
+    def create(self, data: dict) -> dict:
+        with self._lock:
+            return self._create(data)
+
+    def update(self, item_id: int, data: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        with self._lock:
+            return self._update(item_id, data, expected_version)
+
+    def delete(self, item_id: int, expected_version: Optional[int] = None) -> Optional[dict]:
+        with self._lock:
+            return self._delete(item_id, expected_version)
+
+    def create_many(self, rows: List[dict]) -> List[dict]:
+        with self._lock:
+            return [self._create(data) for data in rows]
+
+    def update_many(
+        self, updates: List[tuple[int, dict, Optional[int]]]
+    ) -> List[Union[dict, None, VersionConflictError]]:
+        with self._lock:
+            return [_conflict_as_result(self._update, *update) for update in updates]
+
+    def delete_many(self, item_ids: List[int]) -> List[Optional[dict]]:
+        with self._lock:
+            return [self._delete(item_id) for item_id in item_ids]
+
+    # 以下はロックを取得済みの状態で呼ぶ
+    def _create(self, data: dict) -> dict:
+        item = _record(self._next_id, data)
+        self._items[item["id"]] = item
+        self._next_id += 1
+        self._availability.append(_ABSENT)
+        self._index(item)
+        return item
+
+    def _update(self, item_id: int, data: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        old = self._items.get(item_id)
+        if old is None:
+            return None
+        if expected_version is not None and old["version"] != expected_version:
+            raise VersionConflictError(old)
+        self._unindex(old)
+        item = self._items[item_id] = _record(item_id, data, old["version"] + 1)
+        self._index(item)
+        return item
+
+    def _delete(self, item_id: int, expected_version: Optional[int] = None) -> Optional[dict]:
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+        if expected_version is not None and item["version"] != expected_version:
+            raise VersionConflictError(item)
+        del self._items[item_id]
+        self._unindex(item)
+        return item
+
+    def list(self) -> list[dict]:
+        return list(self._items.values())
+
+    def count(self) -> int:
+        return len(self._items)
+
+    def query(
+        self,
+        *,
+        is_available: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100,
+    ) -> tuple[List[dict], Optional[Cursor]]:
+        by_price = min_price is not None or max_price is not None
+        _check_cursor(cursor, by_price)
+        with self._lock:
+            if by_price:
+                keys = self._scan_price(is_available, min_price, max_price, cursor)
+            else:
+                keys = self._scan_ids(is_available, cursor[0] if cursor else 0)
+            page = [key for _, key in zip(range(limit + 1), keys)]
+            items = [self._items[key[-1]] for key in page[:limit]]
+        next_cursor = page[limit - 1] if len(page) > limit else None
+        return items, next_cursor
+
+    def _scan_ids(self, is_available: Optional[bool], after_id: int) -> Iterator[Cursor]:
+        availability = self._availability
+        target = None if is_available is None else bytes([_AVAILABLE if is_available else _UNAVAILABLE])
+        pos = after_id + 1
+        while True:
+            if target is None:
+                match = _PRESENT_RE.search(availability, pos)
+                pos = match.start() if match else -1
+            else:
+                pos = availability.find(target, pos)
+            if pos < 0:
+                return
+            yield (pos,)
+            pos += 1
+
+    def _scan_price(
+        self,
+        is_available: Optional[bool],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        cursor: Optional[Cursor],
+    ) -> Iterator[Cursor]:
+        start = (min_price, 0) if min_price is not None else (float("-inf"), 0)
+        if cursor is not None and cursor > start:
+            start = cursor
+        if is_available is None:
+            keys = heapq.merge(*(index.iter_after(start) for index in self._price_index.values()))
+        else:
+            keys = self._price_index[is_available].iter_after(start)
+        for key in keys:
+            if max_price is not None and key[0] > max_price:
+                return
+            yield key
+
+    def _index(self, item: dict) -> None:
+        self._price_index[bool(item["is_available"])].add((item["price"], item["id"]))
+        self._availability[item["id"]] = _AVAILABLE if item["is_available"] else _UNAVAILABLE
+
+    def _unindex(self, item: dict) -> None:
+        self._price_index[bool(item["is_available"])].remove((item["price"], item["id"]))
+        self._availability[item["id"]] = _ABSENT
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    is_available INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS items_price ON items (price, id);
+CREATE INDEX IF NOT EXISTS items_available ON items (is_available, id);
+CREATE INDEX IF NOT EXISTS items_available_price ON items (is_available, price, id);
+"""
+
+
+_COLUMNS = "id, name, description, price, is_available, version"
+
+
+class SQLiteItemStore(ItemStore):
+    """
+    SQLiteに保存するストア
+
+    WALモードで開くため、読み込みは書き込みを待たない。
+    AUTOINCREMENT によりIDは削除後も再利用されない。
+    接続はスレッドごとに作る。複数のプロセス（ワーカー）が同じファイルを開いても一貫性を保ち、
+    version の照合は条件付きの UPDATE / DELETE で行う。
+
+    Args:
+        path (str): データベースファイルのパス
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        # version 列が無い以前のデータベースは列を追加して引き継ぐ
+        if "version" not in {row[1] for row in conn.execute("PRAGMA table_info(items)")}:
+            conn.execute("ALTER TABLE items ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        logger.info(f"アイテムストアを開きました: {path}（{self.count()}件）")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自動コミット（複数文をまとめる場合は明示的にBEGINする）
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WALではNORMALでもコミット済みデータは壊れない（電源断時に直近のコミットを失いうる）
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[tuple]) -> Optional[dict]:
+        if row is None:
+            return None
+        item_id, name, description, price, is_available, version = row
+        return {
+            "name": name,
+            "description": description,
+            "price": price,
+            "is_available": bool(is_available),
+            "id": item_id,
+            "version": version,
+        }
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        1つのトランザクションで実行する（例外時はすべて取り消す）
+
+        BEGIN IMMEDIATE で開始時に書き込みロックを取るため、途中で他の書き込みと競合して失敗しない。
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, item_id: int) -> Optional[dict]:
+        return self._row(self._conn().execute(
+            f"SELECT {_COLUMNS} FROM items WHERE id = ?", (item_id,)
+        ).fetchone())
+
+    def create(self, data: dict) -> dict:
+        return self._create(self._conn(), data)
+
+    def update(self, item_id: int, data: dict, expected_version: Optional[int] = None) -> Optional[dict]:
+        return self._update(self._conn(), item_id, data, expected_version)
+
+    def delete(self, item_id: int, expected_version: Optional[int] = None) -> Optional[dict]:
+        return self._delete(self._conn(), item_id, expected_version)
+
+    def create_many(self, rows: List[dict]) -> List[dict]:
+        with self._transaction() as conn:
+            return [self._create(conn, data) for data in rows]
+
+    def update_many(
+        self, updates: List[tuple[int, dict, Optional[int]]]
+    ) -> List[Union[dict, None, VersionConflictError]]:
+        with self._transaction() as conn:
+            return [_conflict_as_result(self._update, conn, *update) for update in updates]
+
+    def delete_many(self, item_ids: List[int]) -> List[Optional[dict]]:
+        with self._transaction() as conn:
+            return [self._delete(conn, item_id) for item_id in item_ids]
+
+    def _create(self, conn: sqlite3.Connection, data: dict) -> dict:
+        return self._row(conn.execute(
+            "INSERT INTO items (name, description, price, is_available) VALUES (?, ?, ?, ?) "
+            f"RETURNING {_COLUMNS}",
+            _values(data),
+        ).fetchone())
+
+    def _update(
+        self, conn: sqlite3.Connection, item_id: int, data: dict, expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        sql = (
+            "UPDATE items SET name = ?, description = ?, price = ?, is_available = ?, version = version + 1 "
+            "WHERE id = ?"
+        )
+        params: tuple[Any, ...] = (*_values(data), item_id)
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params += (expected_version,)
+        item = self._row(conn.execute(f"{sql} RETURNING {_COLUMNS}", params).fetchone())
+        if item is None and expected_version is not None:
+            self._raise_if_exists(conn, item_id)
+        return item
+
+    def _delete(
+        self, conn: sqlite3.Connection, item_id: int, expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        sql = "DELETE FROM items WHERE id = ?"
+        params: tuple[Any, ...] = (item_id,)
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params += (expected_version,)
+        item = self._row(conn.execute(f"{sql} RETURNING {_COLUMNS}", params).fetchone())
+        if item is None and expected_version is not None:
+            self._raise_if_exists(conn, item_id)
+        return item
+
+    def _raise_if_exists(self, conn: sqlite3.Connection, item_id: int) -> None:
+        """条件付きの更新・削除が0件だった場合に、version の不一致か存在しないのかを判別する"""
+        current = self._row(conn.execute(f"SELECT {_COLUMNS} FROM items WHERE id = ?", (item_id,)).fetchone())
+        if current is not None:
+            raise VersionConflictError(current)
+
+    def list(self) -> list[dict]:
+        rows = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM items ORDER BY id"
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def query(
+        self,
+        *,
+        is_available: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100,
+    ) -> tuple[List[dict], Optional[Cursor]]:
+        by_price = min_price is not None or max_price is not None
+        _check_cursor(cursor, by_price)
+        where: list[str] = []
+        params: list[Any] = []
+        if is_available is not None:
+            where.append("is_available = ?")
+            params.append(int(is_available))
+        if min_price is not None:
+            where.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            where.append("price <= ?")
+            params.append(max_price)
+        if cursor is not None and by_price:
+            # price >= ? はインデックスの探索開始位置に使われる（行値の比較だけでは使われない）
+            where.append("price >= ? AND (price, id) > (?, ?)")
+            params.extend((cursor[0], *cursor))
+        elif cursor is not None:
+            where.append("id > ?")
+            params.extend(cursor)
+        sql = f"SELECT {_COLUMNS} FROM items"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += (" ORDER BY price, id" if by_price else " ORDER BY id") + " LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+        items = [self._row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = (last["price"], last["id"]) if by_price else (last["id"],)
+        return items, next_cursor
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+def _values(data: dict) -> tuple[Any, ...]:
+    return (data["name"], data.get("description"), data["price"], int(bool(data.get("is_available", True))))
+
+
+_store: Optional[ItemStore] = None
+_store_lock = threading.Lock()
+
+
+def get_item_store() -> ItemStore:
+    """
+    環境変数の設定に従ってプロセス共有のストアを返す
+
+    - ITEM_STORE_BACKEND: memory（デフォルト）または sqlite
+    - ITEM_STORE_PATH: sqlite のデータベースファイル（デフォルト items.db）
+    """
+    global _store
+    if _store is not None:
+        return _store
+    with _store_lock:
+        if _store is None:
+            backend = os.getenv("ITEM_STORE_BACKEND", "memory").lower()
+            if backend == "memory" and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+                logger.warning(
+                    "ITEM_STORE_BACKEND=memory ではワーカーごとに別のデータになります"
+                    "（複数ワーカーでは ITEM_STORE_BACKEND=sqlite を使用してください）"
+                )
+            if backend == "sqlite":
+                _store = SQLiteItemStore(os.getenv("ITEM_STORE_PATH", "items.db"))
+            elif backend == "memory":
+                _store = MemoryItemStore()
+            else:
+                raise ValueError(f"未サポートのITEM_STORE_BACKEND: {backend}")
+    return _store
+
+
+def close_item_store() -> None:
+    """ストアを閉じる（次回の get_item_store で開き直す）"""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,147 @@
+"""
+Prometheus形式のメトリクス
+
+/url-contents の所要時間がどの段階で使われているかを prometheus_client で計測し、
+/metrics でテキスト形式（text/plain; version=0.0.4）で公開する。
+
+URL取得の段階（url_fetch_stage_seconds の stage ラベル）:
+
+- ssrf_dns: SSRF事前チェックの名前解決（main._assert_url_safe）
+- connect: TCP/TLS接続（非同期取得で新規接続した場合のみ）
+- ttfb: リクエスト送信から応答ヘッダー受信まで（同期取得では新規接続の時間を含む）
+- download: 本文の受信（受信しながら行ったデコード・処理の時間は除く）
+- decode: 本文のデコード（文字コードの判定を含む）
+- browser_launch / browser_goto / browser_wait: ブラウザ起動・ページ移動・描画完了待ち
+
+処理（url_fetch_process_seconds）は process_method ラベルごとに計測する。
+
+複数ワーカーで起動する場合は prometheus_client のマルチプロセスモードを使う
+（PROMETHEUS_MULTIPROC_DIR。run_server が設定する）。/metrics は全ワーカーの値を合計し、
+ゲージは動作中のワーカーの分だけを合計する（livesum）。
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+# 秒単位のヒストグラムの既定の区切り（ブラウザ取得を含むため60秒まで）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# generate_latest が出力する形式
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+# URL取得のメトリクス（名前・ラベルはモジュールの説明を参照）
+FETCH_STAGE_SECONDS = Histogram(
+    "url_fetch_stage_seconds", "URL取得の段階ごとの所要時間（秒）", ("stage",), buckets=DEFAULT_BUCKETS
+)
+FETCH_PROCESS_SECONDS = Histogram(
+    "url_fetch_process_seconds", "取得したコンテンツの処理時間（秒）", ("process_method",), buckets=DEFAULT_BUCKETS
+)
+FETCH_BYTES = Counter(
+    "url_fetch_bytes_total", "取得した本文のバイト数（browserはページ本体の受信サイズ）", ("fetch_method",)
+)
+FETCH_CACHE = Counter(
+    "url_fetch_cache_total",
+    "キャッシュの参照結果（hit: 有効期限内 / stale: 期限切れで再検証 / miss: 無し / revalidated: 304で再利用）",
+    ("result",),
+)
+FETCH_IN_FLIGHT = Gauge(
+    "url_fetch_in_flight",
+    "実行中の取得数（キャッシュに無く実際に取得しているもの）",
+    ("fetch_method",),
+    multiprocess_mode="livesum",
+)
+FETCH_ERRORS = Counter("url_fetch_errors_total", "取得エラー数（例外の型ごと）", ("type",))
+REQUESTS_IN_FLIGHT = Gauge(
+    "url_contents_requests_in_flight",
+    "処理中の /url-contents（一括取得の各要素を含む）の件数",
+    multiprocess_mode="livesum",
+)
+
+
+def _cache_hit_ratio(metrics: Iterable[Metric]) -> GaugeMetricFamily:
+    """キャッシュ参照のうち取得せずに（または304で）済んだ割合（url_fetch_cache_total から求める）"""
+    counts: dict[str, float] = {}
+    for metric in metrics:
+        for sample in metric.samples:
+            if sample.name == "url_fetch_cache_total":
+                result = sample.labels["result"]
+                counts[result] = counts.get(result, 0.0) + sample.value
+    hits = counts.get("hit", 0.0) + counts.get("revalidated", 0.0)
+    lookups = sum(counts.get(r, 0.0) for r in ("hit", "stale", "miss"))
+    return GaugeMetricFamily(
+        "url_fetch_cache_hit_ratio",
+        "キャッシュのヒット率（304による再利用を含む）",
+        value=hits / lookups if lookups else 0.0,
+    )
+
+
+class _CacheHitRatioCollector:
+    """単一プロセスで、このプロセスのキャッシュ参照結果からヒット率を出力する"""
+
+    def collect(self) -> Iterator[Metric]:
+        yield _cache_hit_ratio(FETCH_CACHE.collect())
+
+
+class _MultiProcessCollector(MultiProcessCollector):
+    """全ワーカーの値に加え、合計したキャッシュ参照結果からヒット率を出力する"""
+
+    def collect(self) -> Iterator[Metric]:
+        metrics = list(super().collect())
+        yield from metrics
+        yield _cache_hit_ratio(metrics)
+
+
+REGISTRY.register(_CacheHitRatioCollector())
+
+
+def render() -> bytes:
+    """登録済みの全メトリクスをテキスト形式で返す（複数ワーカーの場合は全ワーカーの合計）"""
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    _MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_worker_stopped() -> None:
+    """停止するワーカーのゲージ（livesum）を合計から外す（複数ワーカーの場合のみ）"""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        mark_process_dead(os.getpid())
+
+
+@contextmanager
+def multiprocess_directory(enabled: bool) -> Iterator[None]:
+    """
+    複数ワーカーで起動する間、ワーカー間で共有する PROMETHEUS_MULTIPROC_DIR を用意する
+
+    ワーカーを起動する親プロセスで使う。指定済みのディレクトリは前回の起動の値ファイルを消してから使い、
+    未指定なら一時ディレクトリを作って環境変数に設定し（ワーカーに引き継がれる）、終了時に削除する。
+    """
+    if not enabled:
+        yield
+        return
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+        yield
+        return
+    directory = tempfile.mkdtemp(prefix="n8n-pysrv-metrics-")
+    os.environ[MULTIPROC_DIR_ENV] = directory
+    try:
+        yield
+    finally:
+        os.environ.pop(MULTIPROC_DIR_ENV, None)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,143 @@
+"""
+HTML変換用のプロセスプール
+
+readability（lxml）や html2text による変換はCPU処理で、GILを保持したまま動くため、
+スレッドで並行させても1コアしか使えない。このモジュールは変換処理を別プロセスで
+実行するプールを提供し、同時リクエストが多い場合にコア数に応じて処理量を伸ばす。
+
+- ワーカー数は環境変数で指定（0なら無効で、従来どおりスレッドで変換する）
+- 起動時に全ワーカーを立ち上げ、変換ライブラリの読み込みと変換器の準備を済ませる
+- 本文はデコード前のバイト列のまま渡す（文字列よりも受け渡しが軽く、デコードもワーカー側で行う）
+- プールが起動していない場合（CLI実行など）は呼び出し側でスレッド処理にフォールバックする
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _init_worker() -> None:
+    """ワーカープロセスの初期化（変換ライブラリを読み込み、変換器の原型を作っておく）"""
+    # Ctrl+Cは親プロセスが処理し、プールの停止でワーカーを終了させる
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from tools.utils.html_converters import MarkdownProfile, get_converter
+    import tools.utils.url_utils  # noqa: F401
+    import tools.utils.html_tree  # noqa: F401
+
+    for profile in MarkdownProfile:
+        get_converter(profile)
+    try:
+        import readability  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class ProcessPool:
+    """
+    変換処理用のプロセスプール
+
+    Args:
+        workers (int): ワーカープロセス数
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(workers, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        """ワーカーを全て起動し、初期化が終わるまで待つ"""
+        # イベントループやスレッドを持つ親プロセスをforkしないよう spawn で起動する
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        loop = asyncio.get_running_loop()
+        # ワーカー数分の仕事を同時に投入すると、空きワーカーが無いため全数が起動する
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers))
+        )
+        logger.info(f"変換用プロセスプールを起動しました（ワーカー {len(set(pids))}）")
+
+    async def stop(self) -> None:
+        """実行中の変換を待ってからワーカーを終了する"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """funcをワーカーで実行する（funcと引数はpickle可能であること）"""
+        if self._executor is None:
+            raise RuntimeError("プロセスプールが起動していません")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def run_sync(self, func: Callable[..., T], *args: Any) -> T:
+        """run の同期版（呼び出しスレッドをブロックして待つ）"""
+        if self._executor is None:
+            raise RuntimeError("プロセスプールが起動していません")
+        return self._executor.submit(func, *args).result()
+
+
+# プロセス全体で共有するプール（FastAPIのlifespanで起動・停止する）
+_pool: Optional[ProcessPool] = None
+
+
+def get_process_pool() -> Optional[ProcessPool]:
+    """起動中のプロセスプールを返す（未起動ならNone）"""
+    if _pool is not None and _pool.running:
+        return _pool
+    return None
+
+
+async def start_process_pool() -> Optional[ProcessPool]:
+    """
+    環境変数の設定に従ってプロセスプールを起動する
+
+    - PROCESS_POOL_WORKERS: ワーカー数（デフォルト0で無効、-1でCPUコア数）
+
+    起動に失敗した場合は警告を出してNoneを返す（スレッドで変換する）。
+    """
+    global _pool
+    workers = int(os.getenv("PROCESS_POOL_WORKERS", "0"))
+    if workers < 0:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        return None
+    if get_process_pool() is not None:
+        return _pool
+
+    pool = ProcessPool(workers)
+    try:
+        await pool.start()
+    except Exception as e:
+        logger.warning(f"プロセスプールを起動できませんでした（スレッドで変換します）: {e}")
+        await pool.stop()
+        return None
+    _pool = pool
+    return pool
+
+
+async def stop_process_pool() -> None:
+    """プロセスプールを停止する"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
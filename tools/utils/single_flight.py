@@ -0,0 +1,131 @@
+"""
+同一内容の同時取得の集約（single-flight）
+
+複数のワークフローが同じURLを同じ条件で同時に取得すると、それぞれが取得と変換を行う。
+このモジュールは同じキーの呼び出しが実行中であれば新たに実行せず、その結果を共有する。
+
+- 最初の呼び出し（リーダー）だけが実行し、後続は完了を待って同じ結果（または例外）を受け取る
+- リーダーがキャンセルされた場合や、retry_on に該当する例外（タイムアウトなど）で終わった場合、
+  結果は共有せず、待っていた後続の1つが新たなリーダーとして実行し直す
+- 後続がキャンセルされてもリーダーの実行には影響しない
+- 同期（スレッド）・非同期のどちらの呼び出し元も同じ実行中の呼び出しを共有する
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Abandoned(Exception):
+    """リーダーが共有できる結果を出さずに終了した（後続が実行し直す）"""
+
+
+class SingleFlight:
+    """
+    キーごとに実行中の呼び出しを1つにまとめる
+
+    Args:
+        retry_on (tuple[type[BaseException], ...]): 後続に共有せず、後続が実行し直す例外
+    """
+
+    def __init__(self, retry_on: tuple[type[BaseException], ...] = ()):
+        self.retry_on = retry_on
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        funcを実行するか、実行中の同じキーの結果を待つ
+
+        Returns:
+            tuple[T, bool]: 結果と、他の呼び出しの結果を共有したか
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = await func()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result, False
+            try:
+                return await _wait_async(future), True
+            except _Abandoned:
+                continue
+
+    def do_sync(self, key: Hashable, func: Callable[[], T]) -> tuple[T, bool]:
+        """do の同期版（呼び出しスレッドをブロックして待つ）"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = func()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result, False
+            try:
+                return future.result(), True
+            except _Abandoned:
+                continue
+
+    def in_flight(self) -> int:
+        """実行中の呼び出し数"""
+        with self._lock:
+            return len(self._calls)
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """実行中の呼び出しを返す（無ければ登録してリーダーになる）"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception) and not isinstance(error, self.retry_on):
+            future.set_exception(error)
+        else:
+            # キャンセル・タイムアウトなどはリーダー自身の事情なので後続に引き継がない
+            future.set_exception(_Abandoned())
+
+
+async def _wait_async(future: Future) -> Any:
+    """
+    別スレッドでも完了しうるFutureをイベントループ上で待つ
+
+    asyncio.wrap_future と異なり、待機側がキャンセルされても元のFutureはキャンセルしない。
+    """
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+
+    def copy_state(done: Future) -> None:
+        if waiter.done():
+            return
+        error = done.exception()
+        if error is not None:
+            waiter.set_exception(error)
+        else:
+            waiter.set_result(done.result())
+
+    def on_done(done: Future) -> None:
+        try:
+            loop.call_soon_threadsafe(copy_state, done)
+        except RuntimeError:
+            # 待機側のイベントループが既に終了している
+            pass
+
+    future.add_done_callback(on_done)
+    return await waiter
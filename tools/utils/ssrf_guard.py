@@ -0,0 +1,68 @@
+"""
+SSRF（サーバーサイドリクエストフォージェリ）対策の検査
+
+APIサーバーはリクエストで受け取った任意のURLを取得するため、
+内部ネットワークやループバックへの接続を拒否する必要がある。
+
+- is_host_blocked / is_ip_dangerous: ホスト名・IPアドレス単体の判定
+- enable_ssrf_guard: 現在のリクエスト（コンテキスト）で接続時の検査を有効にする。
+  有効な間は dns_resolver のネットワークバックエンドが新規接続のたびに接続先を検査するため、
+  リダイレクト先のホストも同じ基準で拒否される
+"""
+
+import contextvars
+import ipaddress
+from typing import Iterable
+
+# 接続を拒否するホスト名
+BLOCKED_HOSTNAMES = frozenset({"localhost", "localhost.localdomain", "local"})
+
+_guard_enabled: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "ssrf_guard_enabled", default=False
+)
+
+
+class UnsafeAddressError(ValueError):
+    """接続先が危険なホスト名・アドレスだった場合の例外"""
+
+
+def is_host_blocked(host: str) -> bool:
+    """ローカルホスト系・.local のホスト名か"""
+    host = host.strip("[]").rstrip(".").lower()
+    return host in BLOCKED_HOSTNAMES or host.endswith(".local")
+
+
+def is_ip_dangerous(ip_str: str) -> bool:
+    """プライベート・ループバック・リンクローカルなど、外部ではないアドレスか"""
+    ip = ipaddress.ip_address(ip_str)
+    return (
+        ip.is_private
+        or ip.is_loopback
+        or ip.is_link_local
+        or ip.is_multicast
+        or ip.is_reserved
+        or ip.is_unspecified
+    )
+
+
+def check_addresses(host: str, ips: Iterable[str]) -> None:
+    """
+    ホスト名と解決済みアドレスを検査する
+
+    Raises:
+        UnsafeAddressError: ホスト名が拒否対象、またはいずれかのアドレスが危険な場合
+    """
+    if is_host_blocked(host):
+        raise UnsafeAddressError(f"危険なホスト名は許可されていません: {host}")
+    for ip in ips:
+        if is_ip_dangerous(ip):
+            raise UnsafeAddressError(f"プライベート/危険なアドレスは許可されていません: {host}")
+
+
+def enable_ssrf_guard() -> None:
+    """現在のコンテキストで、接続時（リダイレクト先を含む）の検査を有効にする"""
+    _guard_enabled.set(True)
+
+
+def ssrf_guard_enabled() -> bool:
+    return _guard_enabled.get()
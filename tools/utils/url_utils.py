@@ -5,14 +5,62 @@ URL関連のユーティリティ関数
 取得方法と処理方法を分離した柔軟な設計：
 - 取得方法: REQUEST (通常のHTTPリクエスト) / BROWSER (ヘッドレスブラウザ)
 - 処理方法: RAW (そのまま返す) / MARKDOWN (html2textでマークダウン変換) / READABILITY (メインコンテンツ抽出)
+
+同期版 get_url_content に加えて、APIサーバー向けの非同期版 get_url_content_async を提供する
+（httpx と playwright.async_api を使用し、スレッドを占有しない）。
+処理済みの結果は content_cache でキャッシュする（キャッシュヒットの有無は *_result 版で取得できる）。
+キャッシュに無い場合の取得は host_scheduler でホストごとにペースを制御し、
+同じ条件の同時取得は single_flight で1回にまとめる。
+MARKDOWN / READABILITY の変換は、process_pool が起動していればワーカープロセスで行う。
+段階ごとの所要時間・取得バイト数・キャッシュ参照結果などは metrics に記録する。
 """
 
+import asyncio
+import codecs
 import logging
+import os
+import re
+import time
+import httpx
 import requests
 import html2text
+from dataclasses import dataclass, replace
 from enum import Enum
 from typing import Optional, Iterable
 
+from tools.utils.content_cache import (
+    CacheEntry,
+    ContentCache,
+    get_content_cache,
+    make_cache_key,
+)
+from tools.utils.http_client import (
+    async_request_extensions,
+    get_async_client,
+    get_session,
+)
+from tools.utils.host_scheduler import get_host_scheduler
+from tools.utils.metrics import (
+    FETCH_BYTES,
+    FETCH_CACHE,
+    FETCH_ERRORS,
+    FETCH_IN_FLIGHT,
+    FETCH_PROCESS_SECONDS,
+    FETCH_STAGE_SECONDS,
+)
+from tools.utils.html_converters import MarkdownProfile, get_converter
+from tools.utils.process_pool import get_process_pool
+from tools.utils.single_flight import SingleFlight
+from tools.utils.browser_pool import (
+    BROWSER_CONTEXT_OPTIONS,
+    BROWSER_LAUNCH_ARGS,
+    WEBDRIVER_INIT_SCRIPT,
+    BrowserPool,
+    ResourceBlocklist,
+    get_browser_pool,
+    import_async_playwright,
+)
+
 # ログ設定
 logger = logging.getLogger(__name__)
 
@@ -30,6 +78,54 @@ class ProcessMethod(Enum):
     READABILITY = "readability"  # readabilityでメインコンテンツを抽出
 
 
+@dataclass
+class UrlContentResult:
+    """get_url_content_result の戻り値"""
+    content: str  # 取得・処理されたテキストコンテンツ
+    cache_hit: bool = False  # キャッシュから返したか（304での再検証を含む）
+    revalidated: bool = False  # 条件付きリクエストで304を受けてキャッシュを再利用したか
+    truncated: bool = False  # max_charsで切り詰めたか（途中で取得を打ち切った場合を含む）
+    coalesced: bool = False  # 同時に実行中だった同じ条件の取得の結果を共有したか
+
+
+@dataclass
+class _FetchedPage:
+    """
+    request取得の結果
+
+    304 Not Modified の場合、取得しながら処理した場合（processedに結果が入る）、
+    またはデコード前の本文を保持した場合（bodyに入る）はtextがNone。
+    """
+    text: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    processed: Optional[str] = None
+    truncated: bool = False  # 処理結果がmax_charsに達したため取得を打ち切ったか
+    body: Optional[bytes] = None  # デコード前の本文（プロセスプールで変換する場合）
+    header_encoding: Optional[str] = None  # Content-Typeで明示された文字コード（bodyのデコード用）
+
+
+# 実行中の取得（キャッシュキーごと）。タイムアウトは呼び出しごとの条件のため共有しない
+_flights = SingleFlight(retry_on=(TimeoutError, requests.exceptions.Timeout, httpx.TimeoutException))
+
+# 本文を読み込む単位（バイト）
+_STREAM_CHUNK_SIZE = 64 * 1024
+# <meta charset> を探す先頭部分の大きさ（バイト）
+_META_SNIFF_BYTES = 1024
+# 文字コードの宣言が無い場合、推定に使う先頭部分の大きさ（バイト）
+_ENCODING_SNIFF_BYTES = 64 * 1024
+# BOMと対応する文字コード（UTF-32LEはUTF-16LEと先頭が重なるため先に判定する）
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+
 def get_url_content(
     url: str,
     fetch_method: FetchMethod = FetchMethod.REQUEST,
@@ -42,6 +138,13 @@ def get_url_content(
     max_bytes: int = 2_000_000,
     max_chars: int = 1_000_000,
     allowed_content_types: Optional[Iterable[str]] = None,
+    cache_ttl: Optional[int] = None,
+    cache_bypass: bool = False,
+    markdown_profile: Optional[MarkdownProfile] = None,
+    encoding: Optional[str] = None,
+    block_resource_types: Optional[Iterable[str]] = None,
+    block_domains: Optional[Iterable[str]] = None,
+    wait_for_selector: Optional[str] = None,
 ) -> str:
     """
     指定されたURLからコンテンツを取得し、指定された方法で処理する
@@ -51,12 +154,26 @@ def get_url_content(
         fetch_method (FetchMethod): 取得方法の指定
         process_method (ProcessMethod): 処理方法の指定
         timeout (int): タイムアウト時間（秒）
-        wait_for_js (int): ブラウザモード時のJS実行待機時間（ミリ秒）
+        wait_for_js (int): ブラウザモード時の描画完了を待つ最大時間（ミリ秒）。
+            DOMの変更が BROWSER_DOM_QUIET_MS の間止まった時点で打ち切る
         headers (dict, optional): カスタムHTTPヘッダー
         allow_redirects (bool): リダイレクトを許可するか（SSRF軽減のためデフォルトFalse）
         max_bytes (int): request取得時に読み込む最大バイト数（超過でエラー）
-        max_chars (int): 返却テキストの最大文字数（超過分は切り捨て）
+        max_chars (int): 返却テキストの最大文字数（超過分は切り捨て。
+            取得しながら処理できる RAW / MARKDOWN では、超えた時点で取得を打ち切る）
         allowed_content_types (Iterable[str], optional): 許可するContent-Typeのプレフィックス
+        cache_ttl (int, optional): 結果をキャッシュする秒数（Noneで既定値、0で保存しない）
+        cache_bypass (bool): キャッシュを参照せずに取得する（結果は保存する）
+        markdown_profile (MarkdownProfile, optional): MARKDOWN / READABILITY でのテキスト変換設定
+            （Noneなら処理方法ごとの既定: MARKDOWNはDEFAULT、READABILITYはTEXT）
+        encoding (str, optional): request取得時に本文の文字コードとして使う値
+            （指定するとBOM・ヘッダー・<meta charset>・推定より優先する）
+        block_resource_types (Iterable[str], optional): browser取得時に遮断するリソース種別
+            （例: image, font, media。Noneなら環境変数 BROWSER_BLOCK_RESOURCE_TYPES の設定）
+        block_domains (Iterable[str], optional): browser取得時に遮断するドメイン
+            （Noneなら環境変数 BROWSER_BLOCK_DOMAINS の設定、既定は広告・アクセス解析）
+        wait_for_selector (str, optional): browser取得時、このCSSセレクタの要素が現れるまで待つ
+            （wait_for_js の時間内。現れなければその時点の内容を返す）
 
     Returns:
         str: URLから取得・処理されたテキストコンテンツ
@@ -66,47 +183,493 @@ def get_url_content(
         ImportError: 必要なライブラリがインストールされていない場合
         Exception: その他のエラー
     """
+    return get_url_content_result(
+        url,
+        fetch_method,
+        process_method,
+        timeout,
+        wait_for_js,
+        headers,
+        allow_redirects=allow_redirects,
+        max_bytes=max_bytes,
+        max_chars=max_chars,
+        allowed_content_types=allowed_content_types,
+        cache_ttl=cache_ttl,
+        cache_bypass=cache_bypass,
+        markdown_profile=markdown_profile,
+        encoding=encoding,
+        block_resource_types=block_resource_types,
+        block_domains=block_domains,
+        wait_for_selector=wait_for_selector,
+    ).content
+
+
+def get_url_content_result(
+    url: str,
+    fetch_method: FetchMethod = FetchMethod.REQUEST,
+    process_method: ProcessMethod = ProcessMethod.RAW,
+    timeout: int = 30,
+    wait_for_js: int = 3000,
+    headers: Optional[dict] = None,
+    *,
+    allow_redirects: bool = False,
+    max_bytes: int = 2_000_000,
+    max_chars: int = 1_000_000,
+    allowed_content_types: Optional[Iterable[str]] = None,
+    cache_ttl: Optional[int] = None,
+    cache_bypass: bool = False,
+    markdown_profile: Optional[MarkdownProfile] = None,
+    encoding: Optional[str] = None,
+    block_resource_types: Optional[Iterable[str]] = None,
+    block_domains: Optional[Iterable[str]] = None,
+    wait_for_selector: Optional[str] = None,
+) -> UrlContentResult:
+    """
+    get_url_content と同じ処理を行い、キャッシュヒットの有無も含めて返す
+
+    引数は get_url_content と同じ。
+
+    Returns:
+        UrlContentResult: 処理済みコンテンツとキャッシュヒットの有無
+    """
     logger.info(
         f"URLコンテンツ取得開始: {url}, "
         f"fetch: {fetch_method.value}, process: {process_method.value}"
     )
 
-    try:
-        # Step 1: コンテンツ取得
-        if fetch_method == FetchMethod.REQUEST:
-            raw_content = _fetch_with_request(
-                url,
-                timeout,
-                headers,
-                allow_redirects=allow_redirects,
-                max_bytes=max_bytes,
-                allowed_content_types=allowed_content_types,
-            )
-        elif fetch_method == FetchMethod.BROWSER:
-            raw_content = _fetch_with_browser(url, timeout, wait_for_js, headers)
-        else:
-            raise ValueError(f"未サポートのFetchMethod: {fetch_method}")
-
-        # Step 2: コンテンツ処理
-        if process_method == ProcessMethod.RAW:
-            processed_content = _process_raw(raw_content)
-        elif process_method == ProcessMethod.MARKDOWN:
-            processed_content = _process_to_markdown(raw_content)
-        elif process_method == ProcessMethod.READABILITY:
-            processed_content = _process_with_readability(raw_content)
-        else:
-            raise ValueError(f"未サポートのProcessMethod: {process_method}")
+    # browser取得で遮断するサブリソース（未指定の項目は環境変数の設定）
+    blocklist = None
+    if fetch_method == FetchMethod.BROWSER:
+        blocklist = ResourceBlocklist.create(block_resource_types, block_domains)
 
-        # サイズ制御（文字数）
-        if processed_content and len(processed_content) > max_chars:
-            processed_content = processed_content[:max_chars]
+    cache = get_content_cache()
+    cache_key = _make_cache_key(
+        url, fetch_method, process_method, wait_for_js, headers,
+        allow_redirects, max_bytes, max_chars, allowed_content_types, markdown_profile,
+        encoding, blocklist, wait_for_selector,
+    )
+    cached, stale = _cache_lookup(cache, cache_key, cache_bypass)
+    if cached is not None:
+        logger.info(f"URLコンテンツ取得完了（キャッシュ）: {url}")
+        return cached
 
+    def fetch() -> UrlContentResult:
+        FETCH_IN_FLIGHT.labels(fetch_method=fetch_method.value).inc()
+        try:
+            # MARKDOWN / READABILITY はプロセスプールがあればワーカーで変換する
+            pool = get_process_pool() if process_method != ProcessMethod.RAW else None
+
+            # Step 1: コンテンツ取得（ホストごとのペース制御の枠内で行う）
+            with get_host_scheduler().slot_sync(url):
+                if fetch_method == FetchMethod.REQUEST:
+                    page = _fetch_with_request(
+                        url,
+                        timeout,
+                        headers,
+                        allow_redirects=allow_redirects,
+                        max_bytes=max_bytes,
+                        allowed_content_types=allowed_content_types,
+                        etag=stale.etag if stale else None,
+                        last_modified=stale.last_modified if stale else None,
+                        processor=None if pool else _stream_processor(process_method, max_chars, markdown_profile),
+                        encoding=encoding,
+                        keep_body=pool is not None,
+                    )
+                elif fetch_method == FetchMethod.BROWSER:
+                    page = _FetchedPage(text=_fetch_with_browser(url, timeout, wait_for_js, headers, blocklist, wait_for_selector))
+                else:
+                    raise ValueError(f"未サポートのFetchMethod: {fetch_method}")
+
+            # 304 Not Modified: 保存済みの処理結果を再利用
+            if page.not_modified:
+                if stale is None:
+                    raise ValueError("304 Not Modifiedを受けましたが再利用できるキャッシュがありません")
+                logger.info(f"URLコンテンツ取得完了（304再検証）: {url}")
+                return _cache_revalidated(cache, cache_key, stale, page, cache_ttl)
+
+            # Step 2: コンテンツ処理（取得しながら処理済みならその結果を使う）
+            if page.processed is not None:
+                processed_content = page.processed
+            elif pool is not None:
+                processed_content, page.truncated = _observe_pool_timings(page, process_method, pool.run_sync(
+                    _process_body, *_process_body_args(page, process_method, markdown_profile, max_chars, encoding)
+                ))
+            else:
+                with FETCH_PROCESS_SECONDS.labels(process_method=process_method.value).time():
+                    processed_content = _process_content(page.text, process_method, markdown_profile)
+
+        except Exception as e:
+            FETCH_ERRORS.labels(type=type(e).__name__).inc()
+            logger.error(f"URLコンテンツ取得エラー: {url}, error: {str(e)}")
+            raise
+        finally:
+            FETCH_IN_FLIGHT.labels(fetch_method=fetch_method.value).dec()
+
+        # サイズ制御（文字数）
+        processed_content, truncated = _truncate(processed_content, max_chars, page.truncated)
+        _cache_store(cache, cache_key, processed_content, page, cache_ttl, truncated)
         logger.info(f"URLコンテンツ取得完了: {url}")
-        return processed_content
+        return UrlContentResult(content=processed_content, truncated=truncated)
 
-    except Exception as e:
-        logger.error(f"URLコンテンツ取得エラー: {url}, error: {str(e)}")
-        raise
+    # 同じ条件の取得が実行中ならその結果を共有する
+    result, shared = _flights.do_sync(cache_key, fetch)
+    if shared:
+        logger.info(f"URLコンテンツ取得完了（同時取得の結果を共有）: {url}")
+        return replace(result, coalesced=True)
+    return result
+
+
+async def get_url_content_async(
+    url: str,
+    fetch_method: FetchMethod = FetchMethod.REQUEST,
+    process_method: ProcessMethod = ProcessMethod.RAW,
+    timeout: int = 30,
+    wait_for_js: int = 3000,
+    headers: Optional[dict] = None,
+    *,
+    allow_redirects: bool = False,
+    max_bytes: int = 2_000_000,
+    max_chars: int = 1_000_000,
+    allowed_content_types: Optional[Iterable[str]] = None,
+    cache_ttl: Optional[int] = None,
+    cache_bypass: bool = False,
+    markdown_profile: Optional[MarkdownProfile] = None,
+    encoding: Optional[str] = None,
+    block_resource_types: Optional[Iterable[str]] = None,
+    block_domains: Optional[Iterable[str]] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """
+    get_url_content の非同期版
+
+    取得はhttpx / playwright.async_apiでイベントループ上で行い、
+    CPU負荷の高い処理（markdown/readability変換）のみワーカースレッドで実行する。
+    引数と戻り値は get_url_content と同じ。
+    """
+    result = await get_url_content_result_async(
+        url,
+        fetch_method,
+        process_method,
+        timeout,
+        wait_for_js,
+        headers,
+        allow_redirects=allow_redirects,
+        max_bytes=max_bytes,
+        max_chars=max_chars,
+        allowed_content_types=allowed_content_types,
+        cache_ttl=cache_ttl,
+        cache_bypass=cache_bypass,
+        markdown_profile=markdown_profile,
+        encoding=encoding,
+        block_resource_types=block_resource_types,
+        block_domains=block_domains,
+        wait_for_selector=wait_for_selector,
+    )
+    return result.content
+
+
+async def get_url_content_result_async(
+    url: str,
+    fetch_method: FetchMethod = FetchMethod.REQUEST,
+    process_method: ProcessMethod = ProcessMethod.RAW,
+    timeout: int = 30,
+    wait_for_js: int = 3000,
+    headers: Optional[dict] = None,
+    *,
+    allow_redirects: bool = False,
+    max_bytes: int = 2_000_000,
+    max_chars: int = 1_000_000,
+    allowed_content_types: Optional[Iterable[str]] = None,
+    cache_ttl: Optional[int] = None,
+    cache_bypass: bool = False,
+    markdown_profile: Optional[MarkdownProfile] = None,
+    encoding: Optional[str] = None,
+    block_resource_types: Optional[Iterable[str]] = None,
+    block_domains: Optional[Iterable[str]] = None,
+    wait_for_selector: Optional[str] = None,
+) -> UrlContentResult:
+    """get_url_content_result の非同期版（引数と戻り値は同じ）"""
+    logger.info(
+        f"URLコンテンツ取得開始(async): {url}, "
+        f"fetch: {fetch_method.value}, process: {process_method.value}"
+    )
+
+    # browser取得で遮断するサブリソース（未指定の項目は環境変数の設定）
+    blocklist = None
+    if fetch_method == FetchMethod.BROWSER:
+        blocklist = ResourceBlocklist.create(block_resource_types, block_domains)
+
+    cache = get_content_cache()
+    cache_key = _make_cache_key(
+        url, fetch_method, process_method, wait_for_js, headers,
+        allow_redirects, max_bytes, max_chars, allowed_content_types, markdown_profile,
+        encoding, blocklist, wait_for_selector,
+    )
+    cached, stale = _cache_lookup(cache, cache_key, cache_bypass)
+    if cached is not None:
+        logger.info(f"URLコンテンツ取得完了（キャッシュ）(async): {url}")
+        return cached
+
+    async def fetch() -> UrlContentResult:
+        FETCH_IN_FLIGHT.labels(fetch_method=fetch_method.value).inc()
+        try:
+            pool = get_process_pool() if process_method != ProcessMethod.RAW else None
+
+            # Step 1: コンテンツ取得（ホストごとのペース制御の枠内で行う）
+            async with get_host_scheduler().slot(url):
+                if fetch_method == FetchMethod.REQUEST:
+                    page = await _fetch_with_request_async(
+                        url,
+                        timeout,
+                        headers,
+                        allow_redirects=allow_redirects,
+                        max_bytes=max_bytes,
+                        allowed_content_types=allowed_content_types,
+                        etag=stale.etag if stale else None,
+                        last_modified=stale.last_modified if stale else None,
+                        processor=None if pool else _stream_processor(process_method, max_chars, markdown_profile),
+                        encoding=encoding,
+                        keep_body=pool is not None,
+                    )
+                elif fetch_method == FetchMethod.BROWSER:
+                    page = _FetchedPage(
+                        text=await _fetch_with_browser_async(url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
+                    )
+                else:
+                    raise ValueError(f"未サポートのFetchMethod: {fetch_method}")
+
+            # 304 Not Modified: 保存済みの処理結果を再利用
+            if page.not_modified:
+                if stale is None:
+                    raise ValueError("304 Not Modifiedを受けましたが再利用できるキャッシュがありません")
+                logger.info(f"URLコンテンツ取得完了（304再検証）(async): {url}")
+                return _cache_revalidated(cache, cache_key, stale, page, cache_ttl)
+
+            # Step 2: コンテンツ処理（イベントループを塞がないようワーカーかスレッドで実行）
+            if page.processed is not None:
+                processed_content = page.processed
+            elif pool is not None:
+                processed_content, page.truncated = _observe_pool_timings(page, process_method, await pool.run(
+                    _process_body, *_process_body_args(page, process_method, markdown_profile, max_chars, encoding)
+                ))
+            elif process_method == ProcessMethod.RAW:
+                with FETCH_PROCESS_SECONDS.labels(process_method=process_method.value).time():
+                    processed_content = _process_content(page.text, process_method, markdown_profile)
+            else:
+                with FETCH_PROCESS_SECONDS.labels(process_method=process_method.value).time():
+                    processed_content = await asyncio.to_thread(
+                        _process_content, page.text, process_method, markdown_profile
+                    )
+
+        except Exception as e:
+            FETCH_ERRORS.labels(type=type(e).__name__).inc()
+            logger.error(f"URLコンテンツ取得エラー(async): {url}, error: {str(e)}")
+            raise
+        finally:
+            FETCH_IN_FLIGHT.labels(fetch_method=fetch_method.value).dec()
+
+        # サイズ制御（文字数）
+        processed_content, truncated = _truncate(processed_content, max_chars, page.truncated)
+        _cache_store(cache, cache_key, processed_content, page, cache_ttl, truncated)
+        logger.info(f"URLコンテンツ取得完了(async): {url}")
+        return UrlContentResult(content=processed_content, truncated=truncated)
+
+    # 同じ条件の取得が実行中ならその結果を共有する
+    result, shared = await _flights.do(cache_key, fetch)
+    if shared:
+        logger.info(f"URLコンテンツ取得完了（同時取得の結果を共有）(async): {url}")
+        return replace(result, coalesced=True)
+    return result
+
+
+def _make_cache_key(
+    url: str,
+    fetch_method: FetchMethod,
+    process_method: ProcessMethod,
+    wait_for_js: int,
+    headers: Optional[dict],
+    allow_redirects: bool,
+    max_bytes: int,
+    max_chars: int,
+    allowed_content_types: Optional[Iterable[str]],
+    markdown_profile: Optional[MarkdownProfile] = None,
+    encoding: Optional[str] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """取得結果に影響するオプションをまとめてキャッシュキーを作る（timeoutは含めない）"""
+    return make_cache_key(
+        url,
+        fetch_method.value,
+        process_method.value,
+        wait_for_js=wait_for_js if fetch_method == FetchMethod.BROWSER else None,
+        headers=sorted((headers or {}).items()),
+        allow_redirects=allow_redirects,
+        max_bytes=max_bytes,
+        max_chars=max_chars,
+        allowed_content_types=sorted(allowed_content_types) if allowed_content_types else None,
+        markdown_profile=markdown_profile.value if markdown_profile else None,
+        encoding=encoding.lower() if encoding else None,
+        blocked=(sorted(blocklist.resource_types), blocklist.domains) if blocklist else None,
+        wait_for_selector=wait_for_selector if fetch_method == FetchMethod.BROWSER else None,
+    )
+
+
+def _cache_lookup(
+    cache: Optional[ContentCache],
+    cache_key: str,
+    cache_bypass: bool,
+) -> tuple[Optional[UrlContentResult], Optional[CacheEntry]]:
+    """
+    キャッシュを参照する
+
+    Returns:
+        tuple: (有効期限内ならその結果, 期限切れだが再検証に使えるエントリ)
+    """
+    if cache is None or cache_bypass:
+        return None, None
+    entry = cache.get(cache_key, allow_stale=True)
+    if entry is None:
+        FETCH_CACHE.labels(result="miss").inc()
+        return None, None
+    if entry.is_fresh():
+        FETCH_CACHE.labels(result="hit").inc()
+        return UrlContentResult(content=entry.content, cache_hit=True, truncated=entry.truncated), None
+    FETCH_CACHE.labels(result="stale").inc()
+    return None, entry
+
+
+def _cache_store(
+    cache: Optional[ContentCache],
+    cache_key: str,
+    content: str,
+    page: _FetchedPage,
+    cache_ttl: Optional[int],
+    truncated: bool = False,
+) -> None:
+    """処理結果を検証用ヘッダーとともにキャッシュへ保存する"""
+    if cache is None:
+        return
+    cache.set(
+        cache_key,
+        content,
+        cache_ttl,
+        etag=page.etag,
+        last_modified=page.last_modified,
+        truncated=truncated,
+    )
+
+
+def _cache_revalidated(
+    cache: Optional[ContentCache],
+    cache_key: str,
+    stale: CacheEntry,
+    page: _FetchedPage,
+    cache_ttl: Optional[int],
+) -> UrlContentResult:
+    """304を受けたエントリの期限を延長し、保存済みの結果を返す"""
+    FETCH_CACHE.labels(result="revalidated").inc()
+    if cache is not None:
+        cache.revalidated(
+            cache_key,
+            stale,
+            cache_ttl,
+            etag=page.etag,
+            last_modified=page.last_modified,
+        )
+    return UrlContentResult(
+        content=stale.content, cache_hit=True, revalidated=True, truncated=stale.truncated
+    )
+
+
+def _process_content(
+    content: str,
+    process_method: ProcessMethod,
+    markdown_profile: Optional[MarkdownProfile] = None,
+) -> str:
+    """
+    取得したコンテンツを指定方法で処理する
+
+    Args:
+        content (str): 取得したコンテンツ
+        process_method (ProcessMethod): 処理方法の指定
+        markdown_profile (MarkdownProfile, optional): テキスト変換の設定（Noneなら処理方法ごとの既定）
+
+    Returns:
+        str: 処理後のテキスト
+    """
+    if process_method == ProcessMethod.RAW:
+        processed_content = _process_raw(content)
+    elif process_method == ProcessMethod.MARKDOWN:
+        processed_content = _process_to_markdown(content, markdown_profile or MarkdownProfile.DEFAULT)
+    elif process_method == ProcessMethod.READABILITY:
+        processed_content = _process_with_readability(content, markdown_profile)
+    else:
+        raise ValueError(f"未サポートのProcessMethod: {process_method}")
+    return processed_content
+
+
+def _truncate(content: str, max_chars: int, stopped_early: bool = False) -> tuple[str, bool]:
+    """
+    文字数上限で切り詰める
+
+    Returns:
+        tuple: (切り詰め後のテキスト, 切り詰めたか（取得を打ち切った場合も含む）)
+    """
+    if content and len(content) > max_chars:
+        return content[:max_chars], True
+    return content, stopped_early
+
+
+def _process_body(
+    body,
+    header_encoding: Optional[str],
+    encoding: Optional[str],
+    process_method: ProcessMethod,
+    markdown_profile: Optional[MarkdownProfile],
+    max_chars: int,
+) -> tuple[str, bool, float, float]:
+    """
+    プロセスプールのワーカーで行う処理（本文のデコードから文字数制限まで）
+
+    Args:
+        body (bytes | str): デコード前の本文（browser取得の場合は文字列）
+        header_encoding (str, optional): Content-Typeで明示された文字コード
+        encoding (str, optional): 呼び出し側が指定した文字コード
+
+    Returns:
+        tuple[str, bool, float, float]: 処理済みコンテンツ、max_charsで切り詰めたか、
+            デコードと処理の所要時間（秒。メトリクスは親プロセスで記録する）
+    """
+    started = time.perf_counter()
+    if isinstance(body, bytes):
+        body = _ChunkDecoder(header_encoding, encoding).decode(body, final=True)
+    decoded = time.perf_counter()
+    # 親プロセスへ返す量を減らすため、ここで切り詰める
+    content, truncated = _truncate(_process_content(body, process_method, markdown_profile), max_chars)
+    return content, truncated, decoded - started, time.perf_counter() - decoded
+
+
+def _observe_pool_timings(
+    page: _FetchedPage, process_method: ProcessMethod, result: tuple[str, bool, float, float]
+) -> tuple[str, bool]:
+    """ワーカーで計測したデコード・処理時間を記録し、処理結果を返す"""
+    content, truncated, decode_seconds, process_seconds = result
+    if page.body is not None:
+        FETCH_STAGE_SECONDS.labels(stage="decode").observe(decode_seconds)
+    FETCH_PROCESS_SECONDS.labels(process_method=process_method.value).observe(process_seconds)
+    return content, truncated
+
+
+def _process_body_args(
+    page: _FetchedPage,
+    process_method: ProcessMethod,
+    markdown_profile: Optional[MarkdownProfile],
+    max_chars: int,
+    encoding: Optional[str],
+) -> tuple:
+    body = page.body if page.body is not None else page.text
+    return body, page.header_encoding, encoding, process_method, markdown_profile, max_chars
 
 
 def _fetch_with_request(
@@ -117,79 +680,429 @@ def _fetch_with_request(
     allow_redirects: bool = False,
     max_bytes: int = 2_000_000,
     allowed_content_types: Optional[Iterable[str]] = None,
-) -> str:
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    processor: Optional["_StreamProcessor"] = None,
+    encoding: Optional[str] = None,
+    keep_body: bool = False,
+) -> _FetchedPage:
     """
-    通常のHTTPリクエストでコンテンツを取得
+    通常のHTTPリクエストでコンテンツを取得（共有Sessionで接続を再利用）
+
+    本文はチャンクごとにデコードし、processorを指定した場合はそのまま処理に渡す
+    （本文全体のバイト列・文字列を保持しない）。
 
     Args:
         url (str): 取得したいURL
         timeout (int): タイムアウト時間（秒）
         headers (dict, optional): カスタムHTTPヘッダー
+        etag (str, optional): 保存済みのETag（If-None-Matchとして送信）
+        last_modified (str, optional): 保存済みのLast-Modified（If-Modified-Sinceとして送信）
+        processor (_StreamProcessor, optional): 取得しながら処理する場合の処理器
+        encoding (str, optional): 本文の文字コード（Noneなら _ChunkDecoder で判定）
+        keep_body (bool): デコード・処理をせずに本文のバイト列をそのまま返す
 
     Returns:
-        str: HTMLコンテンツ
+        _FetchedPage: HTMLコンテンツ（processor指定時は処理結果）と検証用ヘッダー
+            （304ならnot_modified=True）
 
     Raises:
         requests.exceptions.RequestException: HTTP要求に失敗した場合
     """
-    default_headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    if headers:
-        default_headers.update(headers)
-
     logger.debug(f"HTTP REQUEST: {url}")
-    # 許可するContent-Type（プレフィックス）
-    allowed_types = list(allowed_content_types) if allowed_content_types else [
-        "text/",
-        "application/xhtml",
-        "application/xml",
-    ]
 
-    with requests.get(
+    requested = time.perf_counter()
+    with get_session().get(
         url,
         timeout=timeout,
-        headers=default_headers,
+        headers=_build_request_headers(headers, etag, last_modified),
         stream=True,
         allow_redirects=allow_redirects,
     ) as response:
+        # requests では接続と応答待ちを分けられないため、新規接続の時間も ttfb に含まれる
+        started = time.perf_counter()
+        FETCH_STAGE_SECONDS.labels(stage="ttfb").observe(started - requested)
+        if response.status_code == 304:
+            return _not_modified_page(response.headers)
         response.raise_for_status()
+        _check_content_type(response.headers, allowed_content_types)
+        if keep_body:
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise ValueError("取得サイズが上限を超えました")
+            _observe_body(started, len(body))
+            return _body_page(bytes(body), response.headers)
+
+        decoder = _ChunkDecoder(_charset_from_headers(response.headers), encoding)
+        sink = processor or _StreamProcessor(ProcessMethod.RAW)
+        # バイト単位で読み込み制限
+        total = 0
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            if not chunk:
+                continue
+            total += len(chunk)
+            if total > max_bytes:
+                raise ValueError("取得サイズが上限を超えました")
+            sink.feed(decoder.decode(chunk))
+            if sink.limit_reached():
+                # 必要な文字数に達したので残りは読まずに接続を閉じる
+                logger.debug(f"max_charsに達したため取得を打ち切り: {url} ({total} bytes)")
+                break
+        else:
+            sink.feed(decoder.decode(b"", final=True))
+        page = _finish_page(sink, processor is not None, response.headers)
+        _observe_body(started, total, decoder, processor)
+        return page
+
+
+async def _fetch_with_request_async(
+    url: str,
+    timeout: int,
+    headers: Optional[dict] = None,
+    *,
+    allow_redirects: bool = False,
+    max_bytes: int = 2_000_000,
+    allowed_content_types: Optional[Iterable[str]] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    processor: Optional["_StreamProcessor"] = None,
+    encoding: Optional[str] = None,
+    keep_body: bool = False,
+) -> _FetchedPage:
+    """
+    _fetch_with_request の非同期版（共有httpxクライアントでストリーミング取得）
 
-        ctype = response.headers.get("Content-Type", "").lower()
-        if not any(ctype.startswith(prefix) for prefix in allowed_types):
-            raise ValueError(f"不許可のContent-Typeです: {ctype}")
+    HTML変換はチャンクごとにスレッドで実行し、イベントループを塞がない。
 
+    引数と戻り値は _fetch_with_request と同じ。
+
+    Raises:
+        httpx.HTTPError: HTTP要求に失敗した場合
+    """
+    logger.debug(f"HTTP REQUEST(async): {url}")
+
+    async with get_async_client().stream(
+        "GET",
+        url,
+        headers=_build_request_headers(headers, etag, last_modified),
+        timeout=timeout,
+        follow_redirects=allow_redirects,
+        extensions=async_request_extensions(_RequestTimer().trace),
+    ) as response:
+        started = time.perf_counter()
+        if response.status_code == 304:
+            return _not_modified_page(response.headers)
+        response.raise_for_status()
+        _check_content_type(response.headers, allowed_content_types)
+        if keep_body:
+            body = bytearray()
+            async for chunk in response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise ValueError("取得サイズが上限を超えました")
+            _observe_body(started, len(body))
+            return _body_page(bytes(body), response.headers)
+
+        decoder = _ChunkDecoder(_charset_from_headers(response.headers), encoding)
+        sink = processor or _StreamProcessor(ProcessMethod.RAW)
         # バイト単位で読み込み制限
         total = 0
-        chunks: list[bytes] = []
-        for chunk in response.iter_content(chunk_size=8192):
+        async for chunk in response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
             if not chunk:
                 continue
             total += len(chunk)
             if total > max_bytes:
                 raise ValueError("取得サイズが上限を超えました")
-            chunks.append(chunk)
+            await _feed_async(sink, decoder.decode(chunk))
+            if sink.limit_reached():
+                # 必要な文字数に達したので残りは読まずに接続を閉じる
+                logger.debug(f"max_charsに達したため取得を打ち切り(async): {url} ({total} bytes)")
+                break
+        else:
+            await _feed_async(sink, decoder.decode(b"", final=True))
+        page = _finish_page(sink, processor is not None, response.headers)
+        _observe_body(started, total, decoder, processor)
+        return page
+
+
+class _RequestTimer:
+    """
+    1回の非同期リクエストの接続時間と応答ヘッダーまでの時間を計測する（httpcoreのtrace拡張）
+
+    プールの接続を再利用した場合は接続イベントが無いため、connect は記録しない。
+    """
+
+    def __init__(self) -> None:
+        self._connect_started: Optional[float] = None
+        self._connected: Optional[float] = None
+        self._sent: Optional[float] = None
+
+    async def trace(self, event_name: str, info: dict) -> None:
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            self._connect_started = now
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self._connected = now
+        elif event_name.endswith(".send_request_headers.started"):
+            if self._connect_started is not None and self._connected is not None:
+                FETCH_STAGE_SECONDS.labels(stage="connect").observe(self._connected - self._connect_started)
+            # リダイレクト時は次のリクエストで改めて計測する
+            self._connect_started = self._connected = None
+            self._sent = now
+        elif event_name.endswith(".receive_response_headers.complete") and self._sent is not None:
+            FETCH_STAGE_SECONDS.labels(stage="ttfb").observe(now - self._sent)
+            self._sent = None
+
+
+def _observe_body(
+    started: float,
+    size: int,
+    decoder: Optional["_ChunkDecoder"] = None,
+    processor: Optional["_StreamProcessor"] = None,
+) -> None:
+    """
+    本文の受信を記録する
+
+    受信しながら行ったデコード・処理の時間は download から除き、それぞれの段階として記録する。
+    """
+    elapsed = time.perf_counter() - started
+    decode_seconds = decoder.seconds if decoder is not None else 0.0
+    process_seconds = processor.seconds if processor is not None else 0.0
+    FETCH_STAGE_SECONDS.labels(stage="download").observe(max(elapsed - decode_seconds - process_seconds, 0.0))
+    if decoder is not None:
+        FETCH_STAGE_SECONDS.labels(stage="decode").observe(decode_seconds)
+    if processor is not None:
+        FETCH_PROCESS_SECONDS.labels(process_method=processor.process_method.value).observe(process_seconds)
+    FETCH_BYTES.labels(fetch_method=FetchMethod.REQUEST.value).inc(size)
+
+
+async def _feed_async(sink: "_StreamProcessor", text: str) -> None:
+    """非同期取得中の処理器への入力（HTML変換はスレッドで行う）"""
+    if not text:
+        return
+    if sink.process_method == ProcessMethod.RAW:
+        sink.feed(text)
+    else:
+        await asyncio.to_thread(sink.feed, text)
+
+
+def _finish_page(sink: "_StreamProcessor", processed: bool, response_headers) -> _FetchedPage:
+    """読み込み終えた（または打ち切った）処理器から取得結果を作る"""
+    truncated = sink.limit_reached()
+    output = sink.close()
+    return _FetchedPage(
+        text=None if processed else output,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+        processed=output if processed else None,
+        truncated=truncated,
+    )
+
+
+def _body_page(body: bytes, response_headers) -> _FetchedPage:
+    """デコード前の本文を保持した取得結果を作る"""
+    return _FetchedPage(
+        text=None,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+        body=body,
+        header_encoding=_charset_from_headers(response_headers),
+    )
+
 
-        raw_bytes = b"".join(chunks)
-        # 文字エンコーディング推定
-        encoding = response.encoding or response.apparent_encoding or "utf-8"
-        return raw_bytes.decode(encoding, errors="replace")
+def _build_request_headers(
+    headers: Optional[dict] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> dict:
+    """
+    デフォルトのUser-Agentにカスタムヘッダーを重ねたヘッダーを返す
+
+    etag / last_modified を指定すると条件付きリクエストのヘッダーを付ける
+    （呼び出し元が同名のヘッダーを指定している場合はそちらを優先）。
+    """
+    default_headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+    if etag:
+        default_headers['If-None-Match'] = etag
+    if last_modified:
+        default_headers['If-Modified-Since'] = last_modified
+    if headers:
+        default_headers.update(headers)
+    return default_headers
+
+
+def _not_modified_page(response_headers) -> _FetchedPage:
+    """304 Not Modified 応答から取得結果を作る"""
+    return _FetchedPage(
+        text=None,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+        not_modified=True,
+    )
+
+
+def _check_content_type(response_headers, allowed_content_types: Optional[Iterable[str]] = None) -> None:
+    """Content-Typeが許可されたプレフィックスで始まるか検査する"""
+    # 許可するContent-Type（プレフィックス）
+    allowed_types = list(allowed_content_types) if allowed_content_types else [
+        "text/",
+        "application/xhtml",
+        "application/xml",
+    ]
+    ctype = response_headers.get("Content-Type", "").lower()
+    if not any(ctype.startswith(prefix) for prefix in allowed_types):
+        raise ValueError(f"不許可のContent-Typeです: {ctype}")
+
+
+def _guess_encoding(raw_bytes: bytes) -> str:
+    """
+    本文の先頭部分から文字エンコーディングを推定する（判定できなければutf-8）
+
+    UTF-8として正しいバイト列なら統計的な推定（charset_normalizer）は行わない。
+    """
+    try:
+        raw_bytes.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # 先頭部分の末尾で文字が途切れているだけならUTF-8とみなす
+        if e.reason == "unexpected end of data" and e.start >= len(raw_bytes) - 3:
+            return "utf-8"
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return "utf-8"
+    best = from_bytes(raw_bytes).best()
+    return best.encoding if best else "utf-8"
+
+
+def _charset_from_headers(response_headers) -> Optional[str]:
+    """
+    Content-Typeで明示された文字コードを返す
+
+    requests.utils.get_encoding_from_headers は charset の無い text/* に ISO-8859-1 を返すが、
+    その場合は <meta charset> や推定を使いたいためNoneとする。
+    """
+    if "charset" not in response_headers.get("Content-Type", "").lower():
+        return None
+    return requests.utils.get_encoding_from_headers(response_headers)
+
+
+def _bom_encoding(head: bytes) -> Optional[str]:
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def _meta_charset(head: bytes) -> Optional[str]:
+    """<meta charset> / <meta http-equiv="Content-Type"> から文字コードを取り出す"""
+    match = _META_CHARSET_RE.search(head)
+    if not match:
+        return None
+    encoding = match.group(1).decode("ascii")
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        return None
+    return encoding
+
+
+class _ChunkDecoder:
+    """
+    受信したバイト列のチャンクを順に文字列へデコードする
+
+    文字コードは次の順で決め、判定に必要な先頭部分が揃うまでだけバッファする。
+
+    1. 呼び出し側の指定
+    2. BOM
+    3. Content-Type の charset
+    4. 先頭 _META_SNIFF_BYTES バイト内の <meta charset>
+    5. 先頭 _ENCODING_SNIFF_BYTES バイトからの推定（_guess_encoding）
+
+    Args:
+        header_encoding (str, optional): Content-Typeで明示された文字コード
+        encoding (str, optional): 呼び出し側が指定した文字コード
+    """
+
+    def __init__(self, header_encoding: Optional[str], encoding: Optional[str] = None):
+        self._header_encoding = header_encoding
+        self._decoder = _incremental_decoder(encoding) if encoding else None
+        self._head = b""
+        self.encoding = encoding
+        # デコードに使った時間の合計（秒）
+        self.seconds = 0.0
+
+    def decode(self, chunk: bytes, final: bool = False) -> str:
+        started = time.perf_counter()
+        try:
+            return self._decode(chunk, final)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def _decode(self, chunk: bytes, final: bool) -> str:
+        if self._decoder is not None:
+            return self._decoder.decode(chunk, final)
+        head = self._head + chunk
+        encoding = self._detect(head, final)
+        if encoding is None:
+            self._head = head
+            return ""
+        self._head = b""
+        self.encoding = encoding
+        self._decoder = _incremental_decoder(encoding)
+        return self._decoder.decode(head, final)
+
+    def _detect(self, head: bytes, final: bool) -> Optional[str]:
+        """文字コードを決める（判定にさらにバイト列が必要ならNone）"""
+        size = len(head)
+        if size < 4 and not final:
+            return None
+        encoding = _bom_encoding(head) or self._header_encoding
+        if encoding:
+            return encoding
+        if size < _META_SNIFF_BYTES and not final:
+            return None
+        encoding = _meta_charset(head[:_META_SNIFF_BYTES])
+        if encoding:
+            return encoding
+        if size < _ENCODING_SNIFF_BYTES and not final:
+            return None
+        return _guess_encoding(head[:_ENCODING_SNIFF_BYTES])
+
+
+def _incremental_decoder(encoding: str) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        logger.warning(f"不明な文字コードのためutf-8でデコードします: {encoding}")
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
 
 
 def _fetch_with_browser(
     url: str,
     timeout: int,
     wait_for_js: int,
-    headers: Optional[dict] = None
+    headers: Optional[dict] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
 ) -> str:
     """
     ヘッドレスブラウザでJavaScript実行後のコンテンツを取得
 
+    ブラウザプールが起動していれば常駐ブラウザのコンテキストを利用し、
+    未起動（CLI実行など）の場合はその場でブラウザを起動する。
+
     Args:
         url (str): 取得したいURL
         timeout (int): タイムアウト時間（秒）
-        wait_for_js (int): JavaScript実行待機時間（ミリ秒）
+        wait_for_js (int): 描画完了を待つ最大時間（ミリ秒）
         headers (dict, optional): カスタムHTTPヘッダー
+        blocklist (ResourceBlocklist, optional): 遮断するサブリソース
+        wait_for_selector (str, optional): 現れるまで待つ要素のCSSセレクタ
 
     Returns:
         str: レンダリング後のHTMLコンテンツ
@@ -198,85 +1111,333 @@ def _fetch_with_browser(
         ImportError: playwrightがインストールされていない場合
         Exception: ブラウザ操作エラー
     """
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        raise ImportError(
-            "playwrightライブラリがインストールされていません。"
-            "インストールするには: pip install playwright && playwright install"
-        )
-
     logger.debug(f"BROWSER REQUEST: {url}")
 
-    with sync_playwright() as p:
-        # ブラウザ起動（ヘッドレスモード、AutomationControlled無効化）
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"],
+    pool = get_browser_pool()
+    if pool is not None:
+        return pool.run_sync(
+            _fetch_with_browser_pooled(pool, url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
         )
+    return asyncio.run(_fetch_with_browser_once(url, timeout, wait_for_js, headers, blocklist, wait_for_selector))
 
-        # コンテキスト（実ブラウザに近い環境）
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            locale="ja-JP",
-            timezone_id="Asia/Tokyo",
-            viewport={"width": 1280, "height": 800},
-        )
 
-        try:
-            page = context.new_page()
+async def _fetch_with_browser_async(
+    url: str,
+    timeout: int,
+    wait_for_js: int,
+    headers: Optional[dict] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """_fetch_with_browser の非同期版（イベントループ上で直接ブラウザを操作）"""
+    logger.debug(f"BROWSER REQUEST(async): {url}")
 
-            # webdriverフラグを隠す
-            page.add_init_script(
-                "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-            )
+    pool = get_browser_pool()
+    if pool is None:
+        return await _fetch_with_browser_once(url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
 
-            # カスタムヘッダー設定
-            if headers:
-                page.set_extra_http_headers(headers)
+    coro = _fetch_with_browser_pooled(pool, url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
+    if pool.loop is asyncio.get_running_loop():
+        return await coro
+    # プールと別のイベントループから呼ばれた場合はプール側のループで実行する
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, pool.loop))
 
-            # ページに移動（まずはDOM読み込みまで）
-            page.goto(url, timeout=timeout * 1000, wait_until="domcontentloaded")
 
-            # 同意/コンセント系があれば可能ならクリック（失敗しても無視）
-            try:
-                candidates = [
-                    "text=同意して続行",
-                    "text=同意して進む",
-                    "text=同意する",
-                    "button:has-text('同意')",
-                    "#consent-accept-button",
-                ]
-                for sel in candidates:
-                    locator = page.locator(sel)
-                    if locator.first.count() > 0:
-                        try:
-                            locator.first.click(timeout=1000)
-                            break
-                        except Exception:
-                            continue
-            except Exception:
-                pass
-
-            # ネットワークのアイドル化を待機してから、さらに待機
+async def _fetch_with_browser_pooled(
+    pool: BrowserPool,
+    url: str,
+    timeout: int,
+    wait_for_js: int,
+    headers: Optional[dict] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """常駐ブラウザプールのコンテキストでページを取得"""
+    async with pool.context() as context:
+        return await _render_page(context, url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
+
+
+async def _fetch_with_browser_once(
+    url: str,
+    timeout: int,
+    wait_for_js: int,
+    headers: Optional[dict] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """ブラウザをその場で起動してページを取得（プール未起動時）"""
+    async_playwright = import_async_playwright()
+
+    async with async_playwright() as p:
+        with FETCH_STAGE_SECONDS.labels(stage="browser_launch").time():
+            browser = await p.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+        try:
+            context = await browser.new_context(**BROWSER_CONTEXT_OPTIONS)
             try:
-                page.wait_for_load_state("networkidle", timeout=timeout * 1000)
-            except Exception:
-                # 一部サイトではnetworkidleに到達しないため無視
-                pass
-            page.wait_for_timeout(wait_for_js)
+                await context.add_init_script(WEBDRIVER_INIT_SCRIPT)
+                return await _render_page(context, url, timeout, wait_for_js, headers, blocklist, wait_for_selector)
+            finally:
+                await context.close()
+        finally:
+            await browser.close()
+
+
+async def _count_document_bytes(response) -> None:
+    """
+    ページ本体の受信バイト数を取得バイト数のメトリクスに加える
+
+    ブラウザが受信時に数えたサイズを使い、レンダリング後のHTMLを改めてエンコードしない。
+    サイズが得られない場合（goto が応答を返さないナビゲーションなど）は数えない。
+    """
+    if response is None:
+        return
+    try:
+        sizes = await response.request.sizes()
+    except Exception as e:
+        logger.debug(f"ページ本体のサイズを取得できませんでした: {e}")
+        return
+    FETCH_BYTES.labels(fetch_method=FetchMethod.BROWSER.value).inc(max(sizes.get("responseBodySize", 0), 0))
+
+
+async def _render_page(
+    context,
+    url: str,
+    timeout: int,
+    wait_for_js: int,
+    headers: Optional[dict] = None,
+    blocklist: Optional[ResourceBlocklist] = None,
+    wait_for_selector: Optional[str] = None,
+) -> str:
+    """
+    ブラウザコンテキスト上でページを開き、JS実行後のHTMLを返す
+
+    Args:
+        context: PlaywrightのBrowserContext
+        url (str): 取得したいURL
+        timeout (int): タイムアウト時間（秒）
+        wait_for_js (int): 描画完了を待つ最大時間（ミリ秒）
+        headers (dict, optional): カスタムHTTPヘッダー
+        blocklist (ResourceBlocklist, optional): 遮断するサブリソース
+        wait_for_selector (str, optional): 現れるまで待つ要素のCSSセレクタ
+
+    Returns:
+        str: レンダリング後のHTMLコンテンツ
+    """
+    page = await context.new_page()
+    try:
+        # カスタムヘッダー設定
+        if headers:
+            await page.set_extra_http_headers(headers)
+
+        # 画像・フォント・計測タグなど本文に不要なリクエストを遮断
+        if blocklist:
+            await blocklist.install(page)
+
+        # ページに移動（まずはDOM読み込みまで）
+        with FETCH_STAGE_SECONDS.labels(stage="browser_goto").time():
+            response = await page.goto(url, timeout=timeout * 1000, wait_until="domcontentloaded")
+        loaded = time.perf_counter()
+
+        # 同意/コンセント系があれば可能ならクリック（失敗しても無視）
+        try:
+            candidates = [
+                "text=同意して続行",
+                "text=同意して進む",
+                "text=同意する",
+                "button:has-text('同意')",
+                "#consent-accept-button",
+            ]
+            for sel in candidates:
+                locator = page.locator(sel)
+                if await locator.first.count() > 0:
+                    try:
+                        await locator.first.click(timeout=1000)
+                        break
+                    except Exception:
+                        continue
+        except Exception:
+            pass
+
+        # ネットワークのアイドル化を待機してから、描画が落ち着くまで待機
+        try:
+            await page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+        except Exception:
+            # 一部サイトではnetworkidleに到達しないため無視
+            pass
+        await _wait_until_ready(page, wait_for_js, wait_for_selector)
+        FETCH_STAGE_SECONDS.labels(stage="browser_wait").observe(time.perf_counter() - loaded)
+
+        # ページの完全なHTMLコンテンツを取得
+        html = await page.content()
+        await _count_document_bytes(response)
+        return html
+
+    finally:
+        await page.close()
+
+
+# DOMの変更（要素・テキストの追加や削除）が quiet_ms ミリ秒止まるか、max_ms ミリ秒経つまで待つ
+# 属性の変更はアニメーションなどで止まらないことが多いため対象外
+_DOM_QUIET_SCRIPT = """
+([quietMs, maxMs]) => new Promise((resolve) => {
+    let quietTimer;
+    const finish = (reason) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(capTimer);
+        resolve(reason);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish("quiet"), quietMs);
+    });
+    observer.observe(document, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(() => finish("quiet"), quietMs);
+    const capTimer = setTimeout(() => finish("timeout"), maxMs);
+})
+"""
+
+
+async def _wait_until_ready(page, max_wait_ms: int, selector: Optional[str] = None) -> None:
+    """
+    ページの描画が落ち着くまで待つ（最大 max_wait_ms ミリ秒）
+
+    固定時間待つ代わりに、selector 指定時はその要素が現れるまで待ち、
+    その後DOMの変更が BROWSER_DOM_QUIET_MS（デフォルト500）ミリ秒止まった時点で戻る。
+    待機に失敗しても（遷移中など）例外にせず、その時点の内容を使う。
+    """
+    if max_wait_ms <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait_ms / 1000
+    if selector:
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=max_wait_ms)
+        except Exception as e:
+            logger.debug(f"セレクタ待機を打ち切り: {selector}, error: {e}")
+    remaining_ms = int((deadline - loop.time()) * 1000)
+    if remaining_ms <= 0:
+        return
+    quiet_ms = min(int(os.getenv("BROWSER_DOM_QUIET_MS", "500")), remaining_ms)
+    try:
+        await page.evaluate(_DOM_QUIET_SCRIPT, [quiet_ms, remaining_ms])
+    except Exception as e:
+        logger.debug(f"DOMの安定待機を打ち切り: {e}")
 
-            # ページの完全なHTMLコンテンツを取得
-            html_content = page.content()
-            return html_content
 
+class _StreamProcessor:
+    """
+    取得中のテキストを順に受け取り、処理結果を組み立てる（RAW / MARKDOWN）
+
+    MARKDOWNはhtml2textのパーサーへ逐次入力するため、保持するのは未解析の端数と変換済みの出力のみ。
+
+    Args:
+        process_method (ProcessMethod): 処理方法（READABILITYは文書全体が必要なため非対応）
+        max_chars (int, optional): 出力がこの文字数を超えたら limit_reached() がTrueになる
+        markdown_profile (MarkdownProfile, optional): MARKDOWNの変換設定（NoneならDEFAULT）
+    """
+
+    def __init__(
+        self,
+        process_method: ProcessMethod,
+        max_chars: Optional[int] = None,
+        markdown_profile: Optional[MarkdownProfile] = None,
+    ):
+        self.process_method = process_method
+        self.max_chars = max_chars
+        # 処理（feed / close）に使った時間の合計（秒）
+        self.seconds = 0.0
+        self._parts: list[str] = []
+        # 出力済みの文字数（MARKDOWNは変換器の出力リストを数え終えた位置も保持）
+        self._chars = 0
+        self._counted = 0
+        # MARKDOWN: 次のタグ開始までの未入力テキスト
+        self._pending: list[str] = []
+        self._converter: Optional[html2text.HTML2Text] = None
+        # 変換に失敗した後の入力（closeでタグを除去して出力に加える）
+        self._fallback: Optional[list[str]] = None
+        if process_method == ProcessMethod.MARKDOWN:
+            self._converter = get_converter(markdown_profile or MarkdownProfile.DEFAULT)
+            self._converter.start = True
+
+    def feed(self, text: str) -> None:
+        started = time.perf_counter()
+        try:
+            self._feed(text)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def _feed(self, text: str) -> None:
+        if not text:
+            return
+        if self._converter is None:
+            self._parts.append(text)
+            self._chars += len(text)
+        elif self._fallback is not None:
+            self._fallback.append(text)
+        else:
+            # テキストがチャンク境界で分割されると html2text が強調の後などに余分な空白を入れるため、
+            # 入力は常にタグの開始（"<"）の直前で区切る
+            cut = text.rfind("<")
+            if cut < 0:
+                self._pending.append(text)
+                return
+            self._pending.append(text[:cut])
+            data = "".join(self._pending)
+            self._pending = [text[cut:]]
+            try:
+                self._converter.feed(data)
+            except Exception as e:
+                logger.error(f"マークダウン変換エラー: {str(e)}")
+                self._fallback = [data, *self._pending]
+                self._pending = []
+
+    def limit_reached(self) -> bool:
+        """ここまでの出力がmax_charsを超えたか"""
+        if self.max_chars is None:
+            return False
+        if self._converter is not None:
+            produced = self._converter.outtextlist
+            self._chars += sum(len(part) for part in produced[self._counted:])
+            self._counted = len(produced)
+        return self._chars > self.max_chars
+
+    def close(self) -> str:
+        started = time.perf_counter()
+        try:
+            return self._close()
         finally:
-            context.close()
-            browser.close()
+            self.seconds += time.perf_counter() - started
+
+    def _close(self) -> str:
+        if self._converter is None:
+            return "".join(self._parts)
+        markdown = ""
+        if self._fallback is None:
+            try:
+                self._converter.feed("".join(self._pending))
+                self._converter.feed("")
+                markdown = self._converter.optwrap(self._converter.finish())
+            except Exception as e:
+                logger.error(f"マークダウン変換エラー: {str(e)}")
+                self._fallback = []
+        if self._fallback is not None:
+            markdown = "".join(self._converter.outtextlist)
+            # フォールバック: 簡易的にHTMLタグを除去
+            markdown += re.sub(r'<[^<]+?>', '', "".join(self._fallback))
+        logger.debug("HTMLコンテンツを取得しながらマークダウンに変換完了")
+        return markdown.strip()
+
+
+def _stream_processor(
+    process_method: ProcessMethod,
+    max_chars: Optional[int] = None,
+    markdown_profile: Optional[MarkdownProfile] = None,
+) -> Optional[_StreamProcessor]:
+    """取得しながら処理できる方法なら処理器を返す（READABILITYはNone）"""
+    if process_method in (ProcessMethod.RAW, ProcessMethod.MARKDOWN):
+        return _StreamProcessor(process_method, max_chars, markdown_profile)
+    return None
 
 
 def _process_raw(content: str) -> str:
@@ -292,12 +1453,13 @@ def _process_raw(content: str) -> str:
     return content
 
 
-def _process_to_markdown(content: str) -> str:
+def _process_to_markdown(content: str, profile: MarkdownProfile = MarkdownProfile.DEFAULT) -> str:
     """
     HTMLコンテンツをマークダウン形式に変換
 
     Args:
         content (str): HTMLコンテンツ
+        profile (MarkdownProfile): html2textの設定プロファイル
 
     Returns:
         str: マークダウン形式のテキスト
@@ -306,13 +1468,8 @@ def _process_to_markdown(content: str) -> str:
         ImportError: html2textがインストールされていない場合
     """
     try:
-        # html2textの設定
-        h = html2text.HTML2Text()
-        h.ignore_links = False  # リンクを保持
-        h.ignore_images = False  # 画像を保持
-        h.body_width = 0  # 行幅制限なし
-        h.unicode_snob = True  # Unicode文字を適切に処理
-        h.escape_snob = True  # エスケープ文字を適切に処理
+        # 設定済みのhtml2text変換器
+        h = get_converter(profile)
 
         # HTMLをマークダウンに変換
         markdown_content = h.handle(content)
@@ -323,17 +1480,22 @@ def _process_to_markdown(content: str) -> str:
     except Exception as e:
         logger.error(f"マークダウン変換エラー: {str(e)}")
         # フォールバック: 簡易的にHTMLタグを除去
-        import re
         clean_text = re.sub(r'<[^<]+?>', '', content)
         return clean_text.strip()
 
 
-def _process_with_readability(content: str) -> str:
+def _process_with_readability(content: str, profile: Optional[MarkdownProfile] = None) -> str:
     """
     readabilityライブラリでHTMLコンテンツからメインコンテンツを抽出
 
+    HTMLは一度だけlxmlで解析し、readabilityの抽出とフォールバックのマークダウン変換で
+    同じツリーを使う（readabilityは非表示要素をツリーから取り除くため、
+    フォールバックの結果にも非表示要素は含まれない）。
+
     Args:
         content (str): HTMLコンテンツ
+        profile (MarkdownProfile, optional): 抽出結果とフォールバックの変換設定
+            （Noneなら抽出結果はTEXT、フォールバックのマークダウン変換はDEFAULT）
 
     Returns:
         str: 抽出されたメインコンテンツ（プレーンテキスト）
@@ -341,8 +1503,10 @@ def _process_with_readability(content: str) -> str:
     Raises:
         ImportError: readabilityライブラリがインストールされていない場合
     """
+    fallback_profile = profile or MarkdownProfile.DEFAULT
     try:
         from readability import Document
+        from tools.utils.html_tree import parse_html, render_markdown
     except ImportError:
         logger.warning(
             "readabilityライブラリがインストールされていません。"
@@ -350,23 +1514,26 @@ def _process_with_readability(content: str) -> str:
         )
         # フォールバック: マークダウン変換を使用
         logger.info("フォールバック: マークダウン変換を使用します")
-        return _process_to_markdown(content)
+        return _process_to_markdown(content, fallback_profile)
+
+    try:
+        tree = parse_html(content)
+    except Exception as e:
+        logger.error(f"HTML解析エラー: {str(e)}")
+        # フォールバック: マークダウン変換を使用
+        logger.info("フォールバック: マークダウン変換を使用します")
+        return _process_to_markdown(content, fallback_profile)
 
     try:
-        # readabilityでドキュメント処理
-        doc = Document(content)
+        # readabilityでドキュメント処理（解析済みのツリーを渡す）
+        doc = Document(tree)
 
         # タイトルと本文を取得
         title = doc.title()
         summary_html = doc.summary()
 
-        # HTMLからプレーンテキストに変換
-        h = html2text.HTML2Text()
-        h.ignore_links = True  # リンクは無視（読みやすさ重視）
-        h.ignore_images = True  # 画像は無視
-        h.body_width = 0  # 行幅制限なし
-        h.unicode_snob = True
-        h.escape_snob = True
+        # HTMLからプレーンテキストに変換（既定はリンク・画像を除くTEXT）
+        h = get_converter(profile or MarkdownProfile.TEXT)
 
         # タイトルと本文を結合
         full_content = f"# {title}\n\n{summary_html}" if title else summary_html
@@ -378,14 +1545,14 @@ def _process_with_readability(content: str) -> str:
         # きわめて短い結果の場合はマークダウン変換にフォールバック
         if len(text) < 200:
             logger.info("readability結果が短いためmarkdownへフォールバックします")
-            return _process_to_markdown(content)
+            return render_markdown(tree, fallback_profile)
         return text
 
     except Exception as e:
         logger.error(f"readability処理エラー: {str(e)}")
-        # フォールバック: マークダウン変換を使用
+        # フォールバック: 同じツリーからマークダウン変換
         logger.info("フォールバック: マークダウン変換を使用します")
-        return _process_to_markdown(content)
+        return render_markdown(tree, fallback_profile)
 
 
 # 後方互換性のためのヘルパー関数（必要に応じて）